@@ -1 +1,22 @@
-# Enhanced Account Feed
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Account Feed Module
+
+Streaming Alpaca account state built on feed_common.AsyncFeed.
+
+Components:
+- AlpacaAccountFeed: trade_updates stream, periodic bulk REST reconcile
+- AccountBook: In-memory positions, open orders and buying power
+
+Usage:
+    from account_feed import AlpacaAccountFeed
+
+    account = AlpacaAccountFeed()
+    await account.start()
+    account.attach_price_feed(polygon_feed)  # live marks from PolygonDataFeed
+"""
+
+from .alpaca_account_feed import AccountBook, AlpacaAccountFeed
+
+__all__ = ['AccountBook', 'AlpacaAccountFeed']
+__version__ = '1.0.0'
@@ -1,2 +1,638 @@
-# Alpaca Account Feed - Combined Implementation
-# This file combines position, order, and account monitoring functionality
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Alpaca Account Feed - Streaming Position and Order Book
+Consumes trade_updates over WebSocket and keeps positions, open orders and buying power in memory
+Periodic bulk REST reconcile; positions marked to market from PolygonDataFeed trades
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from feed_common import AsyncFeed, load_feed_config
+
+logger = logging.getLogger(__name__)
+
+FEED_DIR = Path(__file__).parent
+
+OPEN_ORDER_STATUSES = {
+    'new', 'accepted', 'pending_new', 'accepted_for_bidding', 'partially_filled',
+    'pending_cancel', 'pending_replace', 'held', 'calculated', 'stopped', 'suspended',
+}
+FILL_EVENTS = {'fill', 'partial_fill'}
+
+INSERT_ACCOUNT = """
+INSERT INTO alpaca_account (
+    timestamp, account_id, cash, portfolio_value, buying_power, equity,
+    daytrade_count, pattern_day_trader, trading_blocked, source
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_POSITION = """
+INSERT INTO alpaca_positions (
+    timestamp, symbol, qty, avg_entry_price, current_price, market_value,
+    cost_basis, unrealized_pl, unrealized_plpc, source
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_ORDER = """
+INSERT INTO alpaca_orders (
+    timestamp, order_id, symbol, event, side, qty, filled_qty, filled_avg_price,
+    status, order_type, limit_price, submitted_at, filled_at
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def price_key(symbol: str) -> str:
+    """Normalize symbols across feeds (BTC/USD, BTC-USD and BTCUSD map to BTCUSD)"""
+    return symbol.replace("/", "").replace("-", "").upper()
+
+
+def to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an Alpaca RFC3339 timestamp into naive local time (nanosecond precision is truncated)"""
+    if not value:
+        return None
+    try:
+        value = value.replace("Z", "+00:00")
+        if "." in value:
+            head, tail = value.split(".", 1)
+            digits = "".join(c for c in tail if c.isdigit())
+            value = f"{head}.{digits[:6]}{tail[len(digits):]}"
+        return datetime.fromisoformat(value).astimezone().replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+@dataclass
+class Position:
+    """One open position"""
+    symbol: str
+    qty: float
+    avg_entry_price: float
+    current_price: float = 0.0
+    asset_class: str = 'us_equity'
+
+    @property
+    def cost_basis(self) -> float:
+        return self.qty * self.avg_entry_price
+
+    @property
+    def market_value(self) -> float:
+        return self.qty * self.current_price
+
+    @property
+    def unrealized_pl(self) -> float:
+        return self.market_value - self.cost_basis
+
+    @property
+    def unrealized_plpc(self) -> Optional[float]:
+        basis = abs(self.cost_basis)
+        return self.unrealized_pl / basis if basis else None
+
+
+class AccountBook:
+    """
+    In-memory account state
+
+    Features:
+    - Positions and open orders updated per trade update event
+    - Every fill deduplicated against the order's cumulative filled_qty, so an event seen twice
+      (reconnect, reconcile replay) never moves a position twice
+    - Cash and buying power adjusted by fill notional between reconciles
+    - O(1) mark-to-market by symbol, running totals kept incrementally
+    - Full replacement from REST with drift counting
+    """
+
+    def __init__(self, max_tracked_orders: int = 10000):
+        self.positions: Dict[str, Position] = {}  # price_key -> position
+        self.orders: Dict[str, Dict[str, Any]] = {}  # order id -> order
+        self.account: Dict[str, Any] = {}
+        self.cash = 0.0
+        self.buying_power = 0.0
+        self.long_market_value = 0.0
+        self.short_market_value = 0.0
+        # order id -> filled qty already applied; closed orders stay (bounded) so late duplicates are caught
+        self.filled_qty: "OrderedDict[str, float]" = OrderedDict()
+        self.max_tracked_orders = int(max_tracked_orders)
+
+        self.events_applied = 0
+        self.duplicate_fills = 0
+        self.reconciles = 0
+        self.drift_corrections = 0
+        self.last_reconcile: Optional[float] = None
+
+    # Incremental market value totals
+    def _remove_value(self, position: Position):
+        value = position.market_value
+        if value >= 0:
+            self.long_market_value -= value
+        else:
+            self.short_market_value -= value
+
+    def _add_value(self, position: Position):
+        value = position.market_value
+        if value >= 0:
+            self.long_market_value += value
+        else:
+            self.short_market_value += value
+
+    def _set_filled(self, order_id: str, qty: float):
+        self.filled_qty[order_id] = qty
+        self.filled_qty.move_to_end(order_id)
+        while len(self.filled_qty) > self.max_tracked_orders:
+            self.filled_qty.popitem(last=False)
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self.long_market_value + self.short_market_value
+
+    def mark(self, symbol: str, price: float) -> bool:
+        """Mark one position to market; returns False if not held"""
+        position = self.positions.get(price_key(symbol))
+        if position is None or price <= 0:
+            return False
+        self._remove_value(position)
+        position.current_price = price
+        self._add_value(position)
+        return True
+
+    def apply_trade_update(self, update: Dict[str, Any]) -> Optional[Position]:
+        """Apply one trade_updates event; returns the position touched by a fill"""
+        event = update.get('event', '')
+        order = update.get('order') or {}
+        order_id = order.get('id')
+        if not order_id:
+            return None
+        self.events_applied += 1
+
+        if order.get('status') in OPEN_ORDER_STATUSES:
+            self.orders[order_id] = order
+        else:
+            self.orders.pop(order_id, None)
+
+        if event not in FILL_EVENTS:
+            return None
+
+        # The order's cumulative filled_qty minus what was already applied is the new fill;
+        # zero or less means this fill is already in the book
+        applied = self.filled_qty.get(order_id, 0.0)
+        if order.get('filled_qty') is not None:
+            fill_qty = to_float(order.get('filled_qty')) - applied
+        else:
+            fill_qty = to_float(update.get('qty'))
+        fill_price = to_float(update.get('price'), to_float(order.get('filled_avg_price')))
+        symbol = order.get('symbol', '')
+        key = price_key(symbol)
+        position = self.positions.get(key)
+
+        if fill_qty <= 1e-12:
+            self.duplicate_fills += 1
+            return self._correct_position(key, position, update)
+        self._set_filled(order_id, applied + fill_qty)
+        if fill_price <= 0:
+            return None
+
+        signed_qty = fill_qty if order.get('side') == 'buy' else -fill_qty
+
+        notional = signed_qty * fill_price
+        self.cash -= notional
+        self.buying_power -= notional
+
+        if position is None:
+            position = Position(symbol=symbol, qty=0.0, avg_entry_price=fill_price,
+                                current_price=fill_price, asset_class=order.get('asset_class', 'us_equity'))
+            self.positions[key] = position
+        else:
+            self._remove_value(position)
+
+        old_qty = position.qty
+        new_qty = old_qty + signed_qty
+        if old_qty == 0 or (new_qty != 0 and (old_qty > 0) != (new_qty > 0)):
+            position.avg_entry_price = fill_price  # opened or flipped side
+        elif abs(new_qty) > abs(old_qty):
+            position.avg_entry_price = (old_qty * position.avg_entry_price + signed_qty * fill_price) / new_qty
+        position.qty = new_qty
+        position.current_price = fill_price
+
+        # The event's position_qty is authoritative when present
+        if update.get('position_qty') is not None:
+            reported = to_float(update.get('position_qty'))
+            if abs(reported - position.qty) > 1e-9:
+                self.drift_corrections += 1
+                position.qty = reported
+
+        if position.qty == 0:
+            del self.positions[key]
+        else:
+            self._add_value(position)
+        return position
+
+    def _correct_position(self, key: str, position: Optional[Position], update: Dict[str, Any]) -> Optional[Position]:
+        """Apply a duplicate fill's position_qty (the position after that fill) to a held position"""
+        if position is None or update.get('position_qty') is None:
+            return None
+        reported = to_float(update.get('position_qty'))
+        if abs(reported - position.qty) <= 1e-9:
+            return None
+        self.drift_corrections += 1
+        self._remove_value(position)
+        position.qty = reported
+        if position.qty == 0:
+            del self.positions[key]
+        else:
+            self._add_value(position)
+        return position
+
+    def replace(self, account: Dict[str, Any], positions: List[Dict[str, Any]], orders: List[Dict[str, Any]],
+                closed_orders: Optional[List[Dict[str, Any]]] = None):
+        """
+        Replace the book with a REST snapshot, counting positions that had drifted
+
+        Filled quantities of the open and recently closed orders in the snapshot become the
+        dedup baseline, so fills the snapshot already contains are skipped when replayed.
+        """
+        snapshot: Dict[str, Position] = {}
+        for row in positions:
+            symbol = row.get('symbol', '')
+            snapshot[price_key(symbol)] = Position(
+                symbol=symbol,
+                qty=to_float(row.get('qty')),
+                avg_entry_price=to_float(row.get('avg_entry_price')),
+                current_price=to_float(row.get('current_price')),
+                asset_class=row.get('asset_class', 'us_equity')
+            )
+
+        for key in set(snapshot) | set(self.positions):
+            old, new = self.positions.get(key), snapshot.get(key)
+            if old is None or new is None or abs(old.qty - new.qty) > 1e-9:
+                self.drift_corrections += 1
+
+        # Keep fresher streaming marks where we have them
+        for key, position in snapshot.items():
+            old = self.positions.get(key)
+            if old is not None and old.current_price > 0:
+                position.current_price = old.current_price
+
+        self.positions = snapshot
+        self.orders = {order['id']: order for order in orders if order.get('id')}
+        for order in list(closed_orders or []) + list(self.orders.values()):
+            if order.get('id'):
+                self._set_filled(order['id'], to_float(order.get('filled_qty')))
+        self.set_account(account)
+
+        self.long_market_value = 0.0
+        self.short_market_value = 0.0
+        for position in self.positions.values():
+            self._add_value(position)
+
+        self.reconciles += 1
+        self.last_reconcile = time.time()
+
+    def set_account(self, account: Dict[str, Any]):
+        """Take cash and buying power from a REST account snapshot"""
+        self.account = account
+        self.cash = to_float(account.get('cash'))
+        self.buying_power = to_float(account.get('buying_power'))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'cash': self.cash,
+            'buying_power': self.buying_power,
+            'equity': self.equity,
+            'long_market_value': self.long_market_value,
+            'short_market_value': self.short_market_value,
+            'positions': len(self.positions),
+            'open_orders': len(self.orders),
+        }
+
+
+class AlpacaAccountFeed(AsyncFeed):
+    """
+    Streaming Alpaca account feed
+
+    Features:
+    - trade_updates WebSocket applied to the AccountBook per event
+    - Bulk REST reconcile (account, all positions, open and recently closed orders) on a
+      slow timer and after every reconnect
+    - Stream events arriving while a reconcile is in flight are held and replayed on top of
+      the snapshot (fills it already contains are deduplicated)
+    - The resources are not one point-in-time view, so when a fill lands mid-reconcile the
+      account is fetched again (events held) until a fetch completes with no fill in flight
+    - O(1) mark-to-market from PolygonDataFeed trade callbacks
+    - Account, position and order rows through the batched QuestDB writer
+    """
+
+    name = "alpaca_account_feed"
+
+    def __init__(self, config: Optional[dict] = None, feed_dir: Path = FEED_DIR):
+        super().__init__(config if config is not None else load_feed_config(feed_dir), feed_dir)
+
+        alpaca_config = self.config.get('alpaca', {})
+        self.api_key = alpaca_config.get('api_key')
+        self.secret_key = alpaca_config.get('secret_key')
+        paper = str(alpaca_config.get('paper', 'true')).lower() == 'true'
+        self.base_url = (alpaca_config.get('base_url') or
+                         ('https://paper-api.alpaca.markets' if paper else 'https://api.alpaca.markets')).rstrip('/')
+        self.stream_url = alpaca_config.get('stream_url') or self.base_url.replace('http', 'ws', 1) + '/stream'
+
+        stream_config = self.config.get('stream', {})
+        self.reconnect_delay = float(stream_config.get('reconnect_delay', 1))
+        self.reconnect_max_delay = float(stream_config.get('reconnect_max_delay', 60))
+        self.heartbeat = float(stream_config.get('heartbeat', 30))
+
+        reconcile_config = self.config.get('reconcile', {})
+        self.closed_orders_limit = int(reconcile_config.get('closed_orders_limit', 100))
+        self.account_refresh_attempts = int(reconcile_config.get('account_refresh_attempts', 3))
+
+        self.book = AccountBook(max_tracked_orders=reconcile_config.get('max_tracked_orders', 10000))
+        self._stream_task: Optional[asyncio.Task] = None
+        self._reconcile_lock = asyncio.Lock()
+        self._held_updates: Optional[List[Dict[str, Any]]] = None  # events received during a reconcile
+        self.stream_connected = False
+        self.stream_reconnects = 0
+        self.account_refreshes = 0
+        self.marks = 0
+
+    @property
+    def auth_headers(self) -> Dict[str, str]:
+        return {'APCA-API-KEY-ID': self.api_key or '', 'APCA-API-SECRET-KEY': self.secret_key or ''}
+
+    # Mark-to-market
+    def attach_price_feed(self, feed):
+        """Mark positions from a PolygonDataFeed: seed from its buffers, then follow its trades"""
+        buffers = {price_key(symbol[len("crypto_"):] if symbol.startswith("crypto_") else symbol): prices
+                   for symbol, prices in feed.price_buffers.items()}
+        for key, position in self.book.positions.items():
+            prices = buffers.get(key)
+            if prices:
+                self.book.mark(position.symbol, prices[-1])
+        feed.add_callback(self.on_market_data)
+
+    def on_market_data(self, market_data):
+        """PolygonDataFeed callback; a dict lookup when the symbol is not held"""
+        if market_data.price and self.book.mark(market_data.symbol, market_data.price):
+            self.marks += 1
+
+    # Reconcile (AsyncFeed polling loop)
+    async def poll_once(self) -> int:
+        await self.reconcile()
+        return 0
+
+    async def reconcile(self):
+        """Replace the book from one bulk call per resource, issued concurrently"""
+        async with self._reconcile_lock:
+            filled = await self._holding_updates(self._load_snapshot)
+
+            # A fill inside the window can be in the account cash but not in the orders' filled_qty
+            # (or the reverse), so its replay would move cash twice; positions follow position_qty
+            attempts = 0
+            while filled and attempts < self.account_refresh_attempts:
+                attempts += 1
+                self.account_refreshes += 1
+                filled = await self._holding_updates(self._load_account)
+            if filled:
+                logger.warning("Fills kept arriving during reconcile; cash is exact again after the next reconcile")
+
+        now = datetime.now()
+        self._store_account(now, 'reconcile')
+        for position in self.book.positions.values():
+            self._store_position(now, position, 'reconcile')
+        logger.info(f"Account reconciled: {self.book.summary()}")
+
+    async def _holding_updates(self, fetch) -> bool:
+        """Run fetch() with stream events held, then replay them; True if a fill arrived meanwhile"""
+        self._held_updates = []
+        held: List[Dict[str, Any]] = []
+        try:
+            await fetch()
+        finally:
+            # Replay what arrived meanwhile, on top of the snapshot or the old book
+            held, self._held_updates = self._held_updates, None
+            for update in held:
+                self._apply_trade_update(update)
+        return any(update.get('event') in FILL_EVENTS for update in held)
+
+    async def _load_snapshot(self):
+        (_, account), (_, positions), (_, orders), (_, closed_orders) = await asyncio.gather(
+            self.fetch_json(f"{self.base_url}/v2/account", headers=self.auth_headers),
+            self.fetch_json(f"{self.base_url}/v2/positions", headers=self.auth_headers),
+            self.fetch_json(f"{self.base_url}/v2/orders", params={'status': 'open', 'limit': 500},
+                            headers=self.auth_headers),
+            self.fetch_json(f"{self.base_url}/v2/orders",
+                            params={'status': 'closed', 'limit': self.closed_orders_limit,
+                                    'direction': 'desc'},
+                            headers=self.auth_headers),
+        )
+        self.book.replace(account or {}, positions or [], orders or [], closed_orders or [])
+
+    async def _load_account(self):
+        _, account = await self.fetch_json(f"{self.base_url}/v2/account", headers=self.auth_headers)
+        self.book.set_account(account or {})
+
+    # Streaming
+    async def start(self):
+        await super().start()
+        self._stream_task = asyncio.create_task(self._run_stream())
+
+    async def stop(self):
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            await asyncio.gather(self._stream_task, return_exceptions=True)
+            self._stream_task = None
+        await super().stop()
+
+    async def _run_stream(self):
+        """Keep the trade_updates stream connected with exponential backoff and jitter"""
+        attempt = 0
+        while self.running:
+            try:
+                await self._consume_stream()
+                attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Trade updates stream error: {e}")
+            self.stream_connected = False
+            if not self.running:
+                break
+
+            attempt += 1
+            self.stream_reconnects += 1
+            delay = min(self.reconnect_delay * (2 ** (attempt - 1)), self.reconnect_max_delay)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _consume_stream(self):
+        import aiohttp
+
+        session = await self.http.session()
+        async with session.ws_connect(self.stream_url, heartbeat=self.heartbeat) as ws:
+            await ws.send_json({'action': 'auth', 'key': self.api_key, 'secret': self.secret_key})
+            await ws.send_json({'action': 'listen', 'data': {'streams': ['trade_updates']}})
+
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    payload = json.loads(message.data)
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    payload = json.loads(message.data.decode())
+                else:
+                    break
+                await self._handle_stream_message(payload)
+
+    async def _handle_stream_message(self, payload: Dict[str, Any]):
+        stream = payload.get('stream')
+        data = payload.get('data') or {}
+
+        if stream == 'authorization':
+            if data.get('status') != 'authorized':
+                raise ConnectionError(f"Alpaca stream authorization failed: {data}")
+        elif stream == 'listening':
+            self.stream_connected = True
+            logger.info(f"Listening to {data.get('streams')}")
+            # Events may have been missed while disconnected
+            asyncio.create_task(self._safe_reconcile())
+        elif stream == 'trade_updates':
+            self._apply_trade_update(data)
+
+    async def _safe_reconcile(self):
+        try:
+            await self.reconcile()
+        except Exception as e:
+            logger.error(f"Account reconcile failed: {e}")
+
+    def _apply_trade_update(self, update: Dict[str, Any]):
+        if self._held_updates is not None:
+            self._held_updates.append(update)
+            return
+        try:
+            position = self.book.apply_trade_update(update)
+            now = datetime.now()
+            self._store_order(now, update)
+            if update.get('event') in FILL_EVENTS:
+                self._store_account(now, 'stream')
+                if position is not None:
+                    self._store_position(now, position, 'stream')
+        except Exception as e:
+            logger.error(f"Error applying trade update: {e}")
+
+    # Storage
+    def _store_account(self, timestamp: datetime, source: str):
+        account = self.book.account
+        self.write(INSERT_ACCOUNT, (
+            timestamp,
+            account.get('id') or account.get('account_number'),
+            self.book.cash,
+            self.book.equity,
+            self.book.buying_power,
+            self.book.equity,
+            int(to_float(account.get('daytrade_count'))),
+            bool(account.get('pattern_day_trader', False)),
+            bool(account.get('trading_blocked', False)),
+            source
+        ))
+
+    def _store_position(self, timestamp: datetime, position: Position, source: str):
+        self.write(INSERT_POSITION, (
+            timestamp,
+            position.symbol,
+            position.qty,
+            position.avg_entry_price,
+            position.current_price,
+            position.market_value,
+            position.cost_basis,
+            position.unrealized_pl,
+            position.unrealized_plpc,
+            source
+        ))
+
+    def _store_order(self, timestamp: datetime, update: Dict[str, Any]):
+        order = update.get('order') or {}
+        self.write(INSERT_ORDER, (
+            parse_timestamp(update.get('timestamp')) or timestamp,
+            order.get('id'),
+            order.get('symbol'),
+            update.get('event'),
+            order.get('side'),
+            to_float(order.get('qty')),
+            to_float(order.get('filled_qty')),
+            to_float(order.get('filled_avg_price'), None),
+            order.get('status'),
+            order.get('order_type') or order.get('type'),
+            to_float(order.get('limit_price'), None),
+            parse_timestamp(order.get('submitted_at')),
+            parse_timestamp(order.get('filled_at'))
+        ))
+
+    # Utility methods for agentic AI system
+    def get_positions(self) -> Dict[str, Dict[str, Any]]:
+        """Current positions with live marks"""
+        return {
+            position.symbol: {
+                'qty': position.qty,
+                'avg_entry_price': position.avg_entry_price,
+                'current_price': position.current_price,
+                'market_value': position.market_value,
+                'unrealized_pl': position.unrealized_pl,
+                'unrealized_plpc': position.unrealized_plpc,
+            }
+            for position in self.book.positions.values()
+        }
+
+    def get_open_orders(self) -> List[Dict[str, Any]]:
+        return list(self.book.orders.values())
+
+    def get_account_summary(self) -> Dict[str, Any]:
+        return self.book.summary()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = super().get_metrics()
+        metrics.update({
+            'stream_connected': self.stream_connected,
+            'stream_reconnects': self.stream_reconnects,
+            'events_applied': self.book.events_applied,
+            'duplicate_fills': self.book.duplicate_fills,
+            'reconciles': self.book.reconciles,
+            'account_refreshes': self.account_refreshes,
+            'drift_corrections': self.book.drift_corrections,
+            'marks': self.marks,
+        })
+        return metrics
+
+
+# Main execution
+async def main():
+    """Run the account feed until interrupted"""
+    config = load_feed_config(FEED_DIR)
+    log_config = config.get('logging', {})
+    logging.basicConfig(
+        level=getattr(logging, log_config.get('level', 'INFO')),
+        format=log_config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    feed = AlpacaAccountFeed(config)
+    try:
+        await feed.start()
+        while True:
+            await asyncio.sleep(60)
+            logger.info(f"Account: {feed.get_account_summary()}")
+    except KeyboardInterrupt:
+        logger.info("Shutting down account feed...")
+    finally:
+        await feed.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Local Fake Alpaca Server for Account Feed Development
+Implements the trade_updates stream (auth/listen) and the account, positions and orders REST calls
+Fills pushed with emit_fill() update both the stream and the REST state
+
+    python -m account_feed.fake_alpaca_server --port 8090
+    python -m account_feed.fake_alpaca_server --smoke
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def now_rfc3339() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeAlpacaServer:
+    """
+    Minimal Alpaca paper-trading server
+
+    Features:
+    - /stream WebSocket: auth, listen, trade_updates events
+    - /v2/account, /v2/positions, /v2/orders?status=open|closed|all
+    - emit_order()/emit_fill() keep REST state consistent with the events sent
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8090, cash: float = 100000.0):
+        self.host = host
+        self.port = port
+        self.cash = cash
+        self.positions: Dict[str, Dict[str, float]] = {}  # symbol -> {'qty', 'avg_entry_price', 'current_price'}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.clients: List[Any] = []
+        self.rest_requests = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # REST
+    async def _account(self, request):
+        from aiohttp import web
+
+        self.rest_requests += 1
+        market_value = sum(p['qty'] * p['current_price'] for p in self.positions.values())
+        return web.json_response({
+            'id': 'fake-account', 'status': 'ACTIVE', 'currency': 'USD',
+            'cash': str(self.cash), 'buying_power': str(self.cash),
+            'equity': str(self.cash + market_value), 'portfolio_value': str(self.cash + market_value),
+            'daytrade_count': 0, 'pattern_day_trader': False, 'trading_blocked': False,
+        })
+
+    async def _positions(self, request):
+        from aiohttp import web
+
+        self.rest_requests += 1
+        return web.json_response([
+            {'symbol': symbol, 'qty': str(p['qty']), 'avg_entry_price': str(p['avg_entry_price']),
+             'current_price': str(p['current_price']), 'asset_class': 'us_equity'}
+            for symbol, p in self.positions.items()
+        ])
+
+    async def _orders(self, request):
+        from aiohttp import web
+
+        self.rest_requests += 1
+        status = request.query.get('status', 'open')
+        orders = [o for o in self.orders.values()
+                  if status == 'all' or (o['status'] in ('new', 'partially_filled')) == (status == 'open')]
+        return web.json_response(orders)
+
+    # Stream
+    async def _stream(self, request):
+        from aiohttp import WSMsgType, web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            payload = message.json()
+            if payload.get('action') == 'auth':
+                await ws.send_json({'stream': 'authorization',
+                                    'data': {'status': 'authorized', 'action': 'authenticate'}})
+            elif payload.get('action') == 'listen':
+                self.clients.append(ws)
+                await ws.send_json({'stream': 'listening', 'data': {'streams': ['trade_updates']}})
+        if ws in self.clients:
+            self.clients.remove(ws)
+        return ws
+
+    async def _broadcast(self, data: Dict[str, Any]):
+        for ws in list(self.clients):
+            await ws.send_json({'stream': 'trade_updates', 'data': data})
+
+    async def emit_order(self, symbol: str, side: str, qty: float, limit_price: float) -> str:
+        """Accept a new limit order and announce it"""
+        order_id = str(uuid.uuid4())
+        order = {
+            'id': order_id, 'symbol': symbol, 'side': side, 'qty': str(qty), 'filled_qty': '0',
+            'filled_avg_price': None, 'order_type': 'limit', 'limit_price': str(limit_price),
+            'status': 'new', 'submitted_at': now_rfc3339(), 'filled_at': None, 'asset_class': 'us_equity',
+        }
+        self.orders[order_id] = order
+        await self._broadcast({'event': 'new', 'timestamp': now_rfc3339(), 'order': dict(order)})
+        return order_id
+
+    async def emit_fill(self, order_id: str, qty: float, price: float):
+        """Fill (part of) an order and announce it"""
+        order = self.orders[order_id]
+        filled = float(order['filled_qty']) + qty
+        previous_value = float(order['filled_qty']) * float(order['filled_avg_price'] or 0)
+        order['filled_qty'] = str(filled)
+        order['filled_avg_price'] = str((previous_value + qty * price) / filled)
+        complete = filled >= float(order['qty'])
+        order['status'] = 'filled' if complete else 'partially_filled'
+        if complete:
+            order['filled_at'] = now_rfc3339()
+
+        signed = qty if order['side'] == 'buy' else -qty
+        self.cash -= signed * price
+        position = self.positions.setdefault(order['symbol'], {'qty': 0.0, 'avg_entry_price': price, 'current_price': price})
+        new_qty = position['qty'] + signed
+        if position['qty'] == 0 or (new_qty != 0 and (position['qty'] > 0) != (new_qty > 0)):
+            position['avg_entry_price'] = price
+        elif abs(new_qty) > abs(position['qty']):
+            position['avg_entry_price'] = (position['qty'] * position['avg_entry_price'] + signed * price) / new_qty
+        position['qty'] = new_qty
+        position['current_price'] = price
+        if new_qty == 0:
+            del self.positions[order['symbol']]
+
+        await self._broadcast({
+            'event': 'fill' if complete else 'partial_fill', 'timestamp': now_rfc3339(),
+            'price': str(price), 'qty': str(qty), 'position_qty': str(new_qty), 'order': dict(order),
+        })
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/stream', self._stream)
+        app.router.add_get('/v2/account', self._account)
+        app.router.add_get('/v2/positions', self._positions)
+        app.router.add_get('/v2/orders', self._orders)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Fake Alpaca server listening on {self.base_url}")
+
+    async def stop(self):
+        for ws in list(self.clients):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def smoke_account_feed(port: int):
+    """Stream a few orders and fills, then check the streamed book against a REST reconcile"""
+    from account_feed.alpaca_account_feed import AlpacaAccountFeed
+
+    server = FakeAlpacaServer(port=port)
+    await server.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                'alpaca': {'api_key': 'fake', 'secret_key': 'fake', 'base_url': server.base_url},
+                'feed': {'poll_interval': 3600},
+                'rate_limit': {'requests_per_minute': 6000, 'burst': 10},
+                'state': {'file': str(Path(tmp) / 'state.json')},
+                'spool': {'directory': str(Path(tmp) / 'spool')},
+            }
+            feed = AlpacaAccountFeed(config, feed_dir=Path(tmp))
+            feed.running = True
+            feed.http.acquire()
+            stream = asyncio.create_task(feed._run_stream())
+            try:
+                while not server.clients:
+                    await asyncio.sleep(0.05)
+
+                buy = await server.emit_order('AAPL', 'buy', 100, 190.0)
+                await server.emit_fill(buy, 40, 189.5)
+                await server.emit_fill(buy, 60, 190.0)
+                sell = await server.emit_order('AAPL', 'sell', 30, 195.0)
+                await server.emit_fill(sell, 30, 195.0)
+                await server.emit_order('MSFT', 'buy', 10, 400.0)
+                await asyncio.sleep(0.2)
+
+                streamed = feed.get_positions()
+                streamed_orders = len(feed.get_open_orders())
+                await feed.reconcile()
+                reconciled = feed.get_positions()
+
+                print(f"streamed positions: {streamed}, open orders: {streamed_orders}")
+                print(f"reconciled positions: {reconciled}, open orders: {len(feed.get_open_orders())}")
+                print(f"metrics: {feed.get_metrics()}")
+                if streamed.keys() != reconciled.keys() or any(
+                        abs(streamed[s]['qty'] - reconciled[s]['qty']) > 1e-9 for s in streamed):
+                    raise SystemExit("smoke test failed: streamed book differs from REST")
+            finally:
+                feed.running = False
+                stream.cancel()
+                await asyncio.gather(stream, return_exceptions=True)
+                await feed.http.release()
+    finally:
+        await server.stop()
+
+
+async def serve(port: int):
+    server = FakeAlpacaServer(port=port)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Alpaca server for account feed development")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--smoke", action="store_true", help="Run the account feed against the fake server and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(smoke_account_feed(args.port) if args.smoke else serve(args.port))
@@ -0,0 +1,47 @@
+-- QuestDB Schema for Agentic AI Trading System
+-- Account Feed Module - Alpaca Account Tables
+
+-- Account balances (after each fill and each reconcile)
+CREATE TABLE IF NOT EXISTS alpaca_account (
+    timestamp TIMESTAMP,
+    account_id SYMBOL,
+    cash DOUBLE,
+    portfolio_value DOUBLE,
+    buying_power DOUBLE,
+    equity DOUBLE,
+    daytrade_count INT,
+    pattern_day_trader BOOLEAN,
+    trading_blocked BOOLEAN,
+    source SYMBOL -- 'stream', 'reconcile'
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Position snapshots (qty 0 marks a closed position)
+CREATE TABLE IF NOT EXISTS alpaca_positions (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    qty DOUBLE,
+    avg_entry_price DOUBLE,
+    current_price DOUBLE,
+    market_value DOUBLE,
+    cost_basis DOUBLE,
+    unrealized_pl DOUBLE,
+    unrealized_plpc DOUBLE,
+    source SYMBOL -- 'stream', 'reconcile'
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Order lifecycle events from trade_updates
+CREATE TABLE IF NOT EXISTS alpaca_orders (
+    timestamp TIMESTAMP,
+    order_id STRING,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    event SYMBOL,
+    side SYMBOL,
+    qty DOUBLE,
+    filled_qty DOUBLE,
+    filled_avg_price DOUBLE,
+    status SYMBOL,
+    order_type SYMBOL,
+    limit_price DOUBLE,
+    submitted_at TIMESTAMP,
+    filled_at TIMESTAMP
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
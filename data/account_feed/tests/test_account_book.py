@@ -0,0 +1,48 @@
+from account_feed.alpaca_account_feed import AccountBook
+
+
+def fill(order_id, filled_qty, qty, price, position_qty, status='partially_filled', event='partial_fill'):
+    return {
+        'event': event, 'price': str(price), 'qty': str(qty), 'position_qty': str(position_qty),
+        'order': {'id': order_id, 'symbol': 'AAPL', 'side': 'buy', 'qty': '10',
+                  'filled_qty': str(filled_qty), 'status': status},
+    }
+
+
+def test_duplicate_fill_is_applied_once():
+    book = AccountBook()
+    update = fill('o1', 4, 4, 100.0, 4)
+    book.apply_trade_update(update)
+    book.apply_trade_update(update)
+
+    assert book.positions['AAPL'].qty == 4
+    assert book.cash == -400.0
+    assert book.duplicate_fills == 1
+
+
+def test_fill_already_in_the_snapshot_is_not_replayed():
+    book = AccountBook()
+    book.apply_trade_update(fill('o1', 4, 4, 100.0, 4))
+    final = fill('o1', 10, 6, 101.0, 10, status='filled', event='fill')
+
+    # The snapshot was taken after the final fill; the held event is replayed afterwards
+    book.replace({'cash': '-1006'},
+                 [{'symbol': 'AAPL', 'qty': '10', 'avg_entry_price': '100.6', 'current_price': '101'}],
+                 [], closed_orders=[final['order']])
+    book.apply_trade_update(final)
+
+    assert book.positions['AAPL'].qty == 10
+    assert book.cash == -1006.0
+
+
+def test_fill_after_the_snapshot_is_applied():
+    book = AccountBook()
+    book.apply_trade_update(fill('o1', 4, 4, 100.0, 4))
+    book.replace({'cash': '-400'},
+                 [{'symbol': 'AAPL', 'qty': '4', 'avg_entry_price': '100', 'current_price': '100'}],
+                 [{'id': 'o1', 'filled_qty': '4', 'status': 'partially_filled'}])
+    book.apply_trade_update(fill('o1', 10, 6, 101.0, 10, status='filled', event='fill'))
+
+    assert book.positions['AAPL'].qty == 10
+    assert book.cash == -1006.0
+    assert 'o1' not in book.orders
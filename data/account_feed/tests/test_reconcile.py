@@ -0,0 +1,100 @@
+import asyncio
+import socket
+
+import pytest
+
+from account_feed.alpaca_account_feed import AlpacaAccountFeed
+from account_feed.fake_alpaca_server import FakeAlpacaServer
+from feed_common import SharedHTTPClient
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_client(monkeypatch):
+    monkeypatch.setattr(SharedHTTPClient, '_instance', None)
+
+
+def make_feed(tmp_path, server, **reconcile):
+    config = {
+        'alpaca': {'api_key': 'fake', 'secret_key': 'fake', 'base_url': server.base_url},
+        'feed': {'poll_interval': 3600},
+        'rate_limit': {'requests_per_minute': 6000, 'burst': 10},
+        'reconcile': reconcile,
+        'state': {'file': str(tmp_path / 'state.json')},
+        'spool': {'directory': str(tmp_path / 'spool')},
+    }
+    return AlpacaAccountFeed(config, feed_dir=tmp_path)
+
+
+def fill_before_account_fetch(feed, server, order_id, qty, price):
+    """Land a fill after positions and orders are read but before the account is"""
+    fetch_json = feed.fetch_json
+    others_done = asyncio.Event()
+    pending = {'others': 3, 'armed': True}
+
+    async def fetch(url, **kwargs):
+        if url.endswith('/v2/account') and pending['armed']:
+            pending['armed'] = False
+            await others_done.wait()
+            await server.emit_fill(order_id, qty, price)
+            await asyncio.sleep(0.1)  # the fill event reaches the stream while the reconcile holds events
+            return await fetch_json(url, **kwargs)
+        result = await fetch_json(url, **kwargs)
+        if not url.endswith('/v2/account'):
+            pending['others'] -= 1
+            if pending['others'] == 0:
+                others_done.set()
+        return result
+
+    feed.fetch_json = fetch
+
+
+def run_fill_during_reconcile(tmp_path, **reconcile):
+    server = FakeAlpacaServer(port=free_port())
+    feed = make_feed(tmp_path, server, **reconcile)
+
+    async def run():
+        await server.start()
+        feed.running = True
+        feed.http.acquire()
+        stream = asyncio.create_task(feed._run_stream())
+        try:
+            while feed.book.reconciles < 1:  # the reconcile started on listen
+                await asyncio.sleep(0.02)
+            buy = await server.emit_order('AAPL', 'buy', 100, 190.0)
+            await server.emit_fill(buy, 40, 190.0)
+            await asyncio.sleep(0.1)
+
+            fill_before_account_fetch(feed, server, buy, 60, 191.0)
+            await feed.reconcile()
+        finally:
+            feed.running = False
+            stream.cancel()
+            await asyncio.gather(stream, return_exceptions=True)
+            await feed.http.release()
+            await server.stop()
+        return server, feed
+
+    return asyncio.run(run())
+
+
+def test_fill_during_reconcile_is_not_debited_twice(tmp_path):
+    server, feed = run_fill_during_reconcile(tmp_path)
+
+    assert feed.book.cash == pytest.approx(server.cash)
+    assert feed.book.buying_power == pytest.approx(server.cash)
+    assert feed.get_positions()['AAPL']['qty'] == pytest.approx(server.positions['AAPL']['qty'])
+    assert feed.account_refreshes == 1
+
+
+def test_without_account_refresh_the_fill_is_debited_twice(tmp_path):
+    # The race the refresh closes: the snapshot's cash has the fill, its orders do not
+    server, feed = run_fill_during_reconcile(tmp_path, account_refresh_attempts=0)
+
+    assert feed.book.cash == pytest.approx(server.cash - 60 * 191.0)
+    assert feed.account_refreshes == 0
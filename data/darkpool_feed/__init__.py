@@ -1 +1,19 @@
-# Enhanced Darkpool_feed
+#!/usr/bin/env python3
+"""
+Dark Pool Feed Module
+
+Off-exchange (TRF) print classification and per-symbol aggregates computed from the
+live stock trade stream, so dark pool analytics need no extra API calls.
+
+Usage:
+    from darkpool_feed import DarkPoolAggregator
+
+    aggregator = DarkPoolAggregator(exclude_conditions=[...])
+    aggregator.on_trade("AAPL", 190.12, 25000, timestamp, exchange=4, conditions=[...])
+    summaries = aggregator.drain_summaries()
+"""
+
+from .darkpool_feed import DarkPoolAggregator, DarkPoolSummary
+
+__all__ = ['DarkPoolAggregator', 'DarkPoolSummary']
+__version__ = '1.0.0'
@@ -1 +1,215 @@
-# Enhanced Darkpool_feed Implementation
+#!/usr/bin/env python3
+"""
+Off-Exchange (Dark Pool) Print Aggregation
+Classifies TRF / off-exchange stock prints from the live trade stream
+Keeps fixed-size per-symbol aggregates and emits periodic summaries instead of per-print rows
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Polygon exchange id for FINRA trade reporting facilities (off-exchange prints)
+TRF_EXCHANGE_ID = 4
+
+
+class PriceLevels:
+    """
+    Top-K price levels by notional (Space-Saving heavy hitters)
+
+    At most `capacity` levels are tracked; a new level replaces the smallest one and
+    inherits its notional as the error bound, so memory is fixed per symbol.
+    """
+
+    __slots__ = ('capacity', 'level_size', 'levels')
+
+    def __init__(self, capacity: int = 16, level_size: float = 0.01):
+        self.capacity = capacity
+        self.level_size = level_size
+        self.levels: Dict[float, List[float]] = {}  # level price -> [notional, error]
+
+    def add(self, price: float, notional: float):
+        level = round(round(price / self.level_size) * self.level_size, 6)
+        counter = self.levels.get(level)
+        if counter is not None:
+            counter[0] += notional
+        elif len(self.levels) < self.capacity:
+            self.levels[level] = [notional, 0.0]
+        else:
+            smallest = min(self.levels, key=lambda key: self.levels[key][0])
+            floor = self.levels.pop(smallest)[0]
+            self.levels[level] = [floor + notional, floor]
+
+    def top(self, count: int) -> List[Tuple[float, float]]:
+        ranked = sorted(self.levels.items(), key=lambda item: item[1][0], reverse=True)
+        return [(level, counter[0]) for level, counter in ranked[:count]]
+
+    def clear(self):
+        self.levels.clear()
+
+
+class SymbolDarkPool:
+    """Per-symbol session aggregates"""
+
+    __slots__ = (
+        'session', 'total_volume', 'dark_volume', 'dark_notional', 'dark_prints',
+        'block_prints', 'block_volume', 'block_notional', 'interval_dark_volume',
+        'levels', 'last_price',
+    )
+
+    def __init__(self, level_capacity: int, level_size: float):
+        self.levels = PriceLevels(level_capacity, level_size)
+        self.session: Optional[date] = None
+        self.reset()
+
+    def reset(self):
+        self.total_volume = 0
+        self.dark_volume = 0
+        self.dark_notional = 0.0
+        self.dark_prints = 0
+        self.block_prints = 0
+        self.block_volume = 0
+        self.block_notional = 0.0
+        self.interval_dark_volume = 0
+        self.last_price = 0.0
+        self.levels.clear()
+
+
+@dataclass
+class DarkPoolSummary:
+    """Periodic summary row for one symbol"""
+    symbol: str
+    session: date
+    total_volume: int
+    dark_volume: int
+    dark_share: Optional[float]
+    dark_notional: float
+    dark_vwap: Optional[float]
+    dark_prints: int
+    block_prints: int
+    block_volume: int
+    block_notional: float
+    interval_dark_volume: int
+    top_levels: List[Tuple[float, float]]
+
+    @property
+    def top_levels_text(self) -> str:
+        return ",".join(f"{price:g}:{notional:.0f}" for price, notional in self.top_levels)
+
+
+class DarkPoolAggregator:
+    """
+    Incremental dark pool analytics over the stock trade stream
+
+    Features:
+    - TRF (exchange 4) prints are off-exchange unless a condition is excluded
+    - Per-symbol dark volume share, dark VWAP and block print counts for the session
+    - Top price levels by dark notional in a fixed-size Space-Saving table
+    - Summaries only for symbols that printed since the last summary
+    """
+
+    def __init__(self, exclude_conditions: Iterable[int] = (), block_size: int = 10000,
+                 block_notional: float = 200000.0, level_capacity: int = 16,
+                 level_size: float = 0.01, top_levels: int = 5):
+        self.exclude_conditions: Set[int] = set(exclude_conditions)
+        self.block_size = int(block_size)
+        self.block_notional = float(block_notional)
+        self.level_capacity = int(level_capacity)
+        self.level_size = float(level_size)
+        self.top_levels = int(top_levels)
+
+        self.symbols: Dict[str, SymbolDarkPool] = {}
+        self.dirty: Set[str] = set()
+
+        self.prints_seen = 0
+        self.dark_prints = 0
+        self.excluded_prints = 0
+
+    def is_off_exchange(self, exchange: Optional[int], conditions: Optional[Iterable[int]],
+                        trf_id: Optional[int] = None) -> bool:
+        if exchange != TRF_EXCHANGE_ID and trf_id is None:
+            return False
+        if conditions and self.exclude_conditions.intersection(conditions):
+            self.excluded_prints += 1
+            return False
+        return True
+
+    def on_trade(self, symbol: str, price: float, size: int, timestamp: datetime,
+                 exchange: Optional[int], conditions: Optional[Iterable[int]] = None,
+                 trf_id: Optional[int] = None) -> bool:
+        """Account one stock print; returns True if it was classified off-exchange"""
+        if price <= 0 or size <= 0:
+            return False
+        self.prints_seen += 1
+
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = SymbolDarkPool(self.level_capacity, self.level_size)
+            self.symbols[symbol] = state
+
+        session = timestamp.date()
+        if state.session != session:
+            state.reset()
+            state.session = session
+
+        state.total_volume += size
+        state.last_price = price
+        if not self.is_off_exchange(exchange, conditions, trf_id):
+            return False
+
+        notional = price * size
+        state.dark_volume += size
+        state.dark_notional += notional
+        state.dark_prints += 1
+        state.interval_dark_volume += size
+        state.levels.add(price, notional)
+        if size >= self.block_size or notional >= self.block_notional:
+            state.block_prints += 1
+            state.block_volume += size
+            state.block_notional += notional
+
+        self.dark_prints += 1
+        self.dirty.add(symbol)
+        return True
+
+    def summarize(self, symbol: str) -> Optional[DarkPoolSummary]:
+        state = self.symbols.get(symbol)
+        if state is None or state.session is None:
+            return None
+        return DarkPoolSummary(
+            symbol=symbol,
+            session=state.session,
+            total_volume=state.total_volume,
+            dark_volume=state.dark_volume,
+            dark_share=state.dark_volume / state.total_volume if state.total_volume else None,
+            dark_notional=state.dark_notional,
+            dark_vwap=state.dark_notional / state.dark_volume if state.dark_volume else None,
+            dark_prints=state.dark_prints,
+            block_prints=state.block_prints,
+            block_volume=state.block_volume,
+            block_notional=state.block_notional,
+            interval_dark_volume=state.interval_dark_volume,
+            top_levels=state.levels.top(self.top_levels)
+        )
+
+    def drain_summaries(self) -> List[DarkPoolSummary]:
+        """Summaries for symbols with new dark prints; starts a new interval"""
+        summaries = []
+        for symbol in self.dirty:
+            summary = self.summarize(symbol)
+            if summary is not None:
+                summaries.append(summary)
+            self.symbols[symbol].interval_dark_volume = 0
+        self.dirty.clear()
+        return summaries
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'darkpool_prints_seen': self.prints_seen,
+            'darkpool_dark_prints': self.dark_prints,
+            'darkpool_excluded_prints': self.excluded_prints,
+            'darkpool_symbols': len(self.symbols),
+        }
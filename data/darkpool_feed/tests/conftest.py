@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Feed packages import their siblings absolutely from data/
+DATA_DIR = Path(__file__).resolve().parents[2]
+if str(DATA_DIR) not in sys.path:
+    sys.path.insert(0, str(DATA_DIR))
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from darkpool_feed.darkpool_feed import TRF_EXCHANGE_ID, DarkPoolAggregator, PriceLevels
+
+NOW = datetime(2024, 6, 24, 10, 30)
+LIT_EXCHANGE = 11
+AVERAGE_PRICE = 2  # excluded: not a point-in-time price
+
+
+def test_trf_prints_are_dark_unless_a_condition_is_excluded():
+    aggregator = DarkPoolAggregator(exclude_conditions=[AVERAGE_PRICE])
+
+    assert aggregator.on_trade("AAPL", 190.0, 100, NOW, TRF_EXCHANGE_ID)
+    assert aggregator.on_trade("AAPL", 190.1, 50, NOW, LIT_EXCHANGE, trf_id=201)
+    assert not aggregator.on_trade("AAPL", 190.2, 300, NOW, TRF_EXCHANGE_ID, conditions=[AVERAGE_PRICE, 12])
+    assert not aggregator.on_trade("AAPL", 190.0, 550, NOW, LIT_EXCHANGE)
+
+    summary = aggregator.summarize("AAPL")
+    assert summary.total_volume == 1000
+    assert summary.dark_volume == 150
+    assert summary.dark_share == 0.15
+    assert summary.dark_vwap == (190.0 * 100 + 190.1 * 50) / 150
+    assert aggregator.excluded_prints == 1
+    assert aggregator.dark_prints == 2
+
+
+def test_blocks_and_session_reset():
+    aggregator = DarkPoolAggregator(block_size=10000, block_notional=1e12)
+    aggregator.on_trade("MSFT", 400.0, 12000, NOW, TRF_EXCHANGE_ID)
+    aggregator.on_trade("MSFT", 400.0, 100, NOW, TRF_EXCHANGE_ID)
+    summary = aggregator.summarize("MSFT")
+    assert (summary.block_prints, summary.block_volume) == (1, 12000)
+
+    aggregator.on_trade("MSFT", 401.0, 200, NOW.replace(day=25), TRF_EXCHANGE_ID)
+    summary = aggregator.summarize("MSFT")
+    assert summary.session == NOW.replace(day=25).date()
+    assert (summary.dark_volume, summary.block_prints) == (200, 0)
+
+
+def test_drain_only_reports_symbols_with_new_dark_prints():
+    aggregator = DarkPoolAggregator()
+    aggregator.on_trade("AAPL", 190.0, 100, NOW, TRF_EXCHANGE_ID)
+    aggregator.on_trade("MSFT", 400.0, 100, NOW, LIT_EXCHANGE)
+
+    (summary,) = aggregator.drain_summaries()
+    assert summary.symbol == "AAPL" and summary.interval_dark_volume == 100
+    assert aggregator.drain_summaries() == []
+    assert aggregator.summarize("AAPL").interval_dark_volume == 0
+
+
+def test_price_levels_keep_the_heavy_levels_in_fixed_space():
+    levels = PriceLevels(capacity=3, level_size=0.05)
+    for _ in range(5):
+        levels.add(100.00, 1000.0)
+        levels.add(101.02, 800.0)  # rounds to the 101.00 level
+    levels.add(99.00, 10.0)
+    for price in (98.0, 97.0, 96.0):
+        levels.add(price, 1.0)  # churn replaces only the smallest level
+
+    assert len(levels.levels) == 3
+    assert levels.top(2) == [(100.0, 5000.0), (101.0, 4000.0)]
+    # A replacement inherits the evicted notional as its error bound
+    notional, error = levels.levels[96.0]
+    assert notional - error == 1.0
+
+
+def test_top_levels_text():
+    aggregator = DarkPoolAggregator(top_levels=2)
+    aggregator.on_trade("AAPL", 190.0, 100, NOW, TRF_EXCHANGE_ID)
+    aggregator.on_trade("AAPL", 190.5, 300, NOW, TRF_EXCHANGE_ID)
+    aggregator.on_trade("AAPL", 189.0, 10, NOW, TRF_EXCHANGE_ID)
+
+    assert aggregator.summarize("AAPL").top_levels_text == "190.5:57150,190:19000"
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Feed Common Module
+
+Shared building blocks for the REST-polling feed packages.
+
+Components:
+- AsyncFeed: Base polling feed (rate limits, cursors, dedup, batched QuestDB writer)
+- SharedHTTPClient: Process-wide pooled HTTP client with conditional requests
+- CursorStore / RecentIds: Incremental state persisted across restarts
+
+Usage:
+    from feed_common import AsyncFeed, load_feed_config
+
+    class MyFeed(AsyncFeed):
+        name = "my_feed"
+
+        async def poll_once(self) -> int:
+            ...
+"""
+
+from .async_feed import AsyncFeed, CursorStore, RecentIds, load_feed_config
+from .http_client import SharedHTTPClient
+
+__all__ = ['AsyncFeed', 'CursorStore', 'RecentIds', 'SharedHTTPClient', 'load_feed_config']
+__version__ = '1.0.0'
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Async Feed Base Class
+Common polling loop for the REST-driven feed packages (news, insider, earnings, ...)
+Pooled HTTP, per-source rate limits, conditional fetches, incremental cursors,
+dedup by item ID and the batched QuestDB writer from live_feed
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import yaml
+
+from live_feed.questdb_writer import QuestDBWriter
+from live_feed.rate_limiter import AsyncRateLimiter
+from live_feed.spool import WriteAheadSpool
+
+from .http_client import SharedHTTPClient
+
+logger = logging.getLogger(__name__)
+
+
+def load_feed_config(feed_dir: Path) -> dict:
+    """Load a feed's settings.yaml, resolving ${VAR} and ${VAR:default} values"""
+    config_path = Path(feed_dir) / "settings.yaml"
+    try:
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+
+        def replace_env_vars(obj):
+            if isinstance(obj, dict):
+                return {k: replace_env_vars(v) for k, v in obj.items()}
+            elif isinstance(obj, list):
+                return [replace_env_vars(item) for item in obj]
+            elif isinstance(obj, str) and obj.startswith("${") and obj.endswith("}"):
+                env_var = obj[2:-1]
+                if ":" in env_var:
+                    var_name, default = env_var.split(":", 1)
+                    return os.getenv(var_name, default)
+                return os.getenv(env_var, obj)
+            return obj
+
+        return replace_env_vars(config)
+    except Exception as e:
+        logger.error(f"Failed to load config from {config_path}: {e}")
+        return {}
+
+
+class CursorStore:
+    """Small JSON state file holding incremental cursors across restarts"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.state: Dict[str, Any] = {}
+        try:
+            with open(self.path, 'r') as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ignoring unreadable cursor state {self.path}: {e}")
+
+    def get(self, key: str, default=None):
+        return self.state.get(key, default)
+
+    def set(self, key: str, value: Any):
+        self.state[key] = value
+
+    def save(self):
+        """Write atomically (temp file + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+class RecentIds:
+    """Bounded LRU set of item IDs already processed"""
+
+    def __init__(self, max_size: int = 10000, initial: Iterable[str] = ()):
+        self.max_size = max(int(max_size), 1)
+        self.ids: "OrderedDict[str, None]" = OrderedDict((item_id, None) for item_id in initial)
+
+    def add(self, item_id: str) -> bool:
+        """Record an ID; returns False if it was already seen"""
+        if item_id in self.ids:
+            self.ids.move_to_end(item_id)
+            return False
+        self.ids[item_id] = None
+        if len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+        return True
+
+    def tail(self, count: int):
+        """Most recently added IDs (for persisting with the cursor)"""
+        return list(self.ids)[-count:] if count else []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class AsyncFeed:
+    """
+    Base class for REST polling feeds
+
+    Features:
+    - One shared pooled HTTP session across all feeds in the process
+    - Per-source token-bucket rate limit
+    - ETag / If-Modified-Since conditional requests
+    - Incremental cursor and recent item IDs persisted to a state file once the rows
+      they cover are flushed (written or spooled), so a crash cannot skip unwritten items
+    - Rows queued on the batched QuestDB writer with write-ahead spool fallback
+
+    Subclasses set `name` and implement poll_once(), returning the number of new items.
+    """
+
+    name = "feed"
+
+    def __init__(self, config: dict, feed_dir: Path):
+        self.config = config
+        self.feed_dir = Path(feed_dir)
+
+        feed_config = self.config.get('feed', {})
+        self.poll_interval = float(feed_config.get('poll_interval', 60))
+        self.poll_jitter = float(feed_config.get('poll_jitter', 0.1))  # fraction of the interval
+
+        # QuestDB
+        questdb_config = self.config.get('questdb', {})
+        self.questdb_host = questdb_config.get('host', 'localhost')
+        self.questdb_port = int(questdb_config.get('port', 9000))
+        self.questdb_user = questdb_config.get('username', 'admin')
+        self.questdb_password = questdb_config.get('password', 'quest')
+        self.questdb_database = questdb_config.get('database', 'qdb')
+        self.questdb_connect_timeout = int(questdb_config.get('connection_timeout', 30))
+
+        writer_config = self.config.get('writer', {})
+        spool_config = self.config.get('spool', {})
+        spool_dir = Path(spool_config.get('directory', 'spool'))
+        if not spool_dir.is_absolute():
+            spool_dir = self.feed_dir / spool_dir
+        self.spool = WriteAheadSpool(
+            directory=spool_dir,
+            segment_size=int(spool_config.get('segment_size_mb', 16)) * 1024 * 1024,
+            max_bytes=int(spool_config.get('max_size_mb', 256)) * 1024 * 1024
+        )
+        self.writer = QuestDBWriter(
+            connect=self._connect_questdb,
+            spool=self.spool,
+            batch_size=writer_config.get('batch_size', 100),
+            flush_interval=writer_config.get('flush_interval', 1.0),
+            max_pending=spool_config.get('max_pending_rows', 10000),
+            replay_batch_size=spool_config.get('replay_batch_size', 1000),
+            retry_interval=spool_config.get('retry_interval', 5.0),
+            on_recover=self.initialize_database_schema
+        )
+
+        # HTTP and rate limit
+        http_config = self.config.get('http', {})
+        self.http = SharedHTTPClient.shared(
+            pool_size=http_config.get('pool_size', 20),
+            per_host=http_config.get('per_host', 8),
+            timeout=http_config.get('timeout', 30)
+        )
+        self.conditional_requests = http_config.get('conditional_requests', True)
+        rate_config = self.config.get('rate_limit', {})
+        self.rate_limiter = AsyncRateLimiter(
+            requests_per_minute=rate_config.get('requests_per_minute', 5),
+            burst=rate_config.get('burst', 1)
+        )
+
+        # Incremental state
+        state_config = self.config.get('state', {})
+        state_file = Path(state_config.get('file', 'state.json'))
+        if not state_file.is_absolute():
+            state_file = self.feed_dir / state_file
+        self.cursors = CursorStore(state_file)
+        self.persisted_ids = int(state_config.get('persisted_ids', 500))
+        self.recent_ids = RecentIds(
+            max_size=state_config.get('dedup_size', 10000),
+            initial=self.cursors.get('recent_ids', [])
+        )
+
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+
+        self.polls = 0
+        self.poll_failures = 0
+        self.items_written = 0
+        self.duplicates_skipped = 0
+        self.last_poll_seconds = 0.0
+
+    # Storage
+    def _connect_questdb(self):
+        """Open a QuestDB PG-wire connection (blocking, used from worker threads)"""
+        import psycopg2
+
+        return psycopg2.connect(
+            host=self.questdb_host,
+            port=self.questdb_port,
+            user=self.questdb_user,
+            password=self.questdb_password,
+            database=self.questdb_database,
+            connect_timeout=self.questdb_connect_timeout
+        )
+
+    def _apply_schema(self):
+        schema_path = self.feed_dir / "schema.sql"
+        if not schema_path.exists():
+            return
+        statements = [s.strip() for s in schema_path.read_text().split(';') if s.strip()]
+        statements = [s for s in statements if not all(line.strip().startswith('--') for line in s.splitlines() if line.strip())]
+        if not statements:
+            return
+
+        conn = self._connect_questdb()
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+        finally:
+            conn.close()
+
+    async def initialize_database_schema(self):
+        """Create this feed's tables (CREATE TABLE IF NOT EXISTS)"""
+        await asyncio.to_thread(self._apply_schema)
+        logger.info(f"{self.name}: database schema initialized")
+
+    def write(self, query: str, params):
+        """Queue one row on the batched writer"""
+        self.writer.write(query, params)
+        self.items_written += 1
+
+    # HTTP helpers
+    async def fetch_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                         headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        """Rate-limited, conditional GET through the shared pool"""
+        return await self.http.get_json(
+            url, params=params, headers=headers,
+            rate_limiter=self.rate_limiter, conditional=self.conditional_requests
+        )
+
+    # Dedup and cursors
+    def is_new(self, item_id: str) -> bool:
+        """True the first time an item ID is seen"""
+        if self.recent_ids.add(item_id):
+            return True
+        self.duplicates_skipped += 1
+        return False
+
+    def save_state(self):
+        self.cursors.set('recent_ids', self.recent_ids.tail(self.persisted_ids))
+        try:
+            self.cursors.save()
+        except Exception as e:
+            logger.error(f"{self.name}: failed to save cursor state: {e}")
+
+    # Lifecycle
+    async def poll_once(self) -> int:
+        raise NotImplementedError
+
+    async def start(self):
+        """Start the writer and the polling loop"""
+        logger.info(f"Starting {self.name}")
+        self.running = True
+        self.http.acquire()
+        await self.writer.start()
+        try:
+            await self.initialize_database_schema()
+        except Exception as e:
+            logger.error(f"{self.name}: schema initialization failed, spooling until QuestDB is reachable: {e}")
+            self.writer.mark_unhealthy(e)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self.running:
+            started = time.monotonic()
+            try:
+                new_items = await self.poll_once()
+                self.polls += 1
+                if new_items:
+                    logger.info(f"{self.name}: {new_items} new items")
+                await self.writer.flush()
+                self.save_state()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.poll_failures += 1
+                logger.error(f"{self.name}: poll failed: {e}")
+            self.last_poll_seconds = time.monotonic() - started
+
+            jitter = random.uniform(-self.poll_jitter, self.poll_jitter) * self.poll_interval
+            await asyncio.sleep(max(self.poll_interval + jitter, 0))
+
+    async def stop(self):
+        """Stop polling, flush the writer and release the shared HTTP session"""
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.writer.stop()
+        self.save_state()
+        await self.http.release()
+        logger.info(f"{self.name} stopped")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {
+            'polls': self.polls,
+            'poll_failures': self.poll_failures,
+            'items_written': self.items_written,
+            'duplicates_skipped': self.duplicates_skipped,
+            'last_poll_seconds': self.last_poll_seconds,
+        }
+        metrics.update(self.writer.get_metrics())
+        metrics.update(self.http.get_metrics())
+        return metrics
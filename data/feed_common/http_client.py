@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Shared Pooled HTTP Client
+One aiohttp session (connection pool) for every REST-polling feed in the process
+Conditional GETs with ETag / If-Modified-Since so unchanged resources cost a 304
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    """Validators and body of the last 200 response for a URL"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+
+
+class SharedHTTPClient:
+    """
+    Process-wide pooled HTTP client
+
+    Features:
+    - Single aiohttp ClientSession shared by all feeds (keep-alive, bounded pool)
+    - Per-call rate limiter (each source keeps its own AsyncRateLimiter)
+    - ETag / Last-Modified validators cached per URL, 304 served from cache
+    - Bounded validator cache (LRU)
+    """
+
+    _instance: Optional["SharedHTTPClient"] = None
+
+    def __init__(self, pool_size: int = 20, per_host: int = 8, timeout: float = 30.0,
+                 max_cached: int = 1024):
+        self.pool_size = int(pool_size)
+        self.per_host = int(per_host)
+        self.timeout = float(timeout)
+        self.max_cached = int(max_cached)
+
+        self._session = None
+        self._session_lock = asyncio.Lock()
+        self._users = 0
+        self.cache: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    @classmethod
+    def shared(cls, **kwargs) -> "SharedHTTPClient":
+        """Get the process-wide client (settings apply on first use only)"""
+        if cls._instance is None:
+            cls._instance = cls(**kwargs)
+        return cls._instance
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    import aiohttp
+
+                    connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host)
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=aiohttp.ClientTimeout(total=self.timeout)
+                    )
+        return self._session
+
+    def acquire(self):
+        """Register a feed using the client"""
+        self._users += 1
+
+    async def release(self):
+        """Unregister a feed; the session closes with its last user"""
+        self._users = max(self._users - 1, 0)
+        if self._users == 0 and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    def cache_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        if not params:
+            return url
+        return url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None, rate_limiter=None,
+                       conditional: bool = True) -> Tuple[int, Any]:
+        """
+        GET a JSON resource; returns (status, data)
+
+        A 304 returns the cached body with status 304 so callers can skip reprocessing.
+        """
+        key = self.cache_key(url, params)
+        request_headers = dict(headers or {})
+        cached = self.cache.get(key) if conditional else None
+        if cached is not None:
+            if cached.etag:
+                request_headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request_headers['If-Modified-Since'] = cached.last_modified
+
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+
+        session = await self.session()
+        self.requests += 1
+        try:
+            async with session.get(url, params=params, headers=request_headers) as response:
+                if response.status == 304 and cached is not None:
+                    self.not_modified += 1
+                    self.cache.move_to_end(key)
+                    return 304, cached.data
+
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if conditional and (etag or last_modified):
+                    self.cache[key] = CachedResponse(etag, last_modified, data)
+                    self.cache.move_to_end(key)
+                    while len(self.cache) > self.max_cached:
+                        self.cache.popitem(last=False)
+                return response.status, data
+        except Exception:
+            self.errors += 1
+            raise
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'http_requests': self.requests,
+            'http_not_modified': self.not_modified,
+            'http_errors': self.errors,
+            'http_cached_validators': len(self.cache),
+        }
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local Stub REST Server for Feed Development
+Serves synthetic Polygon-style paginated resources with ETag / 304 support
+Point a feed's base_url at it to exercise cursors, pagination and dedup offline
+
+    python -m feed_common.stub_server --port 8089
+    python -m feed_common.stub_server --smoke
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_news(count: int = 250, tickers: List[str] = None) -> List[Dict[str, Any]]:
+    """Articles in published_utc order, several sharing the same second"""
+    tickers = tickers or ["AAPL", "MSFT", "NVDA", "TSLA"]
+    start = datetime(2024, 1, 2, 13, 0, tzinfo=timezone.utc)
+    articles = []
+    for i in range(count):
+        published = start + timedelta(seconds=(i // 3) * 30)
+        ticker = tickers[i % len(tickers)]
+        articles.append({
+            'id': f"stub-{i:06d}",
+            'published_utc': published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'title': f"Stub headline {i} for {ticker}",
+            'author': "Stub Author",
+            'article_url': f"https://example.com/news/{i}",
+            'description': "Synthetic article",
+            'keywords': ["stub"],
+            'publisher': {'name': "Stub Wire"},
+            'tickers': [ticker],
+            'insights': [{'ticker': ticker, 'sentiment': ("positive", "neutral", "negative")[i % 3],
+                          'sentiment_reasoning': "synthetic"}],
+        })
+    return articles
+
+
+class StubServer:
+    """
+    Minimal Polygon-like REST server
+
+    Features:
+    - /v2/reference/news with ticker, published_utc.gt/.gte, order, limit
+    - next_url cursor pagination
+    - ETag on every page, 304 on If-None-Match
+    """
+
+    def __init__(self, articles: List[Dict[str, Any]], host: str = "127.0.0.1", port: int = 8089):
+        self.articles = articles
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.not_modified = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _news(self, request):
+        from aiohttp import web
+
+        self.requests += 1
+        query = request.query
+        offset = int(query.get('cursor', 0))
+        limit = int(query.get('limit', 10))
+
+        items = self.articles
+        if 'ticker' in query:
+            items = [a for a in items if query['ticker'] in a['tickers']]
+        if 'published_utc.gte' in query:
+            items = [a for a in items if a['published_utc'] >= query['published_utc.gte']]
+        if 'published_utc.gt' in query:
+            items = [a for a in items if a['published_utc'] > query['published_utc.gt']]
+        if query.get('order') == 'desc':
+            items = list(reversed(items))
+
+        page = items[offset:offset + limit]
+        body = {'status': 'OK', 'count': len(page), 'results': page}
+        if offset + limit < len(items):
+            params = {k: v for k, v in query.items() if k not in ('cursor', 'apiKey')}
+            params['cursor'] = offset + limit
+            body['next_url'] = f"{self.base_url}{request.path}?" + "&".join(f"{k}={v}" for k, v in params.items())
+
+        payload = json.dumps(body).encode()
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=payload, content_type='application/json', headers={'ETag': etag})
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/v2/reference/news', self._news)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Stub server listening on {self.base_url}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def smoke_news_feed(port: int):
+    """Poll NewsFeed against the stub: everything new, then nothing new, then a 304 for the unchanged page"""
+    from news_feed.news_feed import NewsFeed
+
+    articles = synthetic_news()
+    server = StubServer(articles, port=port)
+    await server.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {
+                'polygon': {'api_key': 'stub', 'base_url': server.base_url},
+                'news': {'limit': 50, 'max_pages': 20, 'initial_published_utc': '2024-01-01T00:00:00Z'},
+                'rate_limit': {'requests_per_minute': 6000, 'burst': 100},
+                'state': {'file': str(Path(tmp) / 'state.json')},
+                'spool': {'directory': str(Path(tmp) / 'spool')},
+            }
+            feed = NewsFeed(config, feed_dir=Path(tmp))
+            feed.http.acquire()
+            try:
+                first = await feed.poll_once()
+                second = await feed.poll_once()
+                third = await feed.poll_once()  # same cursor URL as the second poll
+            finally:
+                await feed.http.release()
+
+            print(f"first poll: {first} new (expected {len(articles)})")
+            print(f"second poll: {second} new (expected 0)")
+            print(f"third poll: {third} new (expected 0, served by a 304)")
+            print(f"rows queued: {feed.writer.pending_rows}, duplicates skipped: {feed.duplicates_skipped}")
+            print(f"stub requests: {server.requests}, 304s: {server.not_modified}")
+            if first != len(articles) or second != 0 or third != 0 or not server.not_modified:
+                raise SystemExit("smoke test failed")
+    finally:
+        await server.stop()
+
+
+async def serve(port: int):
+    server = StubServer(synthetic_news(), port=port)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub REST server for feed development")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--smoke", action="store_true", help="Run the news feed against the stub and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(smoke_news_feed(args.port) if args.smoke else serve(args.port))
@@ -10,15 +10,25 @@ Components:
 - QuestDB integration for time-series data storage
 - WebSocket streams for live market data
 - Technical analysis calculations using TA-Lib
+- QuestDBQueryClient: Bulk columnar reads of QuestDB history for agents
+- ColdStorageExporter/ColdStorageReader: Parquet export of completed days, memory-mapped reads
 
 Usage:
     from live_feed import PolygonDataFeed
 
     feed = PolygonDataFeed()
     await feed.start()
+
+    frame = await feed.get_indicator_frame(["AAPL", "MSFT"], ["rsi_14", "macd"], sample_by="5m")
+
+    trades = ColdStorageReader("live_feed/cold_storage").load(
+        "polygon_stocks", symbols=["AAPL"], filters={"data_type": ["stock_trade", "stock_trade_backfill"]})
 """
 
+from .startup_clock import IMPORT_STARTED  # noqa: F401 -- first, starts the import timer
 from .polygon_data_feed import PolygonDataFeed
+from .questdb_query import QuestDBQueryClient
+from .cold_storage import ColdStorageExporter, ColdStorageReader
 
-__all__ = ['PolygonDataFeed']
+__all__ = ['PolygonDataFeed', 'QuestDBQueryClient', 'ColdStorageExporter', 'ColdStorageReader']
 __version__ = '1.0.0'
\ No newline at end of file
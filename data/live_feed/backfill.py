@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Bulk Historical Backfill into QuestDB
+Fetches minute bars for many symbols concurrently under the Polygon rate limit
+Loads them as chunked CSV through the /imp bulk import endpoint with per-symbol resumable checkpoints
+
+    python -m live_feed.backfill --symbols AAPL,MSFT,NVDA --start 2026-01-01
+    python -m live_feed.backfill --symbols-file symbols.txt --start 2026-01-01 --end 2026-06-30 --crypto
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .gap_filler import rest_ticker, sdk_field
+from .rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Columns written by _store_aggregate_data, so backfilled and live bars share one table
+AGGREGATE_COLUMNS = ['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'asset_type']
+# Naive local time, the same wall-clock values the live writers store
+TIMESTAMP_PATTERN = "yyyy-MM-ddTHH:mm:ss.SSSUUU"
+IMPORT_SCHEMA = [
+    {'name': 'symbol', 'type': 'SYMBOL'},
+    {'name': 'timestamp', 'type': 'TIMESTAMP', 'pattern': TIMESTAMP_PATTERN},
+    {'name': 'open', 'type': 'DOUBLE'},
+    {'name': 'high', 'type': 'DOUBLE'},
+    {'name': 'low', 'type': 'DOUBLE'},
+    {'name': 'close', 'type': 'DOUBLE'},
+    {'name': 'volume', 'type': 'DOUBLE'},
+    {'name': 'asset_type', 'type': 'SYMBOL'},
+]
+
+
+class BackfillCheckpoints:
+    """Last fully imported day per symbol, persisted atomically after every chunk"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: Dict[str, str] = {}
+        try:
+            with open(self.path, 'r') as f:
+                self.done = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading backfill checkpoints {self.path}: {e}")
+
+    def resume_from(self, symbol: str, start: date) -> date:
+        completed = self.done.get(symbol)
+        if completed is None:
+            return start
+        return max(start, date.fromisoformat(completed) + timedelta(days=1))
+
+    def mark(self, symbol: str, through: date):
+        self.done[symbol] = through.isoformat()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(self.done, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+@dataclass
+class BackfillStats:
+    symbols_done: int = 0
+    symbols_failed: int = 0
+    requests: int = 0
+    chunks: int = 0
+    rows_fetched: int = 0
+    rows_imported: int = 0
+    rows_rejected: int = 0
+    fetch_seconds: float = 0.0
+    import_seconds: float = 0.0
+
+    def report(self, elapsed: float) -> str:
+        rate = self.rows_imported / elapsed if elapsed > 0 else 0.0
+        return (f"{self.rows_imported} rows imported ({self.rows_rejected} rejected) from {self.requests} requests "
+                f"in {elapsed:.1f}s = {rate:,.0f} rows/sec; "
+                f"symbols done {self.symbols_done}, failed {self.symbols_failed}; "
+                f"fetch {self.fetch_seconds:.1f}s, import {self.import_seconds:.1f}s (summed across tasks)")
+
+
+def bars_to_csv(symbol: str, asset_type: str, bars: Sequence[Any]) -> str:
+    """Render SDK aggregate bars as CSV rows in AGGREGATE_COLUMNS order"""
+    lines = [",".join(AGGREGATE_COLUMNS)]
+    for bar in bars:
+        timestamp = datetime.fromtimestamp(sdk_field(bar, 'timestamp', 't', default=0) / 1000)
+        lines.append(
+            f"{symbol},{timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')},"
+            f"{sdk_field(bar, 'open', 'o', default='')},{sdk_field(bar, 'high', 'h', default='')},"
+            f"{sdk_field(bar, 'low', 'l', default='')},{sdk_field(bar, 'close', 'c', default='')},"
+            f"{sdk_field(bar, 'volume', 'v', default='')},{asset_type}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class QuestDBBulkImporter:
+    """
+    Parallel CSV uploads to QuestDB's /imp endpoint
+
+    Features:
+    - One multipart request per chunk with an explicit column schema
+    - atomicity=abort: a chunk with a bad row is rolled back whole, so retrying it cannot duplicate rows
+    - Bounded number of concurrent uploads
+    - Imported and rejected row counts taken from the JSON response
+    """
+
+    def __init__(self, host: str, http_port: int, table: str = 'aggregate_data',
+                 concurrency: int = 4, timeout: float = 300.0):
+        self.url = f"http://{host}:{int(http_port)}/imp"
+        self.table = table
+        self.semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+        self.timeout = float(timeout)
+        self._session = None
+
+    async def start(self):
+        import aiohttp
+
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def load(self, payload: str) -> Dict[str, int]:
+        import aiohttp
+
+        params = {'name': self.table, 'timestamp': 'timestamp', 'partitionBy': 'DAY',
+                  'fmt': 'json', 'atomicity': 'abort'}
+        form = aiohttp.FormData()
+        form.add_field('schema', json.dumps(IMPORT_SCHEMA))
+        form.add_field('data', payload, filename='bars.csv', content_type='text/csv')
+
+        async with self.semaphore:
+            async with self._session.post(self.url, params=params, data=form) as response:
+                body = await response.text()
+                if response.status != 200:
+                    raise RuntimeError(f"/imp returned {response.status}: {body[:200]}")
+        result = json.loads(body)
+        if result.get('status', 'OK') != 'OK':
+            raise RuntimeError(f"/imp failed: {result.get('status')}")
+        return {'imported': int(result.get('rowsImported', 0)), 'rejected': int(result.get('rowsRejected', 0))}
+
+
+class BulkBackfill:
+    """
+    Concurrent minute-bar backfill
+
+    Features:
+    - Symbols processed concurrently; every REST call goes through one token bucket
+    - Each symbol walks its date range in windows that fit one aggregates page
+    - The next window is fetched while the previous chunk is still importing
+    - Checkpoint per symbol advances only after a chunk is imported with no rejected rows,
+      so runs resume from the first window that did not load cleanly
+    """
+
+    def __init__(self, rest_client_factory: Callable[[], Any], rate_limiter: AsyncRateLimiter,
+                 importer: QuestDBBulkImporter, checkpoints: BackfillCheckpoints,
+                 asset_type: str = 'stock', window_days: int = 30, concurrency: int = 8,
+                 report_interval: float = 10.0):
+        self.rest_client_factory = rest_client_factory
+        self.rate_limiter = rate_limiter
+        self.importer = importer
+        self.checkpoints = checkpoints
+        self.asset_type = asset_type
+        self.window_days = max(int(window_days), 1)
+        self.concurrency = max(int(concurrency), 1)
+        self.report_interval = float(report_interval)
+        self.stats = BackfillStats()
+
+    async def _fetch(self, symbol: str, start: date, end: date) -> List[Any]:
+        await self.rate_limiter.acquire()
+        client = self.rest_client_factory()
+        ticker = rest_ticker(symbol, 'crypto' if self.asset_type == 'crypto' else 'stock')
+        started = time.monotonic()
+        bars = await asyncio.to_thread(lambda: list(client.list_aggs(
+            ticker, 1, 'minute', start.isoformat(), end.isoformat(), limit=50000, sort='asc'
+        )))
+        self.stats.fetch_seconds += time.monotonic() - started
+        self.stats.requests += 1
+        self.stats.rows_fetched += len(bars)
+        return bars
+
+    async def _import(self, symbol: str, bars: List[Any], through: date):
+        if bars:
+            started = time.monotonic()
+            result = await self.importer.load(bars_to_csv(symbol, self.asset_type, bars))
+            self.stats.import_seconds += time.monotonic() - started
+            self.stats.chunks += 1
+            self.stats.rows_imported += result['imported']
+            self.stats.rows_rejected += result['rejected']
+            if result['rejected']:
+                # Leave the checkpoint before this window so the next run retries it
+                raise RuntimeError(f"{result['rejected']} of {len(bars)} rows rejected for "
+                                   f"{symbol} through {through.isoformat()}")
+        self.checkpoints.mark(symbol, through)
+
+    async def backfill_symbol(self, symbol: str, start: date, end: date):
+        day = self.checkpoints.resume_from(symbol, start)
+        pending: Optional[asyncio.Task] = None
+        try:
+            while day <= end:
+                window_end = min(day + timedelta(days=self.window_days - 1), end)
+                bars = await self._fetch(symbol, day, window_end)
+                if pending is not None:
+                    await pending  # keeps checkpoints in order
+                pending = asyncio.create_task(self._import(symbol, bars, window_end))
+                day = window_end + timedelta(days=1)
+            if pending is not None:
+                await pending
+            self.stats.symbols_done += 1
+        except Exception as e:
+            if pending is not None and not pending.done():
+                pending.cancel()
+            self.stats.symbols_failed += 1
+            logger.error(f"Backfill failed for {symbol} (resumes from its checkpoint): {e}")
+
+    async def _report(self, started: float):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            logger.info(f"Backfill progress: {self.stats.report(time.monotonic() - started)}")
+
+    async def run(self, symbols: Sequence[str], start: date, end: date) -> BackfillStats:
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(symbol: str):
+            async with semaphore:
+                await self.backfill_symbol(symbol, start, end)
+
+        reporter = asyncio.create_task(self._report(started))
+        await self.importer.start()
+        try:
+            await asyncio.gather(*(bounded(symbol) for symbol in symbols))
+        finally:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+            await self.importer.stop()
+
+        logger.info(f"Backfill finished: {self.stats.report(time.monotonic() - started)}")
+        return self.stats
+
+
+def main():
+    """Backfill minute bars for a symbol list into QuestDB"""
+    from .polygon_data_feed import FEED_DIR, configure_logging, load_config, load_environment
+
+    parser = argparse.ArgumentParser(description="Bulk minute-bar backfill into QuestDB via /imp")
+    parser.add_argument("--symbols", default="", help="Comma-separated symbols")
+    parser.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--start", required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument("--end", help="Last day, YYYY-MM-DD (default: yesterday)")
+    parser.add_argument("--crypto", action="store_true", help="Symbols are crypto pairs (e.g. BTC-USD)")
+    parser.add_argument("--reset", action="store_true", help="Ignore existing checkpoints")
+    args = parser.parse_args()
+
+    load_environment()
+    config = load_config()
+    configure_logging(config)
+    polygon_config = config.get('polygon', {})
+    questdb_config = config.get('questdb', {})
+    backfill_config = config.get('backfill', {})
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    if args.symbols_file:
+        with open(args.symbols_file, 'r') as f:
+            symbols += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not symbols:
+        parser.error("no symbols given")
+
+    checkpoint_path = Path(backfill_config.get('checkpoint_file', 'backfill_checkpoints.json'))
+    if not checkpoint_path.is_absolute():
+        checkpoint_path = FEED_DIR / checkpoint_path
+    if args.reset and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    api_key = polygon_config.get('api_key')
+    rest_client = None
+
+    def rest_client_factory():
+        nonlocal rest_client
+        if rest_client is None:
+            from polygon import RESTClient
+
+            rest_client = RESTClient(api_key)
+        return rest_client
+
+    rate_limits = polygon_config.get('rate_limits', {})
+    backfill = BulkBackfill(
+        rest_client_factory=rest_client_factory,
+        rate_limiter=AsyncRateLimiter(
+            requests_per_minute=backfill_config.get('requests_per_minute', rate_limits.get('aggregates', 5)),
+            burst=backfill_config.get('burst', 1)
+        ),
+        importer=QuestDBBulkImporter(
+            host=questdb_config.get('host', 'localhost'),
+            http_port=int(questdb_config.get('http_port', 9000)),
+            table=backfill_config.get('table', 'aggregate_data'),
+            concurrency=backfill_config.get('import_concurrency', 4),
+            timeout=backfill_config.get('import_timeout', 300)
+        ),
+        checkpoints=BackfillCheckpoints(checkpoint_path),
+        asset_type='crypto' if args.crypto else 'stock',
+        window_days=backfill_config.get('window_days', 30),
+        concurrency=backfill_config.get('concurrency', 8),
+        report_interval=backfill_config.get('report_interval', 10)
+    )
+
+    end = date.fromisoformat(args.end) if args.end else datetime.now().date() - timedelta(days=1)
+    stats = asyncio.run(backfill.run(symbols, date.fromisoformat(args.start), end))
+    if stats.symbols_failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
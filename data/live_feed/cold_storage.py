@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Parquet Cold Storage for QuestDB Day Partitions
+Exports each completed day of a table to zstd Parquet partitioned by date and symbol
+Loads them back as memory-mapped Arrow tables for research and backtests
+
+    python -m live_feed.cold_storage                      # export every completed day not yet exported
+    python -m live_feed.cold_storage --table polygon_stocks --day 2026-10-16
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .questdb_query import QuestDBQueryClient, _format_timestamp, _validate_identifier
+
+# pyarrow and pandas are imported on first use
+if TYPE_CHECKING:
+    import numpy as np
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _arrow_type(questdb_type: str) -> "pa.DataType":
+    """Arrow type for a QuestDB column type"""
+    import pyarrow as pa
+
+    questdb_type = questdb_type.upper()
+    if questdb_type == 'DOUBLE':
+        return pa.float64()
+    if questdb_type == 'FLOAT':
+        return pa.float32()
+    if questdb_type in ('LONG', 'INT', 'SHORT', 'BYTE'):
+        return pa.int64()
+    if questdb_type == 'BOOLEAN':
+        return pa.bool_()
+    if questdb_type in ('TIMESTAMP', 'DATE'):
+        # Feed-local wall-clock time, like the rows themselves; tagging it UTC would shift it on read
+        return pa.timestamp('us')
+    return pa.string()
+
+
+class ColdStorageExporter:
+    """
+    QuestDB day partitions to Parquet
+
+    Features:
+    - One streamed HTTP export per table and day (no PG-wire row fetches)
+    - Column types taken from the table definition so every chunk shares one schema
+    - Timestamps stay tz-naive feed-local time, the convention every writer stores
+    - Hive layout <table>/date=YYYY-MM-DD/symbol=XYZ/*.parquet with zstd compression
+    - Each day is written to a temporary directory and renamed into place
+    - manifest.json records exported days (rows, files, bytes) so runs are incremental
+    - A day is complete only grace_days after it ended (feed-local dates, as the writers
+      store them) and, with a ready() check, only while no spooled rows could still land in it
+    """
+
+    def __init__(self, client: QuestDBQueryClient, directory: Path, tables: Sequence[str],
+                 compression: str = 'zstd', compression_level: Optional[int] = None,
+                 flush_rows: int = 2000000, lookback_days: int = 30, grace_days: int = 1,
+                 ready: Optional[Callable[[], bool]] = None):
+        self.client = client
+        self.directory = Path(directory)
+        self.tables = [_validate_identifier(table) for table in tables]
+        self.compression = compression
+        self.compression_level = compression_level
+        self.flush_rows = int(flush_rows)
+        self.lookback_days = int(lookback_days)
+        self.grace_days = max(int(grace_days), 0)
+        self.ready = ready
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.directory / MANIFEST_FILE
+        self.manifest = self._load_manifest()
+
+        self.days_exported = 0
+        self.rows_exported = 0
+
+    # Manifest
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'tables': {}}
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading cold storage manifest, starting a new one: {e}")
+            return {'tables': {}}
+
+    def _save_manifest(self):
+        temporary = self.manifest_path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.manifest_path)
+
+    def exported_days(self, table: str) -> Dict[str, Dict[str, Any]]:
+        return self.manifest['tables'].get(table, {}).get('days', {})
+
+    # Discovery
+    def _columns(self, table: str) -> Dict[str, str]:
+        """Column name -> QuestDB type"""
+        frame = self.client.fetch_frame(f"SHOW COLUMNS FROM {table}")
+        return dict(zip(frame['column'], frame['type']))
+
+    def _first_day(self, table: str) -> Optional[date]:
+        frame = self.client.fetch_frame(f"SELECT min(timestamp) first_timestamp FROM {table}")
+        if not len(frame) or frame['first_timestamp'].isna().all():
+            return None
+        import pandas as pd
+
+        return pd.to_datetime(frame['first_timestamp'].iloc[0], utc=True).date()
+
+    def completed_days(self, table: str) -> List[date]:
+        """Days ended at least grace_days ago (feed-local time) inside the lookback window, not exported yet"""
+        # Rows carry naive local timestamps, so days are cut on the local calendar too
+        today = datetime.now().date()
+        last = today - timedelta(days=self.grace_days)
+        first = self._first_day(table)
+        if first is None:
+            return []
+        start = max(first, today - timedelta(days=self.lookback_days))
+        exported = self.exported_days(table)
+        days = []
+        day = start
+        while day < last:
+            if day.isoformat() not in exported:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    # Export
+    def export_day(self, table: str, day: date) -> int:
+        """Export one day of a table; returns rows written"""
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        table = _validate_identifier(table)
+        columns = self._columns(table)
+        time_columns = [name for name, kind in columns.items() if kind.upper() in ('TIMESTAMP', 'DATE')]
+        text_columns = [name for name, kind in columns.items() if pa.types.is_string(_arrow_type(kind))]
+        schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns.items()])
+        partition_by = ['symbol'] if 'symbol' in columns else []
+
+        start = datetime(day.year, day.month, day.day)
+        query = (f"SELECT * FROM {table} WHERE timestamp >= {_format_timestamp(start)}"
+                 f" AND timestamp < {_format_timestamp(start + timedelta(days=1))}")
+
+        day_dir = self.directory / table / f"date={day.isoformat()}"
+        staging_dir = day_dir.with_name(day_dir.name + ".tmp")
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+
+        write_options = ds.ParquetFileFormat().make_write_options(
+            compression=self.compression, compression_level=self.compression_level
+        )
+        partitioning = ds.partitioning(pa.schema([('symbol', pa.string())]), flavor='hive') if partition_by else None
+
+        started = time.monotonic()
+        rows = 0
+        batches: List["pa.Table"] = []
+        pending = 0
+        flushes = 0
+
+        def flush():
+            nonlocal pending, flushes
+            if not batches:
+                return
+            ds.write_dataset(
+                pa.concat_tables(batches), staging_dir, format='parquet', partitioning=partitioning,
+                file_options=write_options, basename_template=f"part-{flushes}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore', max_partitions=1 << 20
+            )
+            flushes += 1
+            batches.clear()
+            pending = 0
+
+        for chunk in self.client.iter_chunks(query):
+            # CSV export leaves type inference to pandas; pin it to the table definition
+            # QuestDB prints naive timestamps with a Z suffix; keep the wall-clock value, drop the zone
+            for name in time_columns:
+                if name in chunk.columns and not pd.api.types.is_datetime64_any_dtype(chunk[name]):
+                    chunk[name] = pd.to_datetime(chunk[name], utc=True)
+                if name in chunk.columns and isinstance(chunk[name].dtype, pd.DatetimeTZDtype):
+                    chunk[name] = chunk[name].dt.tz_localize(None)
+            for name in text_columns:
+                if name in chunk.columns and chunk[name].dtype != object:
+                    chunk[name] = chunk[name].astype('string')
+            batches.append(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+            pending += len(chunk)
+            if pending >= self.flush_rows:
+                flush()
+        flush()
+
+        if day_dir.exists():
+            shutil.rmtree(day_dir)
+        if rows:
+            os.replace(staging_dir, day_dir)
+        files = list(day_dir.rglob('*.parquet')) if rows else []
+
+        self.manifest['tables'].setdefault(table, {'days': {}})
+        self.manifest['tables'][table]['partition_by'] = partition_by
+        self.manifest['tables'][table]['days'][day.isoformat()] = {
+            'rows': rows,
+            'files': len(files),
+            'bytes': sum(path.stat().st_size for path in files),
+            'exported_at': datetime.now(timezone.utc).isoformat(),
+        }
+        self._save_manifest()
+
+        self.days_exported += 1
+        self.rows_exported += rows
+        elapsed = time.monotonic() - started
+        logger.info(f"Exported {table} {day.isoformat()}: {rows} rows, {len(files)} files in {elapsed:.1f}s")
+        return rows
+
+    def export_completed(self, tables: Optional[Iterable[str]] = None) -> int:
+        """Export every completed, not yet exported day; returns rows written"""
+        if self.ready is not None and not self.ready():
+            logger.info("Cold storage export deferred: spooled rows are still waiting for QuestDB")
+            return 0
+        rows = 0
+        for table in tables or self.tables:
+            try:
+                for day in self.completed_days(table):
+                    rows += self.export_day(table, day)
+            except Exception as e:
+                logger.error(f"Error exporting {table} to cold storage: {e}")
+        return rows
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'cold_storage_days_exported': self.days_exported,
+            'cold_storage_rows_exported': self.rows_exported,
+        }
+
+
+class ColdStorageReader:
+    """
+    Memory-mapped access to exported partitions
+
+    Features:
+    - Partition pruning on date and symbol before any file is opened
+    - Value filters (e.g. data_type to keep trade rows only) pushed into the Parquet scan
+    - Files are memory-mapped, so Arrow buffers are backed by the page cache
+    - to_arrays() hands out zero-copy NumPy views where the column layout allows it
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _partition_by(self, table: str) -> List[str]:
+        try:
+            with open(self.directory / MANIFEST_FILE, 'r') as f:
+                manifest = json.load(f)
+            return manifest['tables'][table].get('partition_by', [])
+        except (OSError, ValueError, KeyError):
+            return ['symbol']
+
+    def load(self, table: str, start: Optional[date] = None, end: Optional[date] = None,
+             symbols: Optional[Sequence[str]] = None, columns: Optional[Sequence[str]] = None,
+             filters: Optional[Mapping[str, Sequence[str]]] = None) -> "pa.Table":
+        """Rows for [start, end] days, optionally limited to symbols, columns and column values (filters)"""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        table = _validate_identifier(table)
+        fields = [('date', pa.string())] + [(name, pa.string()) for name in self._partition_by(table)]
+        dataset = ds.dataset(
+            str(self.directory / table), format='parquet',
+            partitioning=ds.partitioning(pa.schema(fields), flavor='hive'),
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+
+        condition = None
+        for clause in (
+            ds.field('date') >= start.isoformat() if start else None,
+            ds.field('date') <= end.isoformat() if end else None,
+            ds.field('symbol').isin(list(symbols)) if symbols else None,
+            *(ds.field(name).isin(list(values)) for name, values in (filters or {}).items()),
+        ):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+
+        return dataset.to_table(columns=list(columns) if columns else None, filter=condition)
+
+    @staticmethod
+    def to_arrays(table: "pa.Table") -> Dict[str, "np.ndarray"]:
+        """NumPy column arrays; zero-copy for single-chunk primitive columns without nulls"""
+        arrays = {}
+        for name, column in zip(table.column_names, table.columns):
+            if column.num_chunks == 1 and column.null_count == 0:
+                try:
+                    arrays[name] = column.chunk(0).to_numpy(zero_copy_only=True)
+                    continue
+                except Exception:
+                    pass
+            arrays[name] = column.to_numpy()
+        return arrays
+
+
+def main():
+    """Export completed QuestDB day partitions to cold storage"""
+    from .polygon_data_feed import FEED_DIR, configure_logging, load_config
+
+    parser = argparse.ArgumentParser(description="Export QuestDB day partitions to Parquet cold storage")
+    parser.add_argument("--table", action="append", help="Table to export (repeatable; default: configured tables)")
+    parser.add_argument("--day", help="Export (or re-export) a single day, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    config = load_config()
+    configure_logging(config)
+    questdb_config = config.get('questdb', {})
+    query_config = config.get('query_api', {})
+    cold_config = config.get('cold_storage', {})
+
+    directory = Path(cold_config.get('directory', 'cold_storage'))
+    if not directory.is_absolute():
+        directory = FEED_DIR / directory
+
+    client = QuestDBQueryClient(
+        host=questdb_config.get('host', 'localhost'),
+        http_port=int(questdb_config.get('http_port', 9000)),
+        chunk_rows=query_config.get('chunk_rows', 100000),
+        timeout=cold_config.get('timeout', 300)
+    )
+    exporter = ColdStorageExporter(
+        client, directory,
+        tables=cold_config.get('tables', ['polygon_stocks', 'aggregate_data', 'technical_indicators', 'risk_metrics']),
+        compression=cold_config.get('compression', 'zstd'),
+        compression_level=cold_config.get('compression_level'),
+        flush_rows=cold_config.get('flush_rows', 2000000),
+        lookback_days=cold_config.get('lookback_days', 30),
+        grace_days=cold_config.get('grace_days', 1)
+    )
+
+    tables = args.table or exporter.tables
+    if args.day:
+        day = date.fromisoformat(args.day)
+        for table in tables:
+            exporter.export_day(table, day)
+    else:
+        exporter.export_completed(tables)
+    logger.info(f"Cold storage export finished: {exporter.get_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Streaming Cross-Asset Correlation Engine
+Rolling log returns for every subscribed stock and crypto pair in one aligned window x symbol matrix
+Covariance, beta to a benchmark and realized volatility updated per bar with rank-one updates
+"""
+
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MINUTE_MS = 60_000
+UPDATE_ROWS = 256  # rows of R'R updated per block (bounds the outer-product temporary to UPDATE_ROWS x N)
+STOCK_PERIODS_PER_YEAR = 252 * 390  # regular-session minutes
+CRYPTO_PERIODS_PER_YEAR = 365 * 1440
+
+
+class RollingCorrelationEngine:
+    """
+    Rolling covariance/correlation over the whole cross-section
+
+    Features:
+    - Bars are bucketed by start time; a row of log close-to-close returns is appended when a
+      newer bucket arrives (or flush() finds the bucket complete), one column per symbol
+    - A return is only observed when the symbol's previous close is from the immediately
+      preceding bucket; after a missed bucket (overnight, halts, illiquid minutes) the close
+      re-anchors and the cell is a zero, unobserved return
+    - Unobserved cells are not observations: variances use each symbol's own observed count
+      and covariances the rows where both symbols were observed (pairwise-complete)
+    - Running R'R, R'O (sums of each symbol over the rows the other was observed) and O'O
+      (pairwise observed counts) are kept; each new row adds one outer product and the evicted
+      row subtracts one, so a bar costs O(N^2), not O(W*N^2), applied in row blocks so no
+      N x N temporary is allocated
+    - Beta to the benchmark and realized volatility come from the diagonals and the benchmark
+      column in O(N); the full correlation matrix is only formed on request
+    - Sums are rebuilt from the ring every recompute_interval rows to bound floating-point drift
+    """
+
+    def __init__(self, window: int = 390, benchmark: str = "SPY", min_periods: int = 30,
+                 recompute_interval: int = 390, bar_ms: int = MINUTE_MS, max_symbols: int = 5000,
+                 periods_per_year: float = STOCK_PERIODS_PER_YEAR, initial_capacity: int = 64):
+        self.window = int(window)
+        self.benchmark = benchmark
+        self.min_periods = max(int(min_periods), 2)
+        self.recompute_interval = int(recompute_interval)
+        self.bar_ms = int(bar_ms)
+        self.max_symbols = int(max_symbols)
+        self.periods_per_year = float(periods_per_year)
+
+        self.symbols: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self._allocate(max(min(int(initial_capacity), self.max_symbols), 1))
+
+        self.bucket: Optional[int] = None  # bar bucket currently being filled
+        self.row_end_ms: Optional[int] = None  # end time of the newest closed row
+        self.rows = 0  # filled rows in the ring (<= window)
+        self.head = 0  # next ring row to overwrite
+        self.rows_since_recompute = 0
+
+        self.rows_appended = 0
+        self.full_recomputes = 0
+        self.late_bars = 0
+        self.symbols_rejected = 0
+
+    def _allocate(self, capacity: int):
+        """Allocate (or grow) every per-symbol array, keeping existing columns"""
+        old = len(self.positions)
+        previous = getattr(self, 'returns', None)
+
+        returns = np.zeros((self.window, capacity))
+        observed = np.zeros((self.window, capacity), dtype=bool)
+        cross = np.zeros((capacity, capacity))
+        pair_sums = np.zeros((capacity, capacity))
+        pair_counts = np.zeros((capacity, capacity), dtype=np.int32)
+        sums = np.zeros(capacity)
+        counts = np.zeros(capacity, dtype=np.int64)
+        last_close = np.full(capacity, np.nan)
+        last_bucket = np.full(capacity, -1, dtype=np.int64)
+        pending = np.full(capacity, np.nan)
+        scale = np.full(capacity, self.periods_per_year)
+        updated = np.zeros(capacity, dtype=bool)
+
+        if previous is not None:
+            returns[:, :old] = self.returns[:, :old]
+            observed[:, :old] = self.observed[:, :old]
+            cross[:old, :old] = self.cross[:old, :old]
+            pair_sums[:old, :old] = self.pair_sums[:old, :old]
+            pair_counts[:old, :old] = self.pair_counts[:old, :old]
+            sums[:old] = self.sums[:old]
+            counts[:old] = self.counts[:old]
+            last_close[:old] = self.last_close[:old]
+            last_bucket[:old] = self.last_bucket[:old]
+            pending[:old] = self.pending[:old]
+            scale[:old] = self.scale[:old]
+            updated[:old] = self.updated[:old]
+
+        self.returns, self.observed, self.cross = returns, observed, cross
+        # pair_sums[i, j]: sum of i's returns over rows where j was observed; pair_counts[i, j]: rows both were
+        self.pair_sums, self.pair_counts = pair_sums, pair_counts
+        self.sums, self.counts = sums, counts
+        self.last_close, self.last_bucket = last_close, last_bucket  # bucket the last close came from
+        self.pending, self.scale = pending, scale
+        self.updated = updated  # had a bar since the last drain_metrics()
+
+    def _column(self, symbol: str, periods_per_year: Optional[float]) -> int:
+        column = self.positions.get(symbol)
+        if column is not None:
+            return column
+        size = len(self.symbols)
+        if size >= self.max_symbols:
+            self.symbols_rejected += 1
+            if self.symbols_rejected == 1:
+                logger.warning(f"Correlation engine full ({self.max_symbols} symbols), ignoring new symbols")
+            return -1
+        if size == len(self.sums):
+            self._allocate(min(size * 2, self.max_symbols))
+        self.symbols.append(symbol)
+        self.positions[symbol] = size
+        if periods_per_year:
+            self.scale[size] = float(periods_per_year)
+        return size
+
+    def on_bar(self, symbol: str, timestamp_ms: int, close: float, periods_per_year: Optional[float] = None):
+        """Record a bar close; the first bar of a newer bucket closes the current row"""
+        if not close or close <= 0:
+            return
+        bucket = int(timestamp_ms) // self.bar_ms
+        if self.row_end_ms is not None and bucket * self.bar_ms < self.row_end_ms:
+            self.late_bars += 1  # its row is already closed
+            return
+        if self.bucket is None:
+            self.bucket = bucket
+        elif bucket > self.bucket:
+            self._close_bucket()
+            self.bucket = bucket
+        elif bucket < self.bucket:
+            self.late_bars += 1
+            return
+
+        column = self._column(symbol, periods_per_year)
+        if column >= 0:
+            self.pending[column] = close
+
+    def flush(self, now_ms: int) -> bool:
+        """Close the current bucket once a full bar has passed since it ended (quiet streams)"""
+        if self.bucket is None or now_ms < (self.bucket + 2) * self.bar_ms:
+            return False
+        self._close_bucket()
+        self.bucket = None
+        return True
+
+    def _close_bucket(self):
+        """Turn pending closes into one return row and fold it into the running sums"""
+        size = len(self.symbols)
+        if size == 0:
+            return
+        pending = self.pending[:size]
+        last = self.last_close[:size]
+        last_bucket = self.last_bucket[:size]
+
+        has_bar = ~np.isnan(pending)
+        observed = has_bar & ~np.isnan(last) & (last_bucket == self.bucket - 1)
+        row = np.zeros(len(self.sums))
+        row[:size][observed] = np.log(pending[observed] / last[observed])
+        last[has_bar] = pending[has_bar]
+        last_bucket[has_bar] = self.bucket
+        pending[:] = np.nan
+        self.updated[:size] |= has_bar
+        self.row_end_ms = (self.bucket + 1) * self.bar_ms
+
+        self._append(row, np.pad(observed, (0, len(self.sums) - size)))
+
+    def _append(self, row: np.ndarray, observed: np.ndarray):
+        """Rank-one add of the new row and rank-one removal of the row it replaces"""
+        size = len(self.symbols)
+        head = self.head
+
+        evicted = evicted_observed = None
+        if self.rows == self.window:
+            evicted = self.returns[head, :size]
+            evicted_observed = self.observed[head, :size]
+            self.sums[:size] -= evicted
+            self.counts[:size] -= evicted_observed
+        else:
+            self.rows += 1
+
+        x, seen = row[:size], observed[:size]
+        self.sums[:size] += x
+        self.counts[:size] += seen
+        for start in range(0, size, UPDATE_ROWS):
+            stop = min(start + UPDATE_ROWS, size)
+            self.cross[start:stop, :size] += np.multiply.outer(x[start:stop], x)
+            self.pair_sums[start:stop, :size] += np.multiply.outer(x[start:stop], seen)
+            self.pair_counts[start:stop, :size] += np.multiply.outer(seen[start:stop], seen)
+            if evicted is not None:
+                self.cross[start:stop, :size] -= np.multiply.outer(evicted[start:stop], evicted)
+                self.pair_sums[start:stop, :size] -= np.multiply.outer(evicted[start:stop], evicted_observed)
+                self.pair_counts[start:stop, :size] -= np.multiply.outer(evicted_observed[start:stop],
+                                                                         evicted_observed)
+
+        self.returns[head] = row
+        self.observed[head] = observed
+        self.head = (head + 1) % self.window
+        self.rows_appended += 1
+
+        self.rows_since_recompute += 1
+        if self.recompute_interval and self.rows_since_recompute >= self.recompute_interval:
+            self.recompute()
+
+    def recompute(self):
+        """Rebuild sums, counts, R'R, R'O and O'O from the ring (removes accumulated rounding error)"""
+        size = len(self.symbols)
+        returns = self.returns[:self.rows, :size]
+        observed = self.observed[:self.rows, :size].astype(np.float64)
+        self.sums[:size] = returns.sum(axis=0)
+        self.counts[:size] = observed.sum(axis=0)
+        self.cross[:size, :size] = returns.T @ returns
+        self.pair_sums[:size, :size] = returns.T @ observed
+        self.pair_counts[:size, :size] = observed.T @ observed
+        self.rows_since_recompute = 0
+        self.full_recomputes += 1
+
+    def _variances(self) -> np.ndarray:
+        """Sample variance of each symbol over its own observed rows (NaN below two)"""
+        size = len(self.symbols)
+        sums, counts = self.sums[:size], self.counts[:size].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (np.diagonal(self.cross)[:size] - sums * sums / counts) / (counts - 1)
+        variance[counts < 2] = np.nan
+        return np.maximum(variance, 0.0)
+
+    def _covariances(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Sample covariances over the rows where both symbols were observed (NaN below two)"""
+        block = np.ix_(rows, columns)
+        counts = self.pair_counts[block].astype(np.float64)
+        # pair_sums[i, j] sums i over j's observed rows; unobserved returns are zero, so that is
+        # i's sum over the rows both were observed
+        sums_rows, sums_columns = self.pair_sums[block], self.pair_sums[np.ix_(columns, rows)].T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (self.cross[block] - sums_rows * sums_columns / counts) / (counts - 1)
+        covariance[counts < 2] = np.nan
+        return covariance
+
+    def _ready(self) -> np.ndarray:
+        return self.counts[:len(self.symbols)] >= self.min_periods
+
+    def volatility(self) -> np.ndarray:
+        """Annualized realized volatility per symbol (NaN below min_periods)"""
+        size = len(self.symbols)
+        if self.rows < 2:
+            return np.full(size, np.nan)
+        volatility = np.sqrt(self._variances() * self.scale[:size])
+        volatility[~self._ready()] = np.nan
+        return volatility
+
+    def beta(self) -> np.ndarray:
+        """Beta of every symbol to the benchmark: cov(r_i, r_b) / var(r_b)"""
+        size = len(self.symbols)
+        column = self.positions.get(self.benchmark)
+        if self.rows < 2 or column is None or self.counts[column] < self.min_periods:
+            return np.full(size, np.nan)
+        covariance = self._covariances(np.arange(size), np.asarray([column]))[:, 0]
+        variance = self._variances()[column]
+        if not variance > 0:
+            return np.full(size, np.nan)
+        beta = covariance / variance
+        beta[~self._ready() | (self.pair_counts[:size, column] < self.min_periods)] = np.nan
+        return beta
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix of all tracked symbols (pairwise-complete)"""
+        size = len(self.symbols)
+        if self.rows < 2:
+            return np.full((size, size), np.nan)
+        columns = np.arange(size)
+        return self._covariances(columns, columns)
+
+    def correlation(self, symbols: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """Correlation matrix for symbols (default: every symbol with min_periods observations)"""
+        if symbols is None:
+            ready = self._ready()
+            names = [symbol for symbol, ok in zip(self.symbols, ready) if ok]
+        else:
+            names = [symbol for symbol in symbols if symbol in self.positions]
+        columns = np.asarray([self.positions[symbol] for symbol in names], dtype=np.int64)
+        if self.rows < 2 or not len(columns):
+            return names, np.full((len(names), len(names)), np.nan)
+
+        covariance = self._covariances(columns, columns)
+        deviation = np.sqrt(self._variances()[columns])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.outer(deviation, deviation)
+        correlation[~np.isfinite(correlation)] = np.nan
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+        return names, correlation
+
+    def top_correlations(self, symbol: str, count: int = 10) -> List[Tuple[str, float]]:
+        """Most correlated symbols to one symbol, strongest first"""
+        names, correlation = self.correlation()
+        if symbol not in names:
+            return []
+        values = correlation[names.index(symbol)]
+        order = np.argsort(-np.abs(np.nan_to_num(values, nan=0.0)))
+        return [(names[i], float(values[i])) for i in order
+                if names[i] != symbol and not math.isnan(values[i])][:count]
+
+    def get(self, symbol: str) -> Dict[str, Optional[float]]:
+        """Beta and volatility of one symbol"""
+        column = self.positions.get(symbol)
+        if column is None:
+            return {'beta': None, 'volatility': None}
+        beta, volatility = self.beta()[column], self.volatility()[column]
+        return {
+            'beta': None if np.isnan(beta) else float(beta),
+            'volatility': None if np.isnan(volatility) else float(volatility),
+        }
+
+    def drain_metrics(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Last close, beta and volatility for symbols with a bar since the last drain and enough observations"""
+        size = len(self.symbols)
+        beta, volatility = self.beta(), self.volatility()
+        updated = self.updated[:size] & ~np.isnan(volatility)
+        self.updated[:size] = False
+        return {
+            self.symbols[i]: {
+                'close': float(self.last_close[i]),
+                'beta': None if np.isnan(beta[i]) else float(beta[i]),
+                'volatility': float(volatility[i]),
+            }
+            for i in np.flatnonzero(updated)
+        }
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'correlation_symbols': len(self.symbols),
+            'correlation_rows': self.rows,
+            'correlation_rows_appended': self.rows_appended,
+            'correlation_full_recomputes': self.full_recomputes,
+            'correlation_late_bars': self.late_bars,
+            'correlation_symbols_rejected': self.symbols_rejected,
+        }
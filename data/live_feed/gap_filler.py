@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Sequence-Gap Detection and REST Gap-Fill
+Finds per-symbol holes in the WebSocket stream (minute bars and trades)
+Backfills them concurrently through the REST API under the shared rate limit
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+MINUTE_MS = 60_000
+
+# US/Eastern stock session incl. extended hours (minutes since midnight); no bars outside it
+SESSION_OPEN = 4 * 60
+SESSION_CLOSE = 20 * 60
+
+
+@dataclass
+class Gap:
+    """Missing interval for one symbol"""
+    symbol: str
+    asset_type: str  # 'stock', 'crypto'
+    kind: str  # 'bars', 'trades'
+    start_ms: int  # inclusive
+    end_ms: int  # exclusive
+    after_sequence: Optional[int] = None  # trades: last sequence seen before the gap
+    before_sequence: Optional[int] = None  # trades: first sequence seen after the gap
+
+
+def sdk_field(obj: Any, *names: str, default=None):
+    """Read a field from an SDK model or a raw dict"""
+    for name in names:
+        if isinstance(obj, dict):
+            if name in obj:
+                return obj[name]
+        elif hasattr(obj, name):
+            return getattr(obj, name)
+    return default
+
+
+def rest_ticker(symbol: str, asset_type: str) -> str:
+    """Map a stream symbol to its REST ticker (crypto pairs use the X: prefix)"""
+    if asset_type == 'crypto':
+        return "X:" + symbol.replace("-", "").replace("/", "")
+    return symbol
+
+
+class GapTracker:
+    """
+    Per-symbol stream continuity tracking
+
+    Minute bars: a bar start at least min_gap_ms after the previous one is a gap, but only
+    within one stock session (overnight and weekend breaks are not gaps); illiquid symbols
+    legitimately skip minutes, so shorter holes are ignored.
+    Trades: Polygon sequence numbers increase per symbol but are not contiguous, so a
+    trade gap is only declared across a known disconnect, bounded by the last sequence
+    seen before it and the first sequence seen after it.
+    """
+
+    def __init__(self, bar_interval_ms: int = MINUTE_MS, max_gap_ms: int = 390 * MINUTE_MS,
+                 min_gap_ms: int = 5 * MINUTE_MS):
+        self.bar_interval_ms = bar_interval_ms
+        self.max_gap_ms = max_gap_ms
+        self.min_gap_ms = max(int(min_gap_ms), bar_interval_ms)
+        self._eastern = None
+        self.last_bar: Dict[Tuple[str, str], int] = {}
+        self.last_trade: Dict[Tuple[str, str], Tuple[int, Optional[int]]] = {}
+        self.resync_pending: set = set()
+
+        self.gaps_detected = 0
+
+    def _clip(self, start_ms: int, end_ms: int) -> int:
+        if end_ms - start_ms > self.max_gap_ms:
+            logger.warning(f"Gap of {(end_ms - start_ms) / MINUTE_MS:.0f} minutes clipped to {self.max_gap_ms / MINUTE_MS:.0f}")
+            return end_ms - self.max_gap_ms
+        return start_ms
+
+    def _session(self, asset_type: str, timestamp_ms: int):
+        """Trading day a stock bar belongs to (None outside the session); crypto never closes"""
+        if asset_type == 'crypto':
+            return 'crypto'
+        if self._eastern is None:
+            from zoneinfo import ZoneInfo
+
+            self._eastern = ZoneInfo("America/New_York")
+        moment = datetime.fromtimestamp(timestamp_ms / 1000, self._eastern)
+        minutes = moment.hour * 60 + moment.minute
+        if moment.weekday() >= 5 or not SESSION_OPEN <= minutes < SESSION_CLOSE:
+            return None
+        return moment.date()
+
+    def observe_bar(self, symbol: str, asset_type: str, start_ms: int) -> Optional[Gap]:
+        key = (symbol, asset_type)
+        previous = self.last_bar.get(key)
+        if previous is not None and start_ms <= previous:
+            return None  # duplicate or late bar
+        self.last_bar[key] = start_ms
+        if previous is None or start_ms - previous - self.bar_interval_ms < self.min_gap_ms:
+            return None
+        session = self._session(asset_type, previous)
+        if session is None or session != self._session(asset_type, start_ms):
+            return None  # session break, not a missed interval
+
+        self.gaps_detected += 1
+        gap_start = self._clip(previous + self.bar_interval_ms, start_ms)
+        return Gap(symbol, asset_type, 'bars', gap_start, start_ms)
+
+    def observe_trade(self, symbol: str, asset_type: str, timestamp_ms: int,
+                      sequence: Optional[int]) -> Optional[Gap]:
+        key = (symbol, asset_type)
+        previous = self.last_trade.get(key)
+        if previous is not None and sequence is not None and previous[1] is not None and sequence <= previous[1]:
+            return None  # replayed or out-of-order print
+        self.last_trade[key] = (timestamp_ms, sequence)
+
+        if key not in self.resync_pending:
+            return None
+        self.resync_pending.discard(key)
+        if previous is None or timestamp_ms <= previous[0]:
+            return None
+
+        self.gaps_detected += 1
+        gap_start = self._clip(previous[0], timestamp_ms)
+        return Gap(symbol, asset_type, 'trades', gap_start, timestamp_ms + 1,
+                   after_sequence=previous[1], before_sequence=sequence)
+
+    def mark_disconnected(self):
+        """Every symbol seen so far needs a trade resync after the next reconnect"""
+        self.resync_pending.update(self.last_trade.keys())
+
+
+class GapFiller:
+    """
+    Concurrent, rate-limited REST backfill of detected gaps
+
+    Features:
+    - Overlapping gaps for the same symbol are merged before fetching
+    - Fixed pool of workers bounded by max_concurrency
+    - Pages are followed through next_url and every page takes a token from the shared AsyncRateLimiter
+    - Results handed back to the feed to repair buffers and QuestDB
+    """
+
+    def __init__(self, api_key: str, rate_limiter: AsyncRateLimiter,
+                 on_bars: Callable[[Gap, List[Any]], Awaitable[None]],
+                 on_trades: Callable[[Gap, List[Any]], Awaitable[None]],
+                 max_concurrency: int = 4, base_url: str = "https://api.polygon.io",
+                 page_limit: int = 50000, max_retries: int = 3, timeout: float = 60.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.page_limit = int(page_limit)
+        self.max_retries = int(max_retries)
+        self.timeout = float(timeout)
+        self.rate_limiter = rate_limiter
+        self.on_bars = on_bars
+        self.on_trades = on_trades
+        self.max_concurrency = max(int(max_concurrency), 1)
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queued: Dict[Tuple[str, str, str], Gap] = {}
+        self.workers: List[asyncio.Task] = []
+
+        self.gaps_filled = 0
+        self.rows_backfilled = 0
+        self.fill_failures = 0
+        self.pages_fetched = 0
+
+    def submit(self, gap: Gap):
+        """Queue a gap, merging it into an already queued gap for the same symbol"""
+        key = (gap.symbol, gap.asset_type, gap.kind)
+        queued = self.queued.get(key)
+        if queued is not None:
+            queued.start_ms = min(queued.start_ms, gap.start_ms)
+            queued.end_ms = max(queued.end_ms, gap.end_ms)
+            if gap.after_sequence is not None and queued.after_sequence is not None:
+                queued.after_sequence = min(queued.after_sequence, gap.after_sequence)
+            if gap.before_sequence is not None:
+                queued.before_sequence = max(queued.before_sequence or 0, gap.before_sequence)
+            return
+        self.queued[key] = gap
+        self.queue.put_nowait(key)
+        logger.info(f"Gap queued: {gap.symbol} {gap.kind} {gap.start_ms}-{gap.end_ms}")
+
+    def start(self):
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def _worker(self):
+        while True:
+            key = await self.queue.get()
+            gap = self.queued.pop(key, None)
+            try:
+                if gap is not None:
+                    await self._fill(gap)
+            except Exception as e:
+                self.fill_failures += 1
+                logger.error(f"Gap fill failed for {gap.symbol}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _get_page(self, session, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            async with session.get(url, params=params) as response:
+                if response.status == 429 and attempt < self.max_retries:
+                    await asyncio.sleep(float(response.headers.get('Retry-After', 2 ** attempt)))
+                    continue
+                if response.status != 200:
+                    body = await response.text()
+                    raise RuntimeError(f"{url} returned {response.status}: {body[:200]}")
+                self.pages_fetched += 1
+                return await response.json()
+        raise RuntimeError(f"{url} rate limited")
+
+    async def _list(self, path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Every result of a paginated endpoint, one limiter token per page"""
+        import aiohttp
+
+        rows: List[Dict[str, Any]] = []
+        url: Optional[str] = f"{self.base_url}{path}"
+        params = {**params, 'apiKey': self.api_key}
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            while url:
+                page = await self._get_page(session, url, params)
+                rows.extend(page.get('results') or [])
+                # next_url carries the cursor and filters; only the key has to be re-sent
+                url, params = page.get('next_url'), {'apiKey': self.api_key}
+        return rows
+
+    async def _fill(self, gap: Gap):
+        started = time.monotonic()
+        ticker = rest_ticker(gap.symbol, gap.asset_type)
+
+        if gap.kind == 'bars':
+            rows = await self._list(
+                f"/v2/aggs/ticker/{ticker}/range/1/minute/{gap.start_ms}/{gap.end_ms - 1}",
+                {'adjusted': 'true', 'sort': 'asc', 'limit': self.page_limit}
+            )
+            await self.on_bars(gap, rows)
+        else:
+            rows = await self._list(f"/v3/trades/{ticker}", {
+                'timestamp.gte': gap.start_ms * 1_000_000,
+                'timestamp.lt': gap.end_ms * 1_000_000,
+                'order': 'asc',
+                'sort': 'timestamp',
+                'limit': self.page_limit
+            })
+            # Keep only prints strictly between the sequences seen around the disconnect
+            if gap.after_sequence is not None:
+                rows = [r for r in rows if (sdk_field(r, 'sequence_number', 'q') or 0) > gap.after_sequence]
+            if gap.before_sequence is not None:
+                rows = [r for r in rows if (sdk_field(r, 'sequence_number', 'q') or 0) < gap.before_sequence]
+            await self.on_trades(gap, rows)
+
+        self.gaps_filled += 1
+        self.rows_backfilled += len(rows)
+        logger.info(f"Gap filled: {gap.symbol} {gap.kind}, {len(rows)} rows in {time.monotonic() - started:.2f}s")
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'gaps_queued': len(self.queued),
+            'gaps_filled': self.gaps_filled,
+            'gap_rows_backfilled': self.rows_backfilled,
+            'gap_fill_failures': self.fill_failures,
+            'gap_pages_fetched': self.pages_fetched,
+        }
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Declarative Technical Indicator Registry
+Indicators are nodes in a dependency graph of TA-Lib series built from the talib config
+Shared intermediates (EMA, SMA, STDDEV, ...) are computed once per update
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Node key: (kind, *params), e.g. ('ema', 12) or ('macd_signal', 12, 26, 9)
+NodeKey = Tuple[Any, ...]
+
+
+@dataclass
+class NodeSpec:
+    """How to compute one kind of series"""
+    compute: Callable[..., Any]  # fn(inputs, deps, *params) -> series
+    depends: Callable[..., List[NodeKey]]  # fn(*params) -> dependency keys
+    requires_ohlc: bool = False
+
+
+@dataclass
+class OutputSpec:
+    """Published indicator value taken from the last element of a node"""
+    key: NodeKey
+    min_points: int = 0
+    requires_ohlc: bool = False
+    integer: bool = False
+
+
+# Registered series kinds
+NODES: Dict[str, NodeSpec] = {}
+
+
+def register_node(kind: str, depends: Optional[Callable[..., List[NodeKey]]] = None,
+                  requires_ohlc: bool = False):
+    """Register a series kind; compute receives (inputs, deps, *params)"""
+    def decorator(fn):
+        NODES[kind] = NodeSpec(compute=fn, depends=depends or (lambda *params: []),
+                               requires_ohlc=requires_ohlc)
+        return fn
+    return decorator
+
+
+def _talib():
+    import talib
+
+    return talib
+
+
+# Shared intermediates
+@register_node('sma')
+def _sma(inputs, deps, period):
+    return _talib().SMA(inputs['close'], timeperiod=period)
+
+
+@register_node('ema')
+def _ema(inputs, deps, period):
+    return _talib().EMA(inputs['close'], timeperiod=period)
+
+
+@register_node('stddev')
+def _stddev(inputs, deps, period):
+    return _talib().STDDEV(inputs['close'], timeperiod=period, nbdev=1)
+
+
+# MACD from one talib.MACD pass: its fast EMA is seeded at the slow EMA's first value, so it
+# is not the published ema_<fast> series and cannot be rebuilt from the shared EMAs
+@register_node('macd')
+def _macd(inputs, deps, fast, slow, signal):
+    return _talib().MACD(inputs['close'], fastperiod=fast, slowperiod=slow, signalperiod=signal)
+
+
+@register_node('macd_line', depends=lambda fast, slow, signal: [('macd', fast, slow, signal)])
+def _macd_line(inputs, deps, fast, slow, signal):
+    return deps[('macd', fast, slow, signal)][0]
+
+
+@register_node('macd_signal', depends=lambda fast, slow, signal: [('macd', fast, slow, signal)])
+def _macd_signal(inputs, deps, fast, slow, signal):
+    return deps[('macd', fast, slow, signal)][1]
+
+
+@register_node('macd_hist', depends=lambda fast, slow, signal: [('macd', fast, slow, signal)])
+def _macd_hist(inputs, deps, fast, slow, signal):
+    return deps[('macd', fast, slow, signal)][2]
+
+
+# Bollinger Bands from the shared SMA and STDDEV
+@register_node('bb_upper', depends=lambda period, dev: [('sma', period), ('stddev', period)])
+def _bb_upper(inputs, deps, period, dev):
+    return deps[('sma', period)] + dev * deps[('stddev', period)]
+
+
+@register_node('bb_lower', depends=lambda period, dev: [('sma', period), ('stddev', period)])
+def _bb_lower(inputs, deps, period, dev):
+    return deps[('sma', period)] - dev * deps[('stddev', period)]
+
+
+# Oscillators and volatility
+@register_node('rsi')
+def _rsi(inputs, deps, period):
+    return _talib().RSI(inputs['close'], timeperiod=period)
+
+
+@register_node('willr')
+def _willr(inputs, deps, period):
+    return _talib().WILLR(inputs['high'], inputs['low'], inputs['close'], timeperiod=period)
+
+
+@register_node('cci')
+def _cci(inputs, deps, period):
+    return _talib().CCI(inputs['high'], inputs['low'], inputs['close'], timeperiod=period)
+
+
+@register_node('atr')
+def _atr(inputs, deps, period):
+    return _talib().ATR(inputs['high'], inputs['low'], inputs['close'], timeperiod=period)
+
+
+@register_node('stoch', requires_ohlc=True)
+def _stoch(inputs, deps, period):
+    return _talib().STOCH(inputs['high'], inputs['low'], inputs['close'], fastk_period=period)
+
+
+@register_node('stoch_k', depends=lambda period: [('stoch', period)], requires_ohlc=True)
+def _stoch_k(inputs, deps, period):
+    return deps[('stoch', period)][0]
+
+
+@register_node('stoch_d', depends=lambda period: [('stoch', period)], requires_ohlc=True)
+def _stoch_d(inputs, deps, period):
+    return deps[('stoch', period)][1]
+
+
+@register_node('adx', requires_ohlc=True)
+def _adx(inputs, deps, period):
+    return _talib().ADX(inputs['high'], inputs['low'], inputs['close'], timeperiod=period)
+
+
+@register_node('mfi', requires_ohlc=True)
+def _mfi(inputs, deps, period):
+    return _talib().MFI(inputs['high'], inputs['low'], inputs['close'], inputs['volume'], timeperiod=period)
+
+
+@register_node('mom', requires_ohlc=True)
+def _mom(inputs, deps, period):
+    return _talib().MOM(inputs['close'], timeperiod=period)
+
+
+@register_node('roc', requires_ohlc=True)
+def _roc(inputs, deps, period):
+    return _talib().ROC(inputs['close'], timeperiod=period)
+
+
+# Volume
+@register_node('obv')
+def _obv(inputs, deps):
+    return _talib().OBV(inputs['close'], inputs['volume'])
+
+
+@register_node('ad', requires_ohlc=True)
+def _ad(inputs, deps):
+    return _talib().AD(inputs['high'], inputs['low'], inputs['close'], inputs['volume'])
+
+
+# Candlestick patterns
+@register_node('pattern', requires_ohlc=True)
+def _pattern(inputs, deps, name):
+    return getattr(_talib(), f"CDL{name.upper()}")(inputs['open'], inputs['high'], inputs['low'], inputs['close'])
+
+
+def _last_value(series) -> Optional[float]:
+    if len(series) == 0 or np.isnan(series[-1]):
+        return None
+    return series[-1]
+
+
+@dataclass
+class IndicatorRegistry:
+    """
+    Set of published indicators resolved through the shared node graph
+
+    Features:
+    - Built from the talib section of settings.yaml
+    - Each node evaluated at most once per update (memoized)
+    - Per-node call counts and cumulative cost
+    """
+
+    outputs: Dict[str, OutputSpec] = field(default_factory=dict)
+    costs: Dict[str, List[float]] = field(default_factory=dict)  # label -> [calls, seconds]
+
+    def add(self, name: str, key: NodeKey, min_points: int = 0, integer: bool = False):
+        """Publish the last value of node `key` as indicator `name`"""
+        if key[0] not in NODES:
+            raise ValueError(f"Unknown indicator node: {key[0]}")
+        self.outputs[name] = OutputSpec(key=key, min_points=min_points,
+                                        requires_ohlc=self._requires_ohlc(key), integer=integer)
+
+    def _requires_ohlc(self, key: NodeKey) -> bool:
+        spec = NODES[key[0]]
+        return spec.requires_ohlc or any(self._requires_ohlc(dep) for dep in spec.depends(*key[1:]))
+
+    def _resolve(self, key: NodeKey, inputs: Dict[str, np.ndarray], memo: Dict[NodeKey, Any]):
+        if key in memo:
+            return memo[key]
+        spec = NODES[key[0]]
+        deps = {dep: self._resolve(dep, inputs, memo) for dep in spec.depends(*key[1:])}
+
+        started = time.perf_counter()
+        value = spec.compute(inputs, deps, *key[1:])
+        elapsed = time.perf_counter() - started
+
+        label = "_".join(str(part) for part in key)
+        cost = self.costs.setdefault(label, [0, 0.0])
+        cost[0] += 1
+        cost[1] += elapsed
+
+        memo[key] = value
+        return value
+
+    def evaluate(self, inputs: Dict[str, np.ndarray], ohlc: bool = True) -> Dict[str, Any]:
+        """Compute every applicable indicator for one symbol update"""
+        points = len(inputs['close'])
+        memo: Dict[NodeKey, Any] = {}
+        results: Dict[str, Any] = {}
+
+        for name, output in self.outputs.items():
+            if output.requires_ohlc and not ohlc:
+                continue
+            if points < output.min_points:
+                continue
+            try:
+                series = self._resolve(output.key, inputs, memo)
+                value = _last_value(series)
+                if output.integer:
+                    value = int(value) if value is not None else 0
+                results[name] = value
+            except Exception as e:
+                logger.error(f"Error calculating indicator {name}: {e}")
+                results[name] = None
+        return results
+
+    def get_costs(self) -> Dict[str, Dict[str, float]]:
+        """Per-node cost report, most expensive first"""
+        report = {
+            label: {
+                'calls': calls,
+                'total_ms': seconds * 1000.0,
+                'avg_us': seconds / calls * 1_000_000.0 if calls else 0.0,
+            }
+            for label, (calls, seconds) in self.costs.items()
+        }
+        return dict(sorted(report.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+
+def build_registry(talib_config: dict) -> IndicatorRegistry:
+    """Build the published indicator set from the talib section of settings.yaml"""
+    registry = IndicatorRegistry()
+
+    for period in talib_config.get('rsi_periods', [14, 30]):
+        registry.add(f'rsi_{period}', ('rsi', period))
+
+    macd_config = talib_config.get('macd', {})
+    fast = macd_config.get('fast_period', 12)
+    slow = macd_config.get('slow_period', 26)
+    signal = macd_config.get('signal_period', 9)
+    registry.add('macd', ('macd_line', fast, slow, signal))
+    registry.add('macd_signal', ('macd_signal', fast, slow, signal))
+    registry.add('macd_histogram', ('macd_hist', fast, slow, signal))
+
+    for period in talib_config.get('sma_periods', [20, 50, 200]):
+        registry.add(f'sma_{period}', ('sma', period), min_points=period)
+
+    for period in talib_config.get('ema_periods', [12, 26, 50]):
+        registry.add(f'ema_{period}', ('ema', period), min_points=period)
+
+    bb_period = talib_config.get('bb_period', 20)
+    bb_std_dev = talib_config.get('bb_std_dev', 2)
+    registry.add('bb_upper', ('bb_upper', bb_period, bb_std_dev), min_points=bb_period)
+    registry.add('bb_middle', ('sma', bb_period), min_points=bb_period)
+    registry.add('bb_lower', ('bb_lower', bb_period, bb_std_dev), min_points=bb_period)
+
+    if talib_config.get('obv_enabled', True):
+        registry.add('obv', ('obv',))
+
+    williams_r_period = talib_config.get('williams_r_period', 14)
+    registry.add('williams_r', ('willr', williams_r_period), min_points=williams_r_period)
+
+    cci_period = talib_config.get('cci_period', 14)
+    registry.add('cci', ('cci', cci_period), min_points=cci_period)
+
+    atr_period = talib_config.get('atr_period', 14)
+    registry.add('atr', ('atr', atr_period), min_points=atr_period)
+
+    for i, period in enumerate(talib_config.get('stoch_periods', [14])):
+        suffix = '' if i == 0 else f'_{period}'
+        registry.add(f'stoch_k{suffix}', ('stoch_k', period))
+        registry.add(f'stoch_d{suffix}', ('stoch_d', period))
+
+    registry.add('adx', ('adx', talib_config.get('adx_period', 14)))
+    registry.add('mfi', ('mfi', talib_config.get('mfi_period', 14)))
+
+    registry.add('ad_line', ('ad',))
+    registry.add('momentum', ('mom', talib_config.get('momentum_period', 10)))
+    registry.add('roc', ('roc', talib_config.get('roc_period', 10)))
+
+    for pattern in talib_config.get('patterns', ['hammer', 'doji', 'engulfing']):
+        registry.add(f'{pattern}_pattern', ('pattern', pattern), integer=True)
+
+    return registry
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Incremental Quote/Trade Microstructure Features
+Constant-time per-update spread, imbalance, trade-side, VWAP and realized volatility
+Fed from the quote and trade paths of PolygonDataFeed
+"""
+
+import logging
+import math
+from datetime import date, datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RollingSum:
+    """Fixed-size ring buffer with a running sum"""
+
+    __slots__ = ('values', 'index', 'count', 'total')
+
+    def __init__(self, size: int):
+        self.values = [0.0] * size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def push(self, value: float):
+        size = len(self.values)
+        self.total += value - self.values[self.index]
+        self.values[self.index] = value
+        self.index = (self.index + 1) % size
+        if self.count < size:
+            self.count += 1
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class SymbolMicrostructure:
+    """Per-symbol streaming state"""
+
+    __slots__ = (
+        'bid', 'ask', 'bid_size', 'ask_size', 'quote_time',
+        'spreads', 'ofi', 'signed_volume', 'total_volume', 'squared_returns',
+        'last_trade_price', 'last_tick_direction', 'last_side',
+        'session', 'cum_notional', 'cum_volume',
+    )
+
+    def __init__(self, window: int, volatility_window: int):
+        self.bid = self.ask = None
+        self.bid_size = self.ask_size = 0.0
+        self.quote_time: Optional[datetime] = None
+        self.spreads = RollingSum(window)
+        self.ofi = RollingSum(window)
+        self.signed_volume = RollingSum(window)
+        self.total_volume = RollingSum(window)
+        self.squared_returns = RollingSum(volatility_window)
+        self.last_trade_price = None
+        self.last_tick_direction = 0
+        self.last_side = 0
+        self.session: Optional[date] = None
+        self.cum_notional = 0.0
+        self.cum_volume = 0.0
+
+
+class MicrostructureEngine:
+    """
+    Streaming microstructure feature engine
+
+    Features:
+    - Rolling bid/ask spread and mid-price from the cached NBBO
+    - Order-flow imbalance (Cont-Kukanov-Stoikov) and quote-size imbalance
+    - Lee-Ready trade-side classification against the NBBO in force at the trade time
+      (a quote stamped after the print is never used; the tick rule applies instead)
+    - Session VWAP and realized volatility of trade log returns
+    """
+
+    def __init__(self, window: int = 100, volatility_window: int = 100):
+        self.window = int(window)
+        self.volatility_window = int(volatility_window)
+        self.symbols: Dict[str, SymbolMicrostructure] = {}
+        self.quotes_ahead = 0  # trades classified by tick rule because the cached quote was newer
+
+    def _state(self, symbol: str) -> SymbolMicrostructure:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = SymbolMicrostructure(self.window, self.volatility_window)
+            self.symbols[symbol] = state
+        return state
+
+    def on_quote(self, symbol: str, bid: float, ask: float, bid_size: float, ask_size: float,
+                 timestamp: Optional[datetime] = None):
+        """Update NBBO-derived features with a new quote"""
+        if not bid or not ask or ask < bid:
+            return
+        state = self._state(symbol)
+
+        # Order-flow imbalance contribution of this quote update
+        if state.bid is not None:
+            flow = 0.0
+            if bid >= state.bid:
+                flow += bid_size
+            if bid <= state.bid:
+                flow -= state.bid_size
+            if ask <= state.ask:
+                flow -= ask_size
+            if ask >= state.ask:
+                flow += state.ask_size
+            state.ofi.push(flow)
+
+        state.bid, state.ask = bid, ask
+        state.bid_size, state.ask_size = bid_size, ask_size
+        state.quote_time = timestamp
+        state.spreads.push(ask - bid)
+
+    def on_trade(self, symbol: str, price: float, size: float, timestamp: datetime) -> int:
+        """Classify a trade (+1 buy, -1 sell, 0 unknown) and update trade features"""
+        if price <= 0:
+            return 0
+        state = self._state(symbol)
+
+        # Tick direction against the last trade at a different price
+        if state.last_trade_price is not None and price != state.last_trade_price:
+            state.last_tick_direction = 1 if price > state.last_trade_price else -1
+            state.squared_returns.push(math.log(price / state.last_trade_price) ** 2)
+
+        # Lee-Ready: quote rule first, tick rule at the midpoint or without a prevailing quote
+        side = state.last_tick_direction
+        if state.bid is not None and state.quote_time is not None and state.quote_time > timestamp:
+            self.quotes_ahead += 1
+        elif state.bid is not None:
+            mid = (state.bid + state.ask) / 2
+            if price > mid:
+                side = 1
+            elif price < mid:
+                side = -1
+        if side == 0:
+            side = state.last_side
+
+        state.last_side = side
+        state.last_trade_price = price
+        state.signed_volume.push(side * size)
+        state.total_volume.push(size)
+
+        # Session VWAP resets on the first trade of a new day
+        session = timestamp.date()
+        if session != state.session:
+            state.session = session
+            state.cum_notional = 0.0
+            state.cum_volume = 0.0
+        state.cum_notional += price * size
+        state.cum_volume += size
+
+        return side
+
+    def features(self, symbol: str) -> Dict[str, Optional[float]]:
+        """Current feature values for a symbol"""
+        state = self.symbols.get(symbol)
+        if state is None:
+            return {}
+
+        features: Dict[str, Optional[float]] = {}
+        if state.bid is not None:
+            mid = (state.bid + state.ask) / 2
+            spread = state.ask - state.bid
+            depth = state.bid_size + state.ask_size
+            features['mid_price'] = mid
+            features['spread'] = spread
+            features['spread_bps'] = spread / mid * 10000 if mid else None
+            features['avg_spread'] = state.spreads.mean
+            features['quote_imbalance'] = (state.bid_size - state.ask_size) / depth if depth else None
+            features['order_flow_imbalance'] = state.ofi.total
+
+        if state.total_volume.count:
+            total = state.total_volume.total
+            features['trade_imbalance'] = state.signed_volume.total / total if total else None
+            features['last_trade_side'] = state.last_side
+        if state.cum_volume:
+            features['vwap'] = state.cum_notional / state.cum_volume
+        if state.squared_returns.count >= 2:
+            features['realized_volatility'] = math.sqrt(state.squared_returns.total)
+
+        return features
+
+    def forget(self, symbol: str):
+        """Drop all state for a symbol"""
+        self.symbols.pop(symbol, None)
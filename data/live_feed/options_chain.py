@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Options Chain Snapshot Ingestion
+Pages the options chain snapshot endpoint for many underlyings concurrently under one rate limit
+Keeps every contract in an in-memory index keyed by underlying/expiry/strike/type and reports changed rows only
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+ChainKey = Tuple[str, date, float, str]  # (underlying, expiration, strike, 'call'/'put')
+
+
+@dataclass
+class ChainRow:
+    """One contract from a chain snapshot, in polygon_options column terms"""
+    ticker: str
+    underlying: str
+    expiration: date
+    strike: float
+    option_type: str
+    price: Optional[float]
+    bid: Optional[float]
+    ask: Optional[float]
+    volume: Optional[int]
+    open_interest: Optional[int]
+    delta: Optional[float]
+    gamma: Optional[float]
+    theta: Optional[float]
+    vega: Optional[float]
+    implied_volatility: Optional[float]
+    underlying_price: Optional[float]
+
+    @property
+    def key(self) -> ChainKey:
+        return (self.underlying, self.expiration, self.strike, self.option_type)
+
+    @property
+    def values(self) -> tuple:
+        """Fields compared between refreshes"""
+        return (self.price, self.bid, self.ask, self.volume, self.open_interest,
+                self.delta, self.gamma, self.theta, self.vega, self.implied_volatility)
+
+    @property
+    def spread(self) -> Optional[float]:
+        if self.bid is None or self.ask is None:
+            return None
+        return self.ask - self.bid
+
+    @property
+    def intrinsic_value(self) -> Optional[float]:
+        if self.underlying_price is None:
+            return None
+        if self.option_type == 'call':
+            return max(self.underlying_price - self.strike, 0.0)
+        return max(self.strike - self.underlying_price, 0.0)
+
+    @property
+    def time_value(self) -> Optional[float]:
+        intrinsic = self.intrinsic_value
+        if intrinsic is None or self.price is None:
+            return None
+        return self.price - intrinsic
+
+    @classmethod
+    def from_snapshot(cls, result: Dict[str, Any], underlying: str) -> Optional["ChainRow"]:
+        """Build a row from one /v3/snapshot/options result (None when details are missing)"""
+        details = result.get('details') or {}
+        ticker = details.get('ticker')
+        expiration = details.get('expiration_date')
+        strike = details.get('strike_price')
+        option_type = details.get('contract_type')
+        if not ticker or not expiration or strike is None or option_type not in ('call', 'put'):
+            return None
+
+        day = result.get('day') or {}
+        last_trade = result.get('last_trade') or {}
+        last_quote = result.get('last_quote') or {}
+        greeks = result.get('greeks') or {}
+        underlying_asset = result.get('underlying_asset') or {}
+
+        price = last_trade.get('price') or day.get('close') or last_quote.get('midpoint')
+        volume = day.get('volume')
+        open_interest = result.get('open_interest')
+        return cls(
+            ticker=ticker,
+            underlying=underlying,
+            expiration=date.fromisoformat(expiration),
+            strike=float(strike),
+            option_type=option_type,
+            price=price,
+            bid=last_quote.get('bid'),
+            ask=last_quote.get('ask'),
+            volume=int(volume) if volume is not None else None,
+            open_interest=int(open_interest) if open_interest is not None else None,
+            delta=greeks.get('delta'),
+            gamma=greeks.get('gamma'),
+            theta=greeks.get('theta'),
+            vega=greeks.get('vega'),
+            implied_volatility=result.get('implied_volatility'),
+            underlying_price=underlying_asset.get('price')
+        )
+
+
+class OptionsChainIndex:
+    """
+    In-memory chain state keyed by (underlying, expiration, strike, type)
+
+    Features:
+    - upsert() reports whether any compared field changed since the last snapshot
+    - Contracts missing from a complete refresh of their underlying/type are dropped
+    - Expired contracts are pruned by date
+    """
+
+    def __init__(self):
+        self.rows: Dict[ChainKey, ChainRow] = {}
+        self.keys_by_partition: Dict[Tuple[str, str], Set[ChainKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, row: ChainRow) -> bool:
+        key = row.key
+        previous = self.rows.get(key)
+        self.rows[key] = row
+        self.keys_by_partition.setdefault((row.underlying, row.option_type), set()).add(key)
+        return previous is None or previous.values != row.values
+
+    def retain(self, underlying: str, option_type: str, keys: Set[ChainKey]) -> int:
+        """Drop contracts of one underlying/type that were not in its latest complete refresh"""
+        partition = self.keys_by_partition.get((underlying, option_type), set())
+        stale = partition - keys
+        for key in stale:
+            self.rows.pop(key, None)
+        self.keys_by_partition[(underlying, option_type)] = partition & keys
+        return len(stale)
+
+    def prune_expired(self, today: date) -> int:
+        expired = [key for key in self.rows if key[1] < today]
+        for key in expired:
+            del self.rows[key]
+            self.keys_by_partition.get((key[0], key[3]), set()).discard(key)
+        return len(expired)
+
+    def chain(self, underlying: str, expiration: Optional[date] = None,
+              option_type: Optional[str] = None) -> List[ChainRow]:
+        """Contracts of one underlying sorted by expiration, strike and type"""
+        rows = [row for key, row in self.rows.items()
+                if key[0] == underlying
+                and (expiration is None or key[1] == expiration)
+                and (option_type is None or key[3] == option_type)]
+        return sorted(rows, key=lambda row: (row.expiration, row.strike, row.option_type))
+
+    def get(self, underlying: str, expiration: date, strike: float, option_type: str) -> Optional[ChainRow]:
+        return self.rows.get((underlying, expiration, float(strike), option_type))
+
+
+class OptionsChainLoader:
+    """
+    Concurrent chain snapshot pagination
+
+    Features:
+    - Each underlying is split by contract type so its pages are walked by independent cursors
+    - Partitions run concurrently (bounded); every page request takes a token from one bucket
+    - 429 responses back off and retry the same page
+    - A partition only prunes vanished contracts when all of its pages were read
+    """
+
+    def __init__(self, api_key: str, rate_limiter: AsyncRateLimiter, base_url: str = "https://api.polygon.io",
+                 concurrency: int = 8, page_limit: int = 250, max_days: Optional[int] = None,
+                 contract_types: Sequence[str] = ('call', 'put'), max_retries: int = 3, timeout: float = 30.0):
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = max(int(concurrency), 1)
+        self.page_limit = int(page_limit)
+        self.max_days = max_days
+        self.contract_types = list(contract_types)
+        self.max_retries = int(max_retries)
+        self.timeout = float(timeout)
+        self.index = OptionsChainIndex()
+
+        self.pages_fetched = 0
+        self.contracts_seen = 0
+        self.rows_changed = 0
+        self.contracts_removed = 0
+        self.errors = 0
+        self.last_refresh_seconds = 0.0
+
+    async def _get_page(self, session, url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            async with session.get(url, params=params) as response:
+                if response.status == 429 and attempt < self.max_retries:
+                    await asyncio.sleep(float(response.headers.get('Retry-After', 2 ** attempt)))
+                    continue
+                if response.status != 200:
+                    body = await response.text()
+                    raise RuntimeError(f"chain snapshot returned {response.status}: {body[:200]}")
+                self.pages_fetched += 1
+                return await response.json()
+        raise RuntimeError("chain snapshot rate limited")
+
+    async def _load_partition(self, session, underlying: str, option_type: str, today: date,
+                              changed: List[ChainRow]):
+        """Walk one underlying/type cursor; changed rows are appended as pages arrive"""
+        params: Optional[Dict[str, Any]] = {'contract_type': option_type, 'limit': self.page_limit,
+                                            'apiKey': self.api_key}
+        if self.max_days:
+            params['expiration_date.lte'] = (today + timedelta(days=int(self.max_days))).isoformat()
+        url = f"{self.base_url}/v3/snapshot/options/{underlying}"
+
+        seen: Set[ChainKey] = set()
+        while url:
+            page = await self._get_page(session, url, params)
+            for result in page.get('results') or []:
+                row = ChainRow.from_snapshot(result, underlying)
+                if row is None:
+                    continue
+                seen.add(row.key)
+                if self.index.upsert(row):
+                    changed.append(row)
+            next_url = page.get('next_url')
+            # next_url carries the cursor and filters; only the key has to be re-sent
+            url, params = (next_url, {'apiKey': self.api_key}) if next_url else (None, None)
+
+        self.contracts_seen += len(seen)
+        self.contracts_removed += self.index.retain(underlying, option_type, seen)
+
+    async def refresh(self, underlyings: Sequence[str]) -> List[ChainRow]:
+        """Snapshot every chain; returns the rows that changed since the previous refresh"""
+        import aiohttp
+
+        started = time.monotonic()
+        today = date.today()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        changed: List[ChainRow] = []  # rows already in the index must be reported even if a later page fails
+
+        async def run(underlying: str, option_type: str):
+            async with semaphore:
+                try:
+                    await self._load_partition(session, underlying, option_type, today, changed)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error loading {underlying} {option_type} chain: {e}")
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            await asyncio.gather(*(run(underlying, option_type)
+                                   for underlying in underlyings
+                                   for option_type in self.contract_types))
+
+        self.contracts_removed += self.index.prune_expired(today)
+        self.rows_changed += len(changed)
+        self.last_refresh_seconds = time.monotonic() - started
+        logger.info(f"Options chains: {len(underlyings)} underlyings, {len(self.index)} contracts, "
+                    f"{len(changed)} changed in {self.last_refresh_seconds:.1f}s")
+        return changed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'chain_contracts': len(self.index),
+            'chain_pages_fetched': self.pages_fetched,
+            'chain_contracts_seen': self.contracts_seen,
+            'chain_rows_changed': self.rows_changed,
+            'chain_contracts_removed': self.contracts_removed,
+            'chain_errors': self.errors,
+            'chain_last_refresh_seconds': round(self.last_refresh_seconds, 2),
+        }
@@ -5,38 +5,87 @@ Consolidates all Polygon streams: Stocks, Options, Crypto + Technical Indicators
 Designed for Agentic AI Trading System with QuestDB integration
 """
 
+# Measured against startup.target_seconds when the feed starts (first import of the package)
+from .startup_clock import IMPORT_STARTED
+
 import asyncio
+import heapq
+import hashlib
 import logging
 import os
+import random
 import json
+import time
 import yaml
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from pathlib import Path
 
-# Polygon API SDK
-from polygon import RESTClient, WebSocketClient
-from polygon.websocket.models import WebSocketMessage
-from polygon.websocket.models.common import Feed
+# Bulk read API over QuestDB history
+from .questdb_query import QuestDBQueryClient
+
+# Completed day partitions exported to Parquet for research jobs
+from .cold_storage import ColdStorageExporter
+
+# Batched writer with durable spool fallback
+from .questdb_writer import DeadLetterLog, QuestDBWriter
+from .spool import WriteAheadSpool
+
+# Reconnect gap detection and REST backfill
+from .gap_filler import Gap, GapFiller, GapTracker, MINUTE_MS, rest_ticker, sdk_field
+from .rate_limiter import AsyncRateLimiter
+
+# Options chain snapshots paged concurrently into an in-memory chain index
+from .options_chain import ChainRow, OptionsChainLoader
 
-# TA-Lib for technical analysis
-import talib
+# Indicator dependency graph driven by the talib config
+from .indicators import build_registry
+from .microstructure import MicrostructureEngine
+from .correlation import CRYPTO_PERIODS_PER_YEAR, RollingCorrelationEngine
+from .scheduler import MarketClock, Scheduler
+from .state_manager import SymbolStateManager
+from .ws_client import RawWebSocketClient
 
-# Environment setup - Load from project root .env
-from dotenv import load_dotenv
+# Micro-batch price/volume validation
+from .validation import MicroBatchValidator, RejectedTick
+
+# Sweep/block classification of option prints (sibling package under data/)
+from options_flow_feed import FlowEvent, OptionsFlowDetector, parse_occ
+
+# Off-exchange print aggregation from the stock trade stream
+from darkpool_feed import DarkPoolAggregator, DarkPoolSummary
+
+# Vectorized sector ETF breadth over constituent state
+from sector_etf_tide_feed import SectorBreadthEngine, SectorTide, load_sector_index
+
+# Heavy dependencies (Polygon SDK, TA-Lib, psycopg2, python-dotenv) are imported
+# where they are first used so importing this module stays cheap
+if TYPE_CHECKING:
+    from polygon.websocket.models import WebSocketMessage
 
 # Get absolute path to this feed directory
 FEED_DIR = Path(__file__).parent.absolute()
 
-# Load environment variables from project root .env file
+# Project root holds the .env file
 PROJECT_ROOT = FEED_DIR.parent.parent
-env_file = PROJECT_ROOT / ".env"
-load_dotenv(env_file)
+
+# Component name recorded with the applied schema fingerprint
+SCHEMA_COMPONENT = "live_feed"
+
+# Message types that pass through the validation stage. While validation is enabled every
+# other stock/crypto message is queued in the same batch unchecked, so processors always see
+# the stream order (a quote is never applied ahead of a trade printed before it)
+VALIDATED_MESSAGE_TYPES = {"T", "A", "AM", "XT", "XA"}
+
+logger = logging.getLogger(__name__)
+
+def load_environment():
+    """Load environment variables from the project root .env file"""
+    from dotenv import load_dotenv
+
+    load_dotenv(PROJECT_ROOT / ".env")
 
 # Load configuration
 def load_config():
@@ -77,15 +126,11 @@ def load_schema():
         logger.error(f"Failed to load schema: {e}")
         return ""
 
-# Load configuration and schema
-CONFIG = load_config()
-SCHEMA_SQL = load_schema()
-
-# Setup logging from config
-log_level = CONFIG.get('logging', {}).get('level', 'INFO')
-log_format = CONFIG.get('logging', {}).get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logging.basicConfig(level=getattr(logging, log_level), format=log_format)
-logger = logging.getLogger(__name__)
+def configure_logging(config: dict):
+    """Setup logging from config (called by the entry point, not at import)"""
+    log_level = config.get('logging', {}).get('level', 'INFO')
+    log_format = config.get('logging', {}).get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.basicConfig(level=getattr(logging, log_level), format=log_format)
 
 @dataclass
 class MarketData:
@@ -109,9 +154,14 @@ class PolygonDataFeed:
     - High-performance data processing
     """
 
-    def __init__(self):
-        # Load configuration
-        self.config = CONFIG
+    def __init__(self, config: Optional[dict] = None):
+        construct_started = time.perf_counter()
+
+        # Load environment and configuration on construction, not at import
+        if config is None:
+            load_environment()
+            config = load_config()
+        self.config = config
 
         # Polygon API configuration
         polygon_config = self.config.get('polygon', {})
@@ -119,9 +169,10 @@ class PolygonDataFeed:
         if not self.api_key:
             raise ValueError("POLYGON_API_KEY not found in configuration")
 
-        # Initialize Polygon clients
-        self.rest_client = RESTClient(self.api_key)
+        # Polygon clients (REST client is created on first use)
+        self._rest_client = None
         self.websocket_client = None
+        self.rest_enabled = polygon_config.get('rest_enabled', True)  # off for offline runs (soak tests)
 
         # QuestDB connection from config
         questdb_config = self.config.get('questdb', {})
@@ -130,6 +181,9 @@ class PolygonDataFeed:
         self.questdb_user = questdb_config.get('username', 'admin')
         self.questdb_password = questdb_config.get('password', 'quest')
         self.questdb_database = questdb_config.get('database', 'qdb')
+        self.questdb_http_port = int(questdb_config.get('http_port', 9000))
+        self.questdb_connect_timeout = int(questdb_config.get('connection_timeout', 30))
+        self.schema_initialized = False
 
         # Table names from config
         self.tables = questdb_config.get('tables', {})
@@ -147,12 +201,67 @@ class PolygonDataFeed:
         # Data buffers for technical analysis
         self.price_buffers = {}  # symbol -> price history
         self.volume_buffers = {}  # symbol -> volume history
-        self.technical_indicators = {}  # symbol -> calculated indicators
+        self.price_timestamps = {}  # symbol -> trade timestamps (for ordered gap repair)
+        self.technical_indicators = {}  # symbol -> OHLCV bar buffer
+        self.latest_indicators = {}  # symbol -> most recent indicator values
 
         # Buffer sizes from config
         self.lookback_periods = self.talib_config.get('lookback_periods', 200)
         self.min_data_points = self.talib_config.get('min_data_points', 50)
 
+        # Indicator registry; shared intermediates are computed once per update
+        self.indicator_registry = build_registry(self.talib_config)
+
+        # Quote/trade microstructure features, updated in constant time per message
+        microstructure_config = self.config.get('microstructure', {})
+        self.microstructure_enabled = microstructure_config.get('enabled', True)
+        self.microstructure = MicrostructureEngine(
+            window=microstructure_config.get('window', 100),
+            volatility_window=microstructure_config.get('volatility_window', 100)
+        )
+
+        # Rolling returns matrix for beta to the benchmark, realized volatility and correlations
+        correlation_config = self.config.get('correlation', {})
+        self.correlation_enabled = correlation_config.get('enabled', True)
+        self.correlation_interval = float(correlation_config.get('interval', 60))
+        self.correlation = RollingCorrelationEngine(
+            window=correlation_config.get('window', 390),
+            benchmark=correlation_config.get('benchmark', 'SPY'),
+            min_periods=correlation_config.get('min_periods', 30),
+            recompute_interval=correlation_config.get('recompute_interval', 390),
+            max_symbols=correlation_config.get('max_symbols', 5000)
+        )
+
+        # Per-symbol memory budget; inactive symbols are evicted LRU and rehydrated on demand
+        state_config = self.config.get('state', {})
+        self.state_enabled = state_config.get('enabled', True)
+        self.state_check_interval = float(state_config.get('check_interval', 30))
+        self.state_rehydrate_window = timedelta(hours=state_config.get('rehydrate_window_hours', 24))
+        spill_dir = Path(state_config.get('spill_directory', 'state_spill'))
+        if not spill_dir.is_absolute():
+            spill_dir = FEED_DIR / spill_dir
+        self.state_manager = SymbolStateManager(
+            stores={
+                'prices': self.price_buffers,
+                'volumes': self.volume_buffers,
+                'timestamps': self.price_timestamps,
+                'bars': self.technical_indicators,
+                'indicators': self.latest_indicators,
+            },
+            budget_bytes=int(state_config.get('budget_mb', 512) * 1024 * 1024),
+            min_idle=state_config.get('min_idle', 300),
+            low_watermark=state_config.get('low_watermark', 0.9),
+            memory_threshold=self.config.get('monitoring', {}).get('alerts', {}).get('memory_threshold'),
+            pressure_fraction=state_config.get('pressure_fraction', 0.25),
+            eviction=state_config.get('eviction', 'spill'),
+            spill_directory=spill_dir,
+            max_length=200,
+            evicted_ttl=float(state_config.get('evicted_ttl_hours', 24)) * 3600,
+            max_evicted=state_config.get('max_evicted', 50000),
+            loader=self._load_symbol_state,
+            forget=[self.microstructure.forget]
+        )
+
         # Subscribed symbols (can be made configurable later)
         self.stock_symbols = ["SPY", "QQQ", "IWM", "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META"]
         self.crypto_symbols = ["BTC-USD", "ETH-USD", "SOL-USD", "AVAX-USD"]
@@ -161,34 +270,273 @@ class PolygonDataFeed:
         # Callbacks for real-time processing
         self.data_callbacks = []
 
+        # Batched QuestDB writer; rows spool to disk while QuestDB is slow or down
+        spool_config = self.config.get('spool', {})
+        spool_dir = Path(spool_config.get('directory', 'spool'))
+        if not spool_dir.is_absolute():
+            spool_dir = FEED_DIR / spool_dir
+        self.spool = WriteAheadSpool(
+            directory=spool_dir,
+            segment_size=int(spool_config.get('segment_size_mb', 64)) * 1024 * 1024,
+            max_bytes=int(spool_config.get('max_size_mb', 2048)) * 1024 * 1024
+        )
+        self.writer = QuestDBWriter(
+            connect=self._connect_questdb,
+            spool=self.spool,
+            batch_size=websocket_config.get('batch_size', 100),
+            flush_interval=websocket_config.get('flush_interval', 1.0),
+            max_pending=spool_config.get('max_pending_rows', 10000),
+            replay_batch_size=spool_config.get('replay_batch_size', 1000),
+            retry_interval=spool_config.get('retry_interval', 5.0),
+            on_recover=self._on_writer_recover,
+            dead_letter=DeadLetterLog(
+                spool_dir / spool_config.get('dead_letter_file', 'dead_letters.jsonl'),
+                max_bytes=int(spool_config.get('dead_letter_max_mb', 256)) * 1024 * 1024
+            )
+        )
+
+        # Reconnect backoff, gap detection and REST backfill
+        self.reconnect_attempts = int(websocket_config.get('reconnect_attempts', 5))
+        self.reconnect_delay = float(websocket_config.get('reconnect_delay', 5))
+        self.reconnect_max_delay = float(websocket_config.get('reconnect_max_delay', 60))
+        self._websocket_task = None
+
+        # 'polygon' uses the SDK client; 'raw' speaks the protocol to websocket.url directly
+        self.websocket_client_type = websocket_config.get('client', 'polygon')
+        self.websocket_url = websocket_config.get('url', 'wss://socket.polygon.io/stocks')
+
+        gap_config = self.config.get('gap_fill', {})
+        rate_limits = polygon_config.get('rate_limits', {})
+        self.rest_rate_limiter = AsyncRateLimiter(
+            requests_per_minute=gap_config.get('requests_per_minute', rate_limits.get('aggregates', 5)),
+            burst=gap_config.get('burst', 1)
+        )
+        self.gap_fill_enabled = gap_config.get('enabled', True)
+        self.gap_tracker = GapTracker(
+            bar_interval_ms=MINUTE_MS,
+            max_gap_ms=int(gap_config.get('max_gap_minutes', 390)) * MINUTE_MS,
+            min_gap_ms=int(gap_config.get('min_gap_minutes', 5)) * MINUTE_MS
+        )
+        self.gap_filler = GapFiller(
+            api_key=self.api_key,
+            rate_limiter=self.rest_rate_limiter,
+            on_bars=self._repair_bars,
+            on_trades=self._repair_trades,
+            max_concurrency=gap_config.get('max_concurrency', 4)
+        )
+
+        # Micro-batch validation of trades and bars
+        validation_config = self.processing_config.get('validation', {})
+        price_validation = self.processing_config.get('price_validation', {})
+        volume_validation = self.processing_config.get('volume_validation', {})
+        self.validation_enabled = validation_config.get('enabled', True)
+        self.validation_action = validation_config.get('action', 'quarantine')
+        self.validation_flush_interval = float(validation_config.get('flush_interval', 0.05))
+        self.validator = MicroBatchValidator(
+            min_price=price_validation.get('min_price', 0.01),
+            max_price=price_validation.get('max_price', 100000),
+            max_change_percent=price_validation.get('max_change_percent', 50),
+            crypto_min_price=price_validation.get('crypto_min_price', 1e-8),
+            crypto_max_price=price_validation.get('crypto_max_price', 10000000),
+            min_volume=volume_validation.get('min_volume', 0),
+            max_volume=volume_validation.get('max_volume', 1000000000),
+            batch_size=validation_config.get('batch_size', 100),
+            reset_after=validation_config.get('reset_after', 5)
+        )
+
+        # Streaming options flow classification (O: trades)
+        options_flow_config = self.config.get('options_flow', {})
+        self.options_flow_enabled = options_flow_config.get('enabled', True)
+        self.option_contracts = options_flow_config.get('contracts', [])  # streamed as T.<contract>
+        # Chains of these underlyings are snapshotted for the streamed contracts' open interest
+        self.options_flow_underlyings = list(dict.fromkeys(
+            details.underlying for details in map(parse_occ, self.option_contracts) if details is not None
+        ))
+        self.options_flow_expire_interval = float(options_flow_config.get('expire_interval', 1.0))
+        self.options_flow = OptionsFlowDetector(
+            cluster_window_ms=options_flow_config.get('cluster_window_ms', 500),
+            block_size=options_flow_config.get('block_size', 100),
+            block_premium=options_flow_config.get('block_premium', 100000),
+            unusual_ratio=options_flow_config.get('unusual_volume_oi_ratio', 1.0),
+            unusual_min_volume=options_flow_config.get('unusual_min_volume', 500),
+            unusual_premium=options_flow_config.get('unusual_premium', 250000),
+            sweep_conditions=options_flow_config.get('sweep_conditions', []),
+            max_contracts=options_flow_config.get('max_contracts', 200000),
+            max_open_interest=options_flow_config.get('max_open_interest', 1000000)
+        )
+
+        # Options chain snapshots (REST), changed contracts only are written to polygon_options
+        options_chain_config = self.config.get('options_chain', {})
+        self.options_chain_enabled = options_chain_config.get('enabled', True)
+        self.options_chain_underlyings = options_chain_config.get('underlyings', ["SPY", "QQQ", "AAPL", "TSLA", "NVDA"])
+        self.options_chain = OptionsChainLoader(
+            api_key=self.api_key,
+            rate_limiter=AsyncRateLimiter(
+                requests_per_minute=options_chain_config.get('requests_per_minute', rate_limits.get('options', 5)),
+                burst=options_chain_config.get('burst', 1)
+            ),
+            base_url=polygon_config.get('base_url', 'https://api.polygon.io'),
+            concurrency=options_chain_config.get('concurrency', 8),
+            page_limit=options_chain_config.get('page_limit', 250),
+            max_days=options_chain_config.get('max_days'),
+            max_retries=options_chain_config.get('max_retries', 3),
+            timeout=options_chain_config.get('timeout', 30)
+        )
+
+        # Dark pool (TRF) aggregates, persisted as periodic summaries
+        darkpool_config = self.config.get('darkpool', {})
+        self.darkpool_enabled = darkpool_config.get('enabled', True)
+        self.darkpool_summary_interval = float(darkpool_config.get('summary_interval', 60))
+        self.darkpool = DarkPoolAggregator(
+            exclude_conditions=darkpool_config.get('exclude_conditions', []),
+            block_size=darkpool_config.get('block_size', 10000),
+            block_notional=darkpool_config.get('block_notional', 200000),
+            level_capacity=darkpool_config.get('level_capacity', 16),
+            level_size=darkpool_config.get('level_size', 0.01),
+            top_levels=darkpool_config.get('top_levels', 5)
+        )
+
+        # Sector ETF breadth (tide), refreshed every few seconds from constituent state
+        sector_tide_config = self.config.get('sector_tide', {})
+        self.sector_tide_enabled = sector_tide_config.get('enabled', True)
+        self.sector_tide_interval = float(sector_tide_config.get('interval', 5))
+        self.sector_tide_source_interval = float(sector_tide_config.get('source_interval', 30))
+        self.sector_tide_averages_interval = float(sector_tide_config.get('averages_interval', 300))
+        self.sector_tide = SectorBreadthEngine(
+            load_sector_index(sector_tide_config.get('sectors_file')),
+            ma_periods=sector_tide_config.get('ma_periods', [20, 50, 200])
+        )
+
+        # Periodic REST polls and indicator passes, paused while their market is closed
+        self.scheduler_config = self.config.get('scheduler', {})
+        self.market_clock = MarketClock(
+            extended_hours=self.scheduler_config.get('extended_hours', True),
+            stale_after=self.scheduler_config.get('status_stale_after', 900)
+        )
+        self.scheduler = Scheduler(self.market_clock)
+
+        # Bulk query API for agents
+        query_config = self.config.get('query_api', {})
+        self.query_client = QuestDBQueryClient(
+            host=self.questdb_host,
+            http_port=self.questdb_http_port,
+            cache_ttl=query_config.get('cache_ttl', 30),
+            cache_bucket_seconds=query_config.get('cache_bucket_seconds', 60),
+            chunk_rows=query_config.get('chunk_rows', 100000),
+            max_cache_entries=query_config.get('max_cache_entries', 256),
+            timeout=query_config.get('timeout', 30)
+        )
+
+        # Parquet cold storage of completed day partitions (own client: exports outlast query timeouts)
+        cold_config = self.config.get('cold_storage', {})
+        self.cold_storage_enabled = cold_config.get('enabled', True)
+        self.cold_storage_interval = float(cold_config.get('interval', 3600))
+        cold_dir = Path(cold_config.get('directory', 'cold_storage'))
+        if not cold_dir.is_absolute():
+            cold_dir = FEED_DIR / cold_dir
+        self.cold_storage = ColdStorageExporter(
+            QuestDBQueryClient(
+                host=self.questdb_host,
+                http_port=self.questdb_http_port,
+                chunk_rows=query_config.get('chunk_rows', 100000),
+                timeout=cold_config.get('timeout', 300)
+            ),
+            cold_dir,
+            tables=cold_config.get('tables', ['polygon_stocks', 'aggregate_data', 'technical_indicators',
+                                              'risk_metrics']),
+            compression=cold_config.get('compression', 'zstd'),
+            compression_level=cold_config.get('compression_level'),
+            flush_rows=cold_config.get('flush_rows', 2000000),
+            lookback_days=cold_config.get('lookback_days', 30),
+            grace_days=cold_config.get('grace_days', 1),
+            ready=lambda: self.writer.healthy and self.spool.is_empty()
+        )
+
         logger.info(f"Polygon Data Feed initialized with configuration from settings.yaml")
         logger.info(f"QuestDB: {self.questdb_host}:{self.questdb_port}")
         logger.info(f"TA-Lib lookback periods: {self.lookback_periods}")
 
+        self.startup_timings = {
+            'import_seconds': IMPORT_SECONDS,
+            'construct_seconds': time.perf_counter() - construct_started,
+        }
+
+    @property
+    def rest_client(self):
+        """Polygon REST client, created on first use"""
+        if self._rest_client is None:
+            from polygon import RESTClient
+
+            self._rest_client = RESTClient(self.api_key)
+        return self._rest_client
+
     async def start(self):
         """Start all data feeds"""
         logger.info("Starting comprehensive Polygon data feed...")
+        start_started = time.perf_counter()
 
-        # Initialize database schema first
-        await self.initialize_database_schema()
+        # Start the writer first so rows are spooled even if QuestDB is down
+        await self.writer.start()
+
+        # Initialize database schema; if QuestDB is unreachable, keep ingesting into the spool
+        try:
+            await self.initialize_database_schema()
+        except Exception as e:
+            logger.warning("QuestDB unavailable at startup, spooling writes until it recovers")
+            self.writer.mark_unhealthy(e)
+
+        schema_seconds = time.perf_counter() - start_started
 
         # Initialize WebSocket client
-        self.websocket_client = WebSocketClient(
-            api_key=self.api_key,
-            feed=Feed.RealTime,
-            market=None,  # All markets
-            subscriptions=self._get_subscriptions(),
-            on_message=self._handle_websocket_message
-        )
+        if self.websocket_client_type == 'raw':
+            self.websocket_client = RawWebSocketClient(
+                url=self.websocket_url,
+                api_key=self.api_key,
+                subscriptions=self._get_subscriptions(),
+                on_message=self._handle_websocket_message,
+                heartbeat=self.websocket_config.get('ping_interval', 30)
+            )
+        else:
+            from polygon import WebSocketClient
+            from polygon.websocket.models.common import Feed
+
+            self.websocket_client = WebSocketClient(
+                api_key=self.api_key,
+                feed=Feed.RealTime,
+                market=None,  # All markets
+                subscriptions=self._get_subscriptions(),
+                on_message=self._handle_websocket_message
+            )
 
-        # Start WebSocket connection
-        await self._start_websocket()
+        # Start gap-fill workers, then the supervised WebSocket connection
+        if self.gap_fill_enabled:
+            self.gap_filler.start()
+        self._websocket_task = asyncio.create_task(self._start_websocket())
 
-        # Start REST API polling for additional data
-        asyncio.create_task(self._poll_market_data())
-        asyncio.create_task(self._poll_technical_indicators())
+        # Flush partially filled validation batches on a short timer
+        if self.validation_enabled:
+            asyncio.create_task(self._run_validation_flusher())
+
+        # Start REST API polling and indicator passes under the scheduler
+        self._register_jobs()
+        self.scheduler.start()
 
         logger.info("All Polygon data feeds started successfully")
+        self._report_startup_time(time.perf_counter() - start_started, schema_seconds)
+
+    def _report_startup_time(self, start_seconds: float, schema_seconds: float):
+        """Log cold start timings against startup.target_seconds"""
+        self.startup_timings['schema_seconds'] = schema_seconds
+        self.startup_timings['start_seconds'] = start_seconds
+        total = sum(self.startup_timings[k] for k in ('import_seconds', 'construct_seconds', 'start_seconds'))
+        self.startup_timings['total_seconds'] = total
+
+        target = float(self.config.get('startup', {}).get('target_seconds', 2.0))
+        timings = ", ".join(f"{k}={v:.3f}s" for k, v in self.startup_timings.items())
+        if total > target:
+            logger.warning(f"Cold start took {total:.2f}s (target {target:.2f}s): {timings}")
+        else:
+            logger.info(f"Cold start took {total:.2f}s (target {target:.2f}s): {timings}")
 
     def _get_subscriptions(self) -> List[str]:
         """Get WebSocket subscriptions for all asset classes"""
@@ -211,6 +559,10 @@ class PolygonDataFeed:
                 f"XA.{symbol}",     # Crypto aggregates
             ])
 
+        # Option contract trades for flow classification
+        if self.options_flow_enabled:
+            subscriptions.extend(f"T.{contract}" for contract in self.option_contracts)
+
         # Add LULD (Limit Up Limit Down) and market status
         subscriptions.extend([
             "LULD.*",           # All LULD events
@@ -221,42 +573,130 @@ class PolygonDataFeed:
         return subscriptions
 
     async def _start_websocket(self):
-        """Start WebSocket connection with error handling"""
-        try:
-            await self.websocket_client.connect()
-            logger.info("WebSocket connection established")
-        except Exception as e:
-            logger.error(f"WebSocket connection failed: {e}")
-            # Retry logic
-            await asyncio.sleep(5)
-            await self._start_websocket()
+        """Run the WebSocket connection, reconnecting with exponential backoff and jitter"""
+        attempt = 0
+        while True:
+            connected_at = time.monotonic()
+            try:
+                logger.info("Connecting WebSocket")
+                await self.websocket_client.connect()
+                logger.warning("WebSocket connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket connection failed: {e}")
+
+            # Anything received after this point may have a hole behind it
+            self.gap_tracker.mark_disconnected()
+
+            # A connection that stayed up for a while resets the backoff
+            if time.monotonic() - connected_at > self.reconnect_max_delay:
+                attempt = 0
+            attempt += 1
+            if self.reconnect_attempts and attempt > self.reconnect_attempts:
+                logger.error(f"WebSocket reconnect gave up after {self.reconnect_attempts} attempts")
+                raise ConnectionError("WebSocket reconnect attempts exhausted")
+
+            delay = min(self.reconnect_delay * 2 ** (attempt - 1), self.reconnect_max_delay)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            logger.info(f"Reconnecting WebSocket in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    def _check_bar_gap(self, symbol: str, asset_type: str, data: dict):
+        """Queue a REST backfill when minute bars skip an interval"""
+        if not self.gap_fill_enabled or data.get("ev") == "A":  # per-second bars are not tracked
+            return
+        gap = self.gap_tracker.observe_bar(symbol, asset_type, data.get("s", 0))
+        if gap:
+            self.gap_filler.submit(gap)
+
+    def _check_trade_gap(self, symbol: str, asset_type: str, data: dict):
+        """Queue a REST backfill for trades missed across a disconnect"""
+        if not self.gap_fill_enabled:
+            return
+        gap = self.gap_tracker.observe_trade(symbol, asset_type, data.get("t", 0), data.get("q"))
+        if gap:
+            self.gap_filler.submit(gap)
 
-    async def _handle_websocket_message(self, message: WebSocketMessage):
+    async def _handle_websocket_message(self, message: "WebSocketMessage"):
         """Handle incoming WebSocket messages"""
         try:
             data = message.data
             message_type = message.message_type
 
-            if message_type == "T":  # Trade
-                await self._process_trade(data)
-            elif message_type == "Q":  # Quote
-                await self._process_quote(data)
-            elif message_type == "A" or message_type == "AM":  # Aggregate
-                await self._process_aggregate(data)
-            elif message_type == "XT":  # Crypto trade
-                await self._process_crypto_trade(data)
-            elif message_type == "XQ":  # Crypto quote
-                await self._process_crypto_quote(data)
-            elif message_type == "XA":  # Crypto aggregate
-                await self._process_crypto_aggregate(data)
-            elif message_type == "LULD":  # LULD event
-                await self._process_luld(data)
-            elif message_type == "STATUS":  # Market status
-                await self._process_market_status(data)
+            if message_type == "T" and data.get("sym", "").startswith("O:"):
+                # Option prints go straight to the flow detector (price checks do not fit premiums)
+                await self._process_option_trade(data)
+            elif self.validation_enabled:
+                await self._enqueue_validation(message_type, data)
+            else:
+                await self._dispatch_message(message_type, data)
 
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
 
+    async def _dispatch_message(self, message_type: str, data: dict):
+        """Route a message to its processor"""
+        if message_type == "T":  # Trade
+            await self._process_trade(data)
+        elif message_type == "Q":  # Quote
+            await self._process_quote(data)
+        elif message_type == "A" or message_type == "AM":  # Aggregate
+            await self._process_aggregate(data)
+        elif message_type == "XT":  # Crypto trade
+            await self._process_crypto_trade(data)
+        elif message_type == "XQ":  # Crypto quote
+            await self._process_crypto_quote(data)
+        elif message_type == "XA":  # Crypto aggregate
+            await self._process_crypto_aggregate(data)
+        elif message_type == "LULD":  # LULD event
+            await self._process_luld(data)
+        elif message_type == "STATUS":  # Market status
+            await self._process_market_status(data)
+
+    async def _enqueue_validation(self, message_type: str, data: dict):
+        """Add a message to the current validation batch (only trades and bars are checked)"""
+        if message_type not in VALIDATED_MESSAGE_TYPES:
+            if self.validator.add_unchecked((message_type, data)):
+                await self._flush_validation()
+            return
+
+        if message_type in ("XT", "XA"):
+            key = f"crypto_{data.get('pair', '')}"
+        else:
+            key = data.get("sym", "")
+
+        if message_type in ("T", "XT"):
+            price, volume = data.get("p", 0.0), data.get("s", 0)
+        else:
+            price, volume = data.get("c", 0.0), data.get("v", 0)
+
+        if self.validator.add(key, price, volume, (message_type, data), crypto=message_type in ("XT", "XA")):
+            await self._flush_validation()
+
+    async def _flush_validation(self):
+        """Validate the pending batch, quarantine outliers and process the rest in order"""
+        accepted, rejected = self.validator.validate(keep_rejected=self.validation_action == 'flag')
+
+        for tick in rejected:
+            await self._store_quarantined_tick(tick)
+
+        for message_type, data in accepted:
+            try:
+                await self._dispatch_message(message_type, data)
+            except Exception as e:
+                logger.error(f"Error processing WebSocket message: {e}")
+
+    async def _run_validation_flusher(self):
+        """Bound validation latency when the stream is quiet"""
+        while True:
+            await asyncio.sleep(self.validation_flush_interval)
+            try:
+                if len(self.validator):
+                    await self._flush_validation()
+            except Exception as e:
+                logger.error(f"Error flushing validation batch: {e}")
+
     async def _process_trade(self, data: dict):
         """Process stock trade data"""
         symbol = data.get("sym", "")
@@ -264,6 +704,18 @@ class PolygonDataFeed:
         volume = data.get("s", 0)
         timestamp = datetime.fromtimestamp(data.get("t", 0) / 1000)
 
+        self._check_trade_gap(symbol, "stock", data)
+
+        if self.microstructure_enabled:
+            self.microstructure.on_trade(symbol, price, volume, timestamp)
+
+        # Off-exchange classification from the exchange id and conditions already on the print
+        if self.darkpool_enabled:
+            self.darkpool.on_trade(symbol, price, volume, timestamp, data.get("x"), data.get("c"), data.get("trfi"))
+
+        if self.sector_tide_enabled:
+            self.sector_tide.on_trade(symbol, price, volume)
+
         # Update price buffer for technical analysis
         self._update_price_buffer(symbol, price, volume, timestamp)
 
@@ -286,6 +738,32 @@ class PolygonDataFeed:
         # Notify callbacks
         await self._notify_callbacks(market_data)
 
+    async def _process_option_trade(self, data: dict):
+        """Feed an option print to the flow detector and store any clusters it closes"""
+        if not self.options_flow_enabled:
+            return
+        events = self.options_flow.on_trade(
+            data.get("sym", ""),
+            data.get("x", 0),
+            data.get("p", 0.0),
+            data.get("s", 0),
+            data.get("t", 0),
+            data.get("c")
+        )
+        for event in events:
+            await self._on_option_flow(event)
+
+    async def _expire_option_flow(self):
+        """Close option print clusters that have gone quiet"""
+        for event in self.options_flow.expire(int(time.time() * 1000)):
+            await self._on_option_flow(event)
+
+    async def _on_option_flow(self, event: FlowEvent):
+        """Credit the cluster premium to the sector tide and store it"""
+        if self.sector_tide_enabled:
+            self.sector_tide.add_premium(event.details.underlying, event.premium, event.details.option_type)
+        await self._store_option_flow(event)
+
     async def _process_quote(self, data: dict):
         """Process stock quote data"""
         symbol = data.get("sym", "")
@@ -295,6 +773,8 @@ class PolygonDataFeed:
         ask_size = data.get("as", 0)
         timestamp = datetime.fromtimestamp(data.get("t", 0) / 1000)
 
+        self._update_microstructure_quote(symbol, bid, ask, bid_size, ask_size, timestamp)
+
         # Store quote data
         await self._store_quote_data(symbol, bid, ask, bid_size, ask_size, timestamp, "stock")
 
@@ -308,6 +788,11 @@ class PolygonDataFeed:
         volume = data.get("v", 0)
         timestamp = datetime.fromtimestamp(data.get("s", 0) / 1000)  # Start time
 
+        self._check_bar_gap(symbol, "stock", data)
+
+        if self.correlation_enabled:
+            self.correlation.on_bar(symbol, data.get("s", 0), close_price)
+
         # Update OHLCV buffer for technical analysis
         self._update_ohlcv_buffer(symbol, open_price, high_price, low_price, close_price, volume, timestamp)
 
@@ -324,6 +809,11 @@ class PolygonDataFeed:
         volume = data.get("s", 0.0)
         timestamp = datetime.fromtimestamp(data.get("t", 0) / 1000)
 
+        self._check_trade_gap(symbol, "crypto", data)
+
+        if self.microstructure_enabled:
+            self.microstructure.on_trade(f"crypto_{symbol}", price, volume, timestamp)
+
         # Update crypto price buffer
         self._update_price_buffer(f"crypto_{symbol}", price, volume, timestamp)
 
@@ -347,9 +837,13 @@ class PolygonDataFeed:
         symbol = data.get("pair", "")
         bid = data.get("bp", 0.0)
         ask = data.get("ap", 0.0)
+        bid_size = data.get("bs", 0)
+        ask_size = data.get("as", 0)
         timestamp = datetime.fromtimestamp(data.get("t", 0) / 1000)
 
-        await self._store_quote_data(symbol, bid, ask, 0, 0, timestamp, "crypto")
+        self._update_microstructure_quote(f"crypto_{symbol}", bid, ask, bid_size, ask_size, timestamp)
+
+        await self._store_quote_data(symbol, bid, ask, bid_size, ask_size, timestamp, "crypto")
 
     async def _process_crypto_aggregate(self, data: dict):
         """Process crypto aggregate data"""
@@ -361,6 +855,12 @@ class PolygonDataFeed:
         volume = data.get("v", 0.0)
         timestamp = datetime.fromtimestamp(data.get("s", 0) / 1000)
 
+        self._check_bar_gap(symbol, "crypto", data)
+
+        if self.correlation_enabled:
+            self.correlation.on_bar(f"crypto_{symbol}", data.get("s", 0), close_price,
+                                    periods_per_year=CRYPTO_PERIODS_PER_YEAR)
+
         self._update_ohlcv_buffer(f"crypto_{symbol}", open_price, high_price, low_price, close_price, volume, timestamp)
         await self._calculate_ohlcv_indicators(f"crypto_{symbol}")
         await self._store_aggregate_data(symbol, open_price, high_price, low_price, close_price, volume, timestamp, "crypto")
@@ -380,6 +880,7 @@ class PolygonDataFeed:
         status = data.get("status", "")
         timestamp = datetime.fromtimestamp(data.get("t", 0) / 1000)
 
+        self.market_clock.update_from_stream(market, status)
         await self._store_market_status(market, status, timestamp)
 
     def _update_price_buffer(self, symbol: str, price: float, volume: int, timestamp: datetime):
@@ -387,14 +888,20 @@ class PolygonDataFeed:
         if symbol not in self.price_buffers:
             self.price_buffers[symbol] = []
             self.volume_buffers[symbol] = []
+            self.price_timestamps[symbol] = []
+
+        if self.state_enabled:
+            self.state_manager.touch(symbol)
 
         # Keep last 200 data points for technical analysis
         self.price_buffers[symbol].append(price)
         self.volume_buffers[symbol].append(volume)
+        self.price_timestamps[symbol].append(timestamp)
 
         if len(self.price_buffers[symbol]) > 200:
             self.price_buffers[symbol] = self.price_buffers[symbol][-200:]
             self.volume_buffers[symbol] = self.volume_buffers[symbol][-200:]
+            self.price_timestamps[symbol] = self.price_timestamps[symbol][-200:]
 
     def _update_ohlcv_buffer(self, symbol: str, open_p: float, high: float, low: float, close: float, volume: float, timestamp: datetime):
         """Update OHLCV buffer for technical analysis"""
@@ -404,6 +911,9 @@ class PolygonDataFeed:
                 'timestamps': []
             }
 
+        if self.state_enabled:
+            self.state_manager.touch(symbol)
+
         # Store OHLCV data
         ohlcv_data = {
             'open': open_p,
@@ -421,88 +931,117 @@ class PolygonDataFeed:
             self.technical_indicators[symbol]['ohlcv'] = self.technical_indicators[symbol]['ohlcv'][-200:]
             self.technical_indicators[symbol]['timestamps'] = self.technical_indicators[symbol]['timestamps'][-200:]
 
-    async def _calculate_technical_indicators(self, symbol: str):
-        """Calculate TA-Lib technical indicators from price data using configuration"""
-        min_data_points = self.talib_config.get('min_data_points', 50)
+    async def _repair_bars(self, gap: Gap, bars: list):
+        """Merge backfilled minute bars into the OHLCV buffer in time order and store them"""
+        symbol_key = f"crypto_{gap.symbol}" if gap.asset_type == "crypto" else gap.symbol
+        if symbol_key not in self.technical_indicators:
+            self.technical_indicators[symbol_key] = {'ohlcv': [], 'timestamps': []}
+        state = self.technical_indicators[symbol_key]
+
+        known = set(state['timestamps'])
+        backfilled = []
+        for bar in bars:
+            timestamp = datetime.fromtimestamp(sdk_field(bar, 'timestamp', 't', default=0) / 1000)
+            if timestamp in known:
+                continue  # bar already received live
+            known.add(timestamp)
+            ohlcv_data = {
+                'open': sdk_field(bar, 'open', 'o', default=0.0),
+                'high': sdk_field(bar, 'high', 'h', default=0.0),
+                'low': sdk_field(bar, 'low', 'l', default=0.0),
+                'close': sdk_field(bar, 'close', 'c', default=0.0),
+                'volume': sdk_field(bar, 'volume', 'v', default=0)
+            }
+            backfilled.append((timestamp, ohlcv_data))
+
+            await self._store_aggregate_data(
+                gap.symbol, ohlcv_data['open'], ohlcv_data['high'], ohlcv_data['low'],
+                ohlcv_data['close'], ohlcv_data['volume'], timestamp, gap.asset_type
+            )
+
+        # One merge of two sorted runs, keeping only the newest 200 bars
+        merged = list(heapq.merge(
+            zip(state['timestamps'], state['ohlcv']),
+            sorted(backfilled, key=lambda item: item[0]),
+            key=lambda item: item[0]
+        ))[-200:]
+        state['timestamps'] = [timestamp for timestamp, _ in merged]
+        state['ohlcv'] = [ohlcv_data for _, ohlcv_data in merged]
+
+        if bars:
+            await self._calculate_ohlcv_indicators(symbol_key)
+
+    async def _repair_trades(self, gap: Gap, trades: list):
+        """Merge backfilled trades into the price buffer in time order and store them"""
+        symbol_key = f"crypto_{gap.symbol}" if gap.asset_type == "crypto" else gap.symbol
+        if symbol_key not in self.price_buffers:
+            self.price_buffers[symbol_key] = []
+            self.volume_buffers[symbol_key] = []
+            self.price_timestamps[symbol_key] = []
+
+        backfilled = []
+        for trade in trades:
+            timestamp_ns = sdk_field(trade, 'sip_timestamp', 'participant_timestamp', default=0)
+            timestamp = datetime.fromtimestamp(timestamp_ns / 1_000_000_000)
+            price = sdk_field(trade, 'price', 'p', default=0.0)
+            volume = sdk_field(trade, 'size', 's', default=0)
+            backfilled.append((timestamp, price, volume))
+
+            await self._store_trade_data(MarketData(
+                symbol=gap.symbol,
+                timestamp=timestamp,
+                price=price,
+                volume=volume,
+                data_type=f"{gap.asset_type}_trade_backfill",
+                raw_data={}
+            ))
 
-        if symbol not in self.price_buffers or len(self.price_buffers[symbol]) < min_data_points:
+        # One merge of two sorted runs, keeping only the newest 200 trades
+        merged = list(heapq.merge(
+            zip(self.price_timestamps[symbol_key], self.price_buffers[symbol_key], self.volume_buffers[symbol_key]),
+            sorted(backfilled, key=lambda item: item[0]),
+            key=lambda item: item[0]
+        ))[-200:]
+        self.price_timestamps[symbol_key] = [timestamp for timestamp, _, _ in merged]
+        self.price_buffers[symbol_key] = [price for _, price, _ in merged]
+        self.volume_buffers[symbol_key] = [volume for _, _, volume in merged]
+
+        if trades:
+            await self._calculate_technical_indicators(symbol_key)
+
+    def _update_microstructure_quote(self, symbol: str, bid: float, ask: float, bid_size: float, ask_size: float,
+                                     timestamp: Optional[datetime] = None):
+        """Update NBBO features and publish them with the latest indicators"""
+        if not self.microstructure_enabled:
+            return
+        self.microstructure.on_quote(symbol, bid, ask, bid_size, ask_size, timestamp)
+        self.latest_indicators.setdefault(symbol, {}).update(self.microstructure.features(symbol))
+        if self.state_enabled:
+            self.state_manager.touch(symbol)
+
+    async def _calculate_technical_indicators(self, symbol: str):
+        """Calculate indicators from trade prices using the configured registry"""
+        if symbol not in self.price_buffers or len(self.price_buffers[symbol]) < self.min_data_points:
             return
 
         prices = np.array(self.price_buffers[symbol], dtype=np.float64)
         volumes = np.array(self.volume_buffers[symbol], dtype=np.float64)
 
         try:
-            indicators = {}
-
-            # RSI with configurable periods
-            rsi_periods = self.talib_config.get('rsi_periods', [14, 30])
-            for period in rsi_periods:
-                rsi = talib.RSI(prices, timeperiod=period)
-                indicators[f'rsi_{period}'] = rsi[-1] if len(rsi) > 0 and not np.isnan(rsi[-1]) else None
-
-            # MACD with configurable periods
-            macd_config = self.talib_config.get('macd', {})
-            fast_period = macd_config.get('fast_period', 12)
-            slow_period = macd_config.get('slow_period', 26)
-            signal_period = macd_config.get('signal_period', 9)
-
-            macd_line, macd_signal, macd_histogram = talib.MACD(
-                prices, fastperiod=fast_period, slowperiod=slow_period, signalperiod=signal_period
-            )
-            indicators['macd'] = macd_line[-1] if len(macd_line) > 0 and not np.isnan(macd_line[-1]) else None
-            indicators['macd_signal'] = macd_signal[-1] if len(macd_signal) > 0 and not np.isnan(macd_signal[-1]) else None
-            indicators['macd_histogram'] = macd_histogram[-1] if len(macd_histogram) > 0 and not np.isnan(macd_histogram[-1]) else None
-
-            # Moving averages with configurable periods
-            sma_periods = self.talib_config.get('sma_periods', [20, 50, 200])
-            for period in sma_periods:
-                if len(prices) >= period:
-                    sma = talib.SMA(prices, timeperiod=period)
-                    indicators[f'sma_{period}'] = sma[-1] if len(sma) > 0 and not np.isnan(sma[-1]) else None
-
-            ema_periods = self.talib_config.get('ema_periods', [12, 26, 50])
-            for period in ema_periods:
-                if len(prices) >= period:
-                    ema = talib.EMA(prices, timeperiod=period)
-                    indicators[f'ema_{period}'] = ema[-1] if len(ema) > 0 and not np.isnan(ema[-1]) else None
-
-            # Bollinger Bands with configurable settings
-            bb_period = self.talib_config.get('bb_period', 20)
-            bb_std_dev = self.talib_config.get('bb_std_dev', 2)
-            if len(prices) >= bb_period:
-                bb_upper, bb_middle, bb_lower = talib.BBANDS(prices, timeperiod=bb_period, nbdevup=bb_std_dev, nbdevdn=bb_std_dev)
-                indicators['bb_upper'] = bb_upper[-1] if len(bb_upper) > 0 and not np.isnan(bb_upper[-1]) else None
-                indicators['bb_middle'] = bb_middle[-1] if len(bb_middle) > 0 and not np.isnan(bb_middle[-1]) else None
-                indicators['bb_lower'] = bb_lower[-1] if len(bb_lower) > 0 and not np.isnan(bb_lower[-1]) else None
-
-            # Volume indicators (if enabled)
-            if self.talib_config.get('obv_enabled', True) and len(volumes) > 0:
-                obv = talib.OBV(prices, volumes)
-                indicators['obv'] = obv[-1] if len(obv) > 0 and not np.isnan(obv[-1]) else None
-
-            # Additional oscillators with configurable periods
-            williams_r_period = self.talib_config.get('williams_r_period', 14)
-            if len(prices) >= williams_r_period:
-                willr = talib.WILLR(prices, prices, prices, timeperiod=williams_r_period)
-                indicators['williams_r'] = willr[-1] if len(willr) > 0 and not np.isnan(willr[-1]) else None
-
-            cci_period = self.talib_config.get('cci_period', 14)
-            if len(prices) >= cci_period:
-                cci = talib.CCI(prices, prices, prices, timeperiod=cci_period)
-                indicators['cci'] = cci[-1] if len(cci) > 0 and not np.isnan(cci[-1]) else None
-
-            # Volatility indicators
-            atr_period = self.talib_config.get('atr_period', 14)
-            if len(prices) >= atr_period:
-                atr = talib.ATR(prices, prices, prices, timeperiod=atr_period)
-                indicators['atr'] = atr[-1] if len(atr) > 0 and not np.isnan(atr[-1]) else None
+            # Trades carry a single price, so it stands in for open/high/low/close
+            inputs = {'open': prices, 'high': prices, 'low': prices, 'close': prices, 'volume': volumes}
+            indicators = self.indicator_registry.evaluate(inputs, ohlc=False)
 
             # Add current price and volume
             indicators['current_price'] = prices[-1]
             indicators['current_volume'] = volumes[-1] if len(volumes) > 0 else 0
 
-            # Store indicators in instance for later retrieval
-            self.technical_indicators[symbol] = indicators
+            # Spread, imbalance, trade side, VWAP and realized volatility
+            if self.microstructure_enabled:
+                indicators.update(self.microstructure.features(symbol))
+
+            # Keep latest values for later retrieval
+            self.latest_indicators.setdefault(symbol, {}).update(indicators)
 
             # Store in QuestDB
             await self._store_technical_indicators(symbol, indicators, datetime.now())
@@ -511,91 +1050,24 @@ class PolygonDataFeed:
             logger.error(f"Error calculating technical indicators for {symbol}: {e}")
 
     async def _calculate_ohlcv_indicators(self, symbol: str):
-        """Calculate TA-Lib indicators from OHLCV data"""
+        """Calculate indicators from OHLCV bars using the configured registry"""
         if symbol not in self.technical_indicators or len(self.technical_indicators[symbol]['ohlcv']) < 20:
             return
 
         ohlcv_data = self.technical_indicators[symbol]['ohlcv']
 
         # Convert to numpy arrays
-        opens = np.array([d['open'] for d in ohlcv_data], dtype=np.float64)
-        highs = np.array([d['high'] for d in ohlcv_data], dtype=np.float64)
-        lows = np.array([d['low'] for d in ohlcv_data], dtype=np.float64)
-        closes = np.array([d['close'] for d in ohlcv_data], dtype=np.float64)
-        volumes = np.array([d['volume'] for d in ohlcv_data], dtype=np.float64)
+        inputs = {
+            column: np.array([d[column] for d in ohlcv_data], dtype=np.float64)
+            for column in ('open', 'high', 'low', 'close', 'volume')
+        }
 
         try:
-            # More accurate indicators with OHLC data
-            rsi = talib.RSI(closes, timeperiod=14)
-            macd_line, macd_signal, macd_histogram = talib.MACD(closes)
-
-            # Bollinger Bands
-            bb_upper, bb_middle, bb_lower = talib.BBANDS(closes)
-
-            # Stochastic
-            stoch_k, stoch_d = talib.STOCH(highs, lows, closes)
-
-            # Average True Range
-            atr = talib.ATR(highs, lows, closes, timeperiod=14)
-
-            # Williams %R
-            willr = talib.WILLR(highs, lows, closes, timeperiod=14)
-
-            # CCI
-            cci = talib.CCI(highs, lows, closes, timeperiod=14)
-
-            # Volume indicators
-            ad_line = talib.AD(highs, lows, closes, volumes)
-            obv = talib.OBV(closes, volumes)
-
-            # Momentum indicators
-            mom = talib.MOM(closes, timeperiod=10)
-            roc = talib.ROC(closes, timeperiod=10)
-
-            # Overlap studies
-            sma_20 = talib.SMA(closes, timeperiod=20)
-            sma_50 = talib.SMA(closes, timeperiod=50)
-            sma_200 = talib.SMA(closes, timeperiod=200)
-            ema_12 = talib.EMA(closes, timeperiod=12)
-            ema_26 = talib.EMA(closes, timeperiod=26)
-
-            # Pattern recognition (select few important ones)
-            hammer = talib.CDLHAMMER(opens, highs, lows, closes)
-            doji = talib.CDLDOJI(opens, highs, lows, closes)
-            engulfing = talib.CDLENGULFING(opens, highs, lows, closes)
-
-            # Store comprehensive indicators
-            indicators = {
-                'rsi_14': rsi[-1] if len(rsi) > 0 and not np.isnan(rsi[-1]) else None,
-                'macd_line': macd_line[-1] if len(macd_line) > 0 and not np.isnan(macd_line[-1]) else None,
-                'macd_signal': macd_signal[-1] if len(macd_signal) > 0 and not np.isnan(macd_signal[-1]) else None,
-                'macd_histogram': macd_histogram[-1] if len(macd_histogram) > 0 and not np.isnan(macd_histogram[-1]) else None,
-                'bb_upper': bb_upper[-1] if len(bb_upper) > 0 and not np.isnan(bb_upper[-1]) else None,
-                'bb_middle': bb_middle[-1] if len(bb_middle) > 0 and not np.isnan(bb_middle[-1]) else None,
-                'bb_lower': bb_lower[-1] if len(bb_lower) > 0 and not np.isnan(bb_lower[-1]) else None,
-                'stoch_k': stoch_k[-1] if len(stoch_k) > 0 and not np.isnan(stoch_k[-1]) else None,
-                'stoch_d': stoch_d[-1] if len(stoch_d) > 0 and not np.isnan(stoch_d[-1]) else None,
-                'atr': atr[-1] if len(atr) > 0 and not np.isnan(atr[-1]) else None,
-                'willr': willr[-1] if len(willr) > 0 and not np.isnan(willr[-1]) else None,
-                'cci': cci[-1] if len(cci) > 0 and not np.isnan(cci[-1]) else None,
-                'ad_line': ad_line[-1] if len(ad_line) > 0 and not np.isnan(ad_line[-1]) else None,
-                'obv': obv[-1] if len(obv) > 0 and not np.isnan(obv[-1]) else None,
-                'momentum': mom[-1] if len(mom) > 0 and not np.isnan(mom[-1]) else None,
-                'roc': roc[-1] if len(roc) > 0 and not np.isnan(roc[-1]) else None,
-                'sma_20': sma_20[-1] if len(sma_20) > 0 and not np.isnan(sma_20[-1]) else None,
-                'sma_50': sma_50[-1] if len(sma_50) > 0 and not np.isnan(sma_50[-1]) else None,
-                'sma_200': sma_200[-1] if len(sma_200) > 0 and not np.isnan(sma_200[-1]) else None,
-                'ema_12': ema_12[-1] if len(ema_12) > 0 and not np.isnan(ema_12[-1]) else None,
-                'ema_26': ema_26[-1] if len(ema_26) > 0 and not np.isnan(ema_26[-1]) else None,
-                'hammer_pattern': hammer[-1] if len(hammer) > 0 else 0,
-                'doji_pattern': doji[-1] if len(doji) > 0 else 0,
-                'engulfing_pattern': engulfing[-1] if len(engulfing) > 0 else 0,
-                'open': opens[-1],
-                'high': highs[-1],
-                'low': lows[-1],
-                'close': closes[-1],
-                'volume': volumes[-1]
-            }
+            indicators = self.indicator_registry.evaluate(inputs, ohlc=True)
+            for column, values in inputs.items():
+                indicators[column] = values[-1]
+
+            self.latest_indicators.setdefault(symbol, {}).update(indicators)
 
             # Store in QuestDB
             await self._store_technical_indicators(symbol, indicators, datetime.now())
@@ -603,172 +1075,317 @@ class PolygonDataFeed:
         except Exception as e:
             logger.error(f"Error calculating OHLCV indicators for {symbol}: {e}")
 
-    async def _poll_market_data(self):
-        """Poll additional market data via REST API"""
-        while True:
-            try:
-                # Get market snapshots
-                await self._get_market_snapshots()
-
-                # Get options data
-                await self._get_options_data()
-
-                # Get market status
-                await self._get_market_status()
-
-                # Wait before next poll
-                await asyncio.sleep(60)  # Poll every minute
-
-            except Exception as e:
-                logger.error(f"Error in market data polling: {e}")
-                await asyncio.sleep(30)
-
-    async def _get_market_snapshots(self):
-        """Get market snapshots via REST API"""
+    def _register_jobs(self):
+        """Register every periodic job with the scheduler"""
+        jobs = self.scheduler_config.get('jobs', {})
+        jitter = self.scheduler_config.get('jitter', 0.1)
+
+        def interval(name: str, default: float) -> float:
+            return jobs.get(name, {}).get('interval', default)
+
+        # Market status first so the clock is known before market-tagged jobs run
+        if self.rest_enabled:
+            # One full-market stocks snapshot feeds both stock_snapshots and sector_tide_source
+            self.scheduler.add_endpoint('snapshot_stocks', self._fetch_stock_snapshots,
+                                        max_age=self.scheduler_config.get('snapshot_max_age', 25))
+            self.scheduler.add_job('market_status', self._get_market_status, interval('market_status', 60),
+                                   jitter=jitter)
+            self.scheduler.add_job('stock_snapshots', self._store_stock_snapshots,
+                                   interval('stock_snapshots', 60), jitter=jitter, market='stocks',
+                                   endpoint='snapshot_stocks', delay=1.0)
+            self.scheduler.add_job('crypto_snapshots', self._get_crypto_snapshots,
+                                   interval('crypto_snapshots', 60), jitter=jitter, market='crypto', delay=1.0)
+            if self.options_chain_enabled or (self.options_flow_enabled and self.options_flow_underlyings):
+                self.scheduler.add_job('options_chain', self._refresh_options_chains, interval('options_chain', 60),
+                                       jitter=jitter, market='options', delay=1.0)
+        if self.options_flow_enabled:
+            self.scheduler.add_job('options_flow_expire', self._expire_option_flow,
+                                   self.options_flow_expire_interval, jitter=0, market='options')
+        if self.darkpool_enabled:
+            self.scheduler.add_job('darkpool_summaries', self._store_darkpool_summaries,
+                                   self.darkpool_summary_interval, jitter=jitter, market='stocks')
+        if self.sector_tide_enabled:
+            # Without REST the tide runs on streamed trades alone (no previous close until one is known)
+            if self.rest_enabled:
+                self.scheduler.add_job('sector_tide_source', self._load_sector_tide_source,
+                                       self.sector_tide_source_interval, jitter=jitter, market='stocks',
+                                       endpoint='snapshot_stocks', delay=1.0)
+            self.scheduler.add_job('sector_tide_averages', self._load_sector_tide_averages,
+                                   self.sector_tide_averages_interval, jitter=jitter, market='stocks', delay=1.0)
+            self.scheduler.add_job('sector_tide', self._store_sector_tide, self.sector_tide_interval,
+                                   jitter=0, market='stocks', delay=2.0)
+        if self.correlation_enabled:
+            self.scheduler.add_job('correlation', self._store_correlation_metrics, self.correlation_interval,
+                                   jitter=0, delay=5.0)
+        if self.cold_storage_enabled:
+            self.scheduler.add_job('cold_storage_export', self._export_cold_storage, self.cold_storage_interval,
+                                   jitter=jitter, delay=60.0)
+        if self.state_enabled:
+            self.scheduler.add_job('state_budget', self._enforce_state_budget, self.state_check_interval,
+                                   jitter=jitter)
+        self.scheduler.add_job('stock_indicators', lambda: self._recalculate_indicators(crypto=False),
+                               interval('stock_indicators', 30), jitter=jitter, market='stocks')
+        self.scheduler.add_job('crypto_indicators', lambda: self._recalculate_indicators(crypto=True),
+                               interval('crypto_indicators', 30), jitter=jitter, market='crypto')
+
+    async def _rest_call(self, function: Callable, *args, **kwargs):
+        """Blocking REST SDK call on a worker thread, under the API key's shared rate limit"""
+        await self.rest_rate_limiter.acquire()
+        return await asyncio.to_thread(function, *args, **kwargs)
+
+    async def _fetch_stock_snapshots(self) -> list:
+        """Full-market stocks snapshot for the streamed symbols and sector tide constituents (one request)"""
+        tickers = list(self.stock_symbols)
+        if self.sector_tide_enabled:
+            tickers = list(dict.fromkeys(tickers + list(self.sector_tide.index.symbols)))
+        return list(await self._rest_call(self.rest_client.get_snapshot_all, "stocks", tickers) or [])
+
+    async def _store_stock_snapshots(self, snapshots: list):
+        """Store the last trade of every streamed stock from the shared snapshot"""
+        symbols = set(self.stock_symbols)
+        for snapshot in snapshots:
+            ticker = sdk_field(snapshot, 'ticker', default='')
+            if ticker in symbols:
+                await self._process_snapshot(snapshot, ticker, "stock")
+
+    async def _get_crypto_snapshots(self):
+        """Store the last trade of every streamed crypto pair (one snapshot request)"""
         try:
-            # Get stock snapshots
-            for symbol in self.stock_symbols:
-                snapshot = self.rest_client.get_snapshot_ticker("stocks", symbol)
-                if snapshot:
-                    await self._process_snapshot(snapshot, "stock")
-
-            # Get crypto snapshots
-            for symbol in self.crypto_symbols:
-                snapshot = self.rest_client.get_snapshot_ticker("crypto", symbol)
-                if snapshot:
-                    await self._process_snapshot(snapshot, "crypto")
-
+            symbols = {rest_ticker(symbol, 'crypto'): symbol for symbol in self.crypto_symbols}
+            snapshots = await self._rest_call(self.rest_client.get_snapshot_all, "crypto", list(symbols))
+            for snapshot in snapshots or []:
+                symbol = symbols.get(sdk_field(snapshot, 'ticker', default=''))
+                if symbol:
+                    await self._process_snapshot(snapshot, symbol, "crypto")
         except Exception as e:
-            logger.error(f"Error getting market snapshots: {e}")
-
-    async def _process_snapshot(self, snapshot: dict, asset_type: str):
-        """Process snapshot data"""
-        ticker = snapshot.get("ticker", "")
-        last_trade = snapshot.get("lastTrade", {})
-        last_quote = snapshot.get("lastQuote", {})
+            logger.error(f"Error getting crypto snapshots: {e}")
 
-        if last_trade:
-            price = last_trade.get("p", 0.0)
-            volume = last_trade.get("s", 0)
-            timestamp = datetime.fromtimestamp(last_trade.get("t", 0) / 1000)
+    async def _process_snapshot(self, snapshot: Any, symbol: str, asset_type: str):
+        """Store a snapshot's last trade under the stream symbol (SDK model or raw dict)"""
+        last_trade = sdk_field(snapshot, 'last_trade', 'lastTrade')
+        if not last_trade:
+            return
+        price = sdk_field(last_trade, 'price', 'p')
+        if not price:
+            return
+        # Stock snapshots stamp trades in nanoseconds, crypto snapshots in milliseconds
+        stamp = sdk_field(last_trade, 'sip_timestamp', 't', default=0) or 0
+        timestamp = datetime.fromtimestamp(stamp / 1e9 if stamp > 1e14 else stamp / 1000) if stamp else datetime.now()
 
-            market_data = MarketData(
-                symbol=ticker,
-                timestamp=timestamp,
-                price=price,
-                volume=volume,
-                data_type=f"{asset_type}_snapshot",
-                raw_data=snapshot
-            )
+        market_data = MarketData(
+            symbol=symbol,
+            timestamp=timestamp,
+            price=price,
+            volume=sdk_field(last_trade, 'size', 's', default=0),
+            data_type=f"{asset_type}_snapshot",
+            raw_data=snapshot if isinstance(snapshot, dict) else {}
+        )
 
-            await self._store_trade_data(market_data)
+        await self._store_trade_data(market_data)
 
-    async def _get_options_data(self):
-        """Get options data via REST API"""
+    async def _refresh_options_chains(self):
+        """Snapshot every configured chain, cache open interest and store contracts that changed"""
+        underlyings = list(self.options_chain_underlyings) if self.options_chain_enabled else []
+        if self.options_flow_enabled:
+            underlyings = list(dict.fromkeys(underlyings + self.options_flow_underlyings))
         try:
-            # Get options contracts for major stocks
-            for symbol in ["SPY", "QQQ", "AAPL", "TSLA", "NVDA"]:
-                # Get options contracts expiring within 30 days
-                contracts = self.rest_client.list_options_contracts(
-                    underlying_ticker=symbol,
-                    expiration_date_lte=(datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-                )
-
-                if contracts:
-                    for contract in contracts.results[:10]:  # Limit to 10 most active
-                        await self._process_options_contract(contract)
-
+            changed = await self.options_chain.refresh(underlyings)
         except Exception as e:
-            logger.error(f"Error getting options data: {e}")
+            logger.error(f"Error refreshing options chains: {e}")
+            return
 
-    async def _process_options_contract(self, contract: dict):
-        """Process options contract data"""
-        ticker = contract.get("ticker", "")
-        underlying_ticker = contract.get("underlying_ticker", "")
-        contract_type = contract.get("contract_type", "")
-        strike_price = contract.get("strike_price", 0.0)
-        expiration_date = contract.get("expiration_date", "")
+        # Open interest for every contract in the index keeps the flow detector's volume/OI current
+        if self.options_flow_enabled:
+            for row in self.options_chain.index.rows.values():
+                if row.open_interest is not None:
+                    self.options_flow.set_open_interest(row.ticker, row.open_interest)
 
-        await self._store_options_contract(ticker, underlying_ticker, contract_type, strike_price, expiration_date)
+        if not self.options_chain_enabled:
+            return  # open interest source for the flow detector only
+        timestamp = datetime.now()
+        for row in changed:
+            await self._store_chain_row(row, timestamp)
 
     async def _get_market_status(self):
         """Get market status via REST API"""
         try:
-            status = self.rest_client.get_market_status()
+            status = await self._rest_call(self.rest_client.get_market_status)
             if status:
-                await self._store_market_status("stocks", status.get("market", ""), datetime.now())
+                self.market_clock.update_from_rest(status)
+                await self._store_market_status("stocks", sdk_field(status, "market", default=""), datetime.now())
         except Exception as e:
             logger.error(f"Error getting market status: {e}")
 
-    async def _poll_technical_indicators(self):
-        """Periodically calculate and store technical indicators"""
-        while True:
-            try:
-                # Calculate indicators for all symbols with sufficient data
-                for symbol in list(self.price_buffers.keys()):
-                    if len(self.price_buffers[symbol]) >= 20:
-                        await self._calculate_technical_indicators(symbol)
-
-                for symbol in list(self.technical_indicators.keys()):
-                    if len(self.technical_indicators[symbol]['ohlcv']) >= 20:
-                        await self._calculate_ohlcv_indicators(symbol)
+    async def _recalculate_indicators(self, crypto: bool):
+        """Recalculate indicators for stock or crypto symbols with sufficient data"""
+        for symbol in list(self.price_buffers.keys()):
+            if symbol.startswith("crypto_") == crypto and len(self.price_buffers[symbol]) >= 20:
+                await self._calculate_technical_indicators(symbol)
+
+        for symbol in list(self.technical_indicators.keys()):
+            if symbol.startswith("crypto_") == crypto and len(self.technical_indicators[symbol]['ohlcv']) >= 20:
+                await self._calculate_ohlcv_indicators(symbol)
+
+    async def _export_cold_storage(self):
+        """Export completed day partitions not yet in cold storage"""
+        await asyncio.to_thread(self.cold_storage.export_completed)
+
+    async def _enforce_state_budget(self):
+        """Evict least recently updated symbol state while over the memory budget"""
+        self.state_manager.enforce()
+
+    async def _load_symbol_state(self, symbol: str) -> Dict[str, Any]:
+        """Rebuild an evicted symbol's trade and bar buffers from QuestDB"""
+        crypto = symbol.startswith("crypto_")
+        ticker = symbol[len("crypto_"):] if crypto else symbol
+        start = datetime.now() - self.state_rehydrate_window
+        state: Dict[str, Any] = {}
+
+        # Each store loads on its own so one failing table does not discard the other
+        table_name = self.tables.get('polygon_crypto' if crypto else 'polygon_stocks',
+                                     'polygon_crypto' if crypto else 'polygon_stocks')
+        asset_type = 'crypto' if crypto else 'stock'
+        try:
+            # Only trade rows: snapshots in the same table carry day totals, not trade sizes
+            trades = await self.query_client.window(
+                table_name, [ticker], ['price', 'volume'], start=start,
+                filters={'data_type': [f"{asset_type}_trade", f"{asset_type}_trade_backfill"]}
+            )
+            if len(trades):
+                trades = trades.tail(200)
+                state['prices'] = [float(p) for p in trades['price']]
+                state['volumes'] = [float(v) for v in trades['volume']]
+                # Rows were written as naive datetimes, so drop the UTC zone the export adds
+                state['timestamps'] = list(trades['timestamp'].dt.tz_convert(None).dt.to_pydatetime())
+        except Exception as e:
+            logger.error(f"Error loading trade history for {symbol}: {e}")
 
-                # Wait before next calculation
-                await asyncio.sleep(30)  # Calculate every 30 seconds
+        try:
+            bars = await self.query_client.window('aggregate_data', [ticker],
+                                                  ['open', 'high', 'low', 'close', 'volume'], start=start)
+            if len(bars):
+                bars = bars.tail(200)
+                state['bars'] = {
+                    'ohlcv': bars[['open', 'high', 'low', 'close', 'volume']].to_dict('records'),
+                    'timestamps': list(bars['timestamp'].dt.tz_convert(None).dt.to_pydatetime()),
+                }
+        except Exception as e:
+            logger.error(f"Error loading bar history for {symbol}: {e}")
 
-            except Exception as e:
-                logger.error(f"Error in technical indicators polling: {e}")
-                await asyncio.sleep(30)
+        return state
 
     # QuestDB storage methods
+    def _connect_questdb(self):
+        """Open a QuestDB PG-wire connection (blocking, used from worker threads)"""
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
+        return psycopg2.connect(
+            host=self.questdb_host,
+            port=self.questdb_port,
+            user=self.questdb_user,
+            password=self.questdb_password,
+            database=self.questdb_database,
+            connect_timeout=self.questdb_connect_timeout,
+            cursor_factory=RealDictCursor
+        )
+
     async def get_questdb_connection(self):
         """Get QuestDB connection"""
         try:
-            conn = psycopg2.connect(
-                host=self.questdb_host,
-                port=self.questdb_port,
-                user=self.questdb_user,
-                password=self.questdb_password,
-                database=self.questdb_database,
-                cursor_factory=RealDictCursor
-            )
-            return conn
+            return await asyncio.to_thread(self._connect_questdb)
         except Exception as e:
             logger.error(f"QuestDB connection failed: {e}")
             raise
 
     async def initialize_database_schema(self):
-        """Initialize QuestDB tables using the schema.sql file"""
+        """Initialize QuestDB tables using the schema.sql file, skipped when already applied"""
+        schema_sql = load_schema() + self._indicator_columns_sql()
+        fingerprint = hashlib.sha256(schema_sql.encode("utf-8")).hexdigest()
+
         try:
             conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
-            # Split and execute each statement from schema.sql
-            statements = [stmt.strip() for stmt in SCHEMA_SQL.split(';') if stmt.strip()]
-
-            for statement in statements:
-                if statement:
-                    try:
-                        cursor.execute(statement)
-                        conn.commit()
-                        logger.debug(f"Executed schema statement: {statement[:50]}...")
-                    except Exception as e:
-                        logger.warning(f"Schema statement failed (may already exist): {e}")
-
-            cursor.close()
+            self.schema_initialized = await asyncio.to_thread(self._apply_schema, conn, schema_sql, fingerprint)
             conn.close()
-            logger.info("Database schema initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize database schema: {e}")
             raise
 
+    def _indicator_columns_sql(self) -> str:
+        """One technical_indicators column per configured indicator (the set follows the talib config)"""
+        return "".join(
+            f"\nALTER TABLE technical_indicators ADD COLUMN IF NOT EXISTS {name} DOUBLE;"
+            for name in self.indicator_registry.outputs
+        )
+
+    def _apply_schema(self, conn, schema_sql: str, fingerprint: str) -> bool:
+        """Apply schema.sql unless its fingerprint matches the last applied one (blocking); False if a statement failed"""
+        # DDL runs in autocommit mode so one failed statement does not abort the rest
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT fingerprint FROM schema_fingerprints WHERE component = %s "
+                "LATEST ON timestamp PARTITION BY component",
+                (SCHEMA_COMPONENT,)
+            )
+            row = cursor.fetchone()
+            if row and row['fingerprint'] == fingerprint:
+                logger.info("Database schema unchanged, skipping initialization")
+                cursor.close()
+                return True
+        except Exception as e:
+            logger.debug(f"No applied schema fingerprint found: {e}")
+
+        # Split and execute each statement from schema.sql
+        statements = [stmt.strip() for stmt in schema_sql.split(';') if stmt.strip()]
+
+        failed = 0
+        for statement in statements:
+            if statement:
+                try:
+                    cursor.execute(statement)
+                    logger.debug(f"Executed schema statement: {statement[:50]}...")
+                except Exception as e:
+                    if 'already exists' in str(e).lower():
+                        logger.debug(f"Schema object already exists: {statement[:50]}...")
+                        continue
+                    failed += 1
+                    logger.error(f"Schema statement failed: {statement[:50]}...: {e}")
+
+        if failed:
+            # Leave the fingerprint unrecorded so the next start applies the schema again
+            cursor.close()
+            logger.error(f"Database schema initialization incomplete, {failed} statements failed")
+            return False
+
+        cursor.execute(
+            "INSERT INTO schema_fingerprints (timestamp, component, fingerprint) VALUES (now(), %s, %s)",
+            (SCHEMA_COMPONENT, fingerprint)
+        )
+        cursor.close()
+        logger.info("Database schema initialized successfully")
+        return True
+
+    async def _on_writer_recover(self):
+        """Apply the schema before replaying spooled rows if startup could not reach QuestDB"""
+        if not self.schema_initialized:
+            await self.initialize_database_schema()
+
+    async def _store_trade_data(self, market_data: MarketData):
+        """Route trade and snapshot rows to the table for their asset class"""
+        if market_data.data_type.startswith('crypto'):
+            await self._store_crypto_data(market_data)
+        elif market_data.data_type.startswith('option'):
+            await self._store_options_data(market_data)
+        else:
+            await self._store_stock_data(market_data)
+
     async def _store_stock_data(self, market_data: MarketData):
         """Store stock data in QuestDB using configured table name"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             table_name = self.tables.get('polygon_stocks', 'polygon_stocks')
 
             query = f"""
@@ -776,7 +1393,7 @@ class PolygonDataFeed:
             VALUES (%s, %s, %s, %s, %s, %s)
             """
 
-            cursor.execute(query, (
+            self.writer.write(query, (
                 market_data.symbol,
                 market_data.timestamp,
                 market_data.price,
@@ -785,19 +1402,12 @@ class PolygonDataFeed:
                 'polygon_live_feed'
             ))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
-
         except Exception as e:
             logger.error(f"Error storing stock data: {e}")
 
     async def _store_crypto_data(self, market_data: MarketData):
         """Store crypto data in QuestDB using configured table name"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             table_name = self.tables.get('polygon_crypto', 'polygon_crypto')
 
             query = f"""
@@ -805,7 +1415,7 @@ class PolygonDataFeed:
             VALUES (%s, %s, %s, %s, %s, %s)
             """
 
-            cursor.execute(query, (
+            self.writer.write(query, (
                 market_data.symbol,
                 market_data.timestamp,
                 market_data.price,
@@ -814,19 +1424,12 @@ class PolygonDataFeed:
                 'polygon_live_feed'
             ))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
-
         except Exception as e:
             logger.error(f"Error storing crypto data: {e}")
 
     async def _store_options_data(self, market_data: MarketData):
         """Store options data in QuestDB using configured table name"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             table_name = self.tables.get('polygon_options', 'polygon_options')
 
             # Extract option details from symbol or raw_data
@@ -839,7 +1442,7 @@ class PolygonDataFeed:
 
             underlying_symbol = raw_data.get('underlying_ticker', market_data.symbol)
 
-            cursor.execute(query, (
+            self.writer.write(query, (
                 underlying_symbol,
                 market_data.symbol,
                 market_data.timestamp,
@@ -848,29 +1451,18 @@ class PolygonDataFeed:
                 'polygon_live_feed'
             ))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
-
         except Exception as e:
             logger.error(f"Error storing options data: {e}")
 
     async def _store_quote_data(self, symbol: str, bid: float, ask: float, bid_size: int, ask_size: int, timestamp: datetime, asset_type: str):
         """Store quote data in QuestDB"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             query = """
             INSERT INTO quote_data (symbol, timestamp, bid, ask, bid_size, ask_size, asset_type)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
 
-            cursor.execute(query, (symbol, timestamp, bid, ask, bid_size, ask_size, asset_type))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.writer.write(query, (symbol, timestamp, bid, ask, bid_size, ask_size, asset_type))
 
         except Exception as e:
             logger.error(f"Error storing quote data: {e}")
@@ -878,19 +1470,12 @@ class PolygonDataFeed:
     async def _store_aggregate_data(self, symbol: str, open_p: float, high: float, low: float, close: float, volume: float, timestamp: datetime, asset_type: str):
         """Store aggregate OHLCV data in QuestDB"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             query = """
             INSERT INTO aggregate_data (symbol, timestamp, open, high, low, close, volume, asset_type)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
 
-            cursor.execute(query, (symbol, timestamp, open_p, high, low, close, volume, asset_type))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.writer.write(query, (symbol, timestamp, open_p, high, low, close, volume, asset_type))
 
         except Exception as e:
             logger.error(f"Error storing aggregate data: {e}")
@@ -898,9 +1483,6 @@ class PolygonDataFeed:
     async def _store_technical_indicators(self, symbol: str, indicators: dict, timestamp: datetime):
         """Store technical indicators in QuestDB"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             # Convert None values to NULL for database storage
             indicator_values = []
             indicator_columns = []
@@ -917,11 +1499,7 @@ class PolygonDataFeed:
             VALUES ({placeholders})
             """
 
-            cursor.execute(query, [symbol, timestamp] + indicator_values)
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.writer.write(query, [symbol, timestamp] + indicator_values)
 
         except Exception as e:
             logger.error(f"Error storing technical indicators: {e}")
@@ -929,19 +1507,12 @@ class PolygonDataFeed:
     async def _store_luld_data(self, symbol: str, limit_up: float, limit_down: float, timestamp: datetime):
         """Store LULD data in QuestDB"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             query = """
             INSERT INTO luld_data (symbol, timestamp, limit_up_price, limit_down_price)
             VALUES (%s, %s, %s, %s)
             """
 
-            cursor.execute(query, (symbol, timestamp, limit_up, limit_down))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.writer.write(query, (symbol, timestamp, limit_up, limit_down))
 
         except Exception as e:
             logger.error(f"Error storing LULD data: {e}")
@@ -949,42 +1520,255 @@ class PolygonDataFeed:
     async def _store_market_status(self, market: str, status: str, timestamp: datetime):
         """Store market status in QuestDB"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
-
             query = """
             INSERT INTO market_status (market, status, timestamp)
             VALUES (%s, %s, %s)
             """
 
-            cursor.execute(query, (market, status, timestamp))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.writer.write(query, (market, status, timestamp))
 
         except Exception as e:
             logger.error(f"Error storing market status: {e}")
 
-    async def _store_options_contract(self, ticker: str, underlying: str, contract_type: str, strike: float, expiration: str):
-        """Store options contract data in QuestDB"""
+    async def _store_option_flow(self, event: FlowEvent):
+        """Store a classified print cluster with its flow fields in polygon_options"""
         try:
-            conn = await self.get_questdb_connection()
-            cursor = conn.cursor()
+            table_name = self.tables.get('polygon_options', 'polygon_options')
+            query = f"""
+            INSERT INTO {table_name} (
+                timestamp, underlying_symbol, option_symbol, strike_price, expiration_date, option_type,
+                price, volume, open_interest, volume_oi_ratio, unusual_activity, flow_type, feed_source
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
 
+            self.writer.write(query, (
+                datetime.fromtimestamp(event.timestamp_ms / 1000),
+                event.details.underlying,
+                event.contract,
+                event.details.strike,
+                event.details.expiration,
+                event.details.option_type,
+                event.price,
+                event.size,
+                event.open_interest,
+                event.volume_oi_ratio,
+                event.unusual,
+                event.flow_type,
+                'polygon_live_feed'
+            ))
+
+        except Exception as e:
+            logger.error(f"Error storing option flow: {e}")
+
+    async def _store_darkpool_summaries(self):
+        """Store one summary row per symbol with dark prints since the last summary"""
+        timestamp = datetime.now()
+        for summary in self.darkpool.drain_summaries():
+            await self._store_darkpool_summary(summary, timestamp)
+
+    async def _store_darkpool_summary(self, summary: DarkPoolSummary, timestamp: datetime):
+        """Store a dark pool summary in QuestDB"""
+        try:
             query = """
-            INSERT INTO options_contracts (ticker, underlying_ticker, contract_type, strike_price, expiration_date, timestamp)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO darkpool_summaries (
+                timestamp, symbol, session_date, total_volume, dark_volume, dark_share, dark_notional,
+                dark_vwap, dark_prints, block_prints, block_volume, block_notional,
+                interval_dark_volume, top_levels, feed_source
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
 
-            cursor.execute(query, (ticker, underlying, contract_type, strike, expiration, datetime.now()))
+            self.writer.write(query, (
+                timestamp,
+                summary.symbol,
+                summary.session,
+                summary.total_volume,
+                summary.dark_volume,
+                summary.dark_share,
+                summary.dark_notional,
+                summary.dark_vwap,
+                summary.dark_prints,
+                summary.block_prints,
+                summary.block_volume,
+                summary.block_notional,
+                summary.interval_dark_volume,
+                summary.top_levels_text,
+                'polygon_live_feed'
+            ))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+        except Exception as e:
+            logger.error(f"Error storing darkpool summary: {e}")
+
+    async def _load_sector_tide_source(self, snapshots: list):
+        """Bulk-refresh constituent prices, previous closes and day volume from the shared stocks snapshot"""
+        try:
+            self.sector_tide.start_session(datetime.now().date())
+
+            tickers, prices, prev_closes, volumes = [], [], [], []
+            for snapshot in snapshots:
+                day = sdk_field(snapshot, 'day')
+                last_trade = sdk_field(snapshot, 'last_trade', 'lastTrade')
+                prev_day = sdk_field(snapshot, 'prev_day', 'prevDay')
+                price = sdk_field(last_trade, 'price', 'p') if last_trade else None
+                if not price and day:
+                    price = sdk_field(day, 'close', 'c')
+                tickers.append(sdk_field(snapshot, 'ticker', default=''))
+                prices.append(price or np.nan)
+                prev_closes.append((sdk_field(prev_day, 'close', 'c') if prev_day else None) or np.nan)
+                volumes.append((sdk_field(day, 'volume', 'v') if day else None) or 0)
+            self.sector_tide.load_snapshot(tickers, prices, prev_closes, volumes)
 
         except Exception as e:
-            logger.error(f"Error storing options contract: {e}")
+            logger.error(f"Error loading sector tide source: {e}")
+
+    async def _load_sector_tide_averages(self):
+        """Load constituent moving averages: this feed's own indicators first, technical_indicators for the rest"""
+        try:
+            columns = [f'sma_{period}' for period in self.sector_tide.ma_periods]
+            local = [symbol for symbol in self.sector_tide.index.symbols
+                     if all(self.latest_indicators.get(symbol, {}).get(column) is not None for column in columns)]
+            if local:
+                self.sector_tide.load_averages(local, {
+                    period: np.asarray([self.latest_indicators[symbol][f'sma_{period}'] for symbol in local],
+                                       dtype=np.float64)
+                    for period in self.sector_tide.ma_periods
+                })
+
+            known = set(local)
+            remote = [symbol for symbol in self.sector_tide.index.symbols if symbol not in known]
+            if remote:
+                table_name = self.tables.get('technical_indicators', 'technical_indicators')
+                arrays = await self.query_client.latest(table_name, remote, columns, as_arrays=True)
+                self.sector_tide.load_averages(list(arrays['symbol']), {
+                    period: np.asarray(arrays[f'sma_{period}'], dtype=np.float64)
+                    for period in self.sector_tide.ma_periods
+                })
+        except Exception as e:
+            logger.error(f"Error loading sector tide averages: {e}")
+
+    async def _store_sector_tide(self):
+        """Compute breadth for every sector in one pass and store a row per sector"""
+        timestamp = datetime.now()
+        self.sector_tide.start_session(timestamp.date())
+        for tide in self.sector_tide.tides():
+            try:
+                query = """
+                INSERT INTO sector_tide (
+                    timestamp, sector, members, reporting, advancers, decliners, unchanged,
+                    advance_decline_ratio, up_volume, down_volume, up_down_volume_ratio, net_premium,
+                    pct_above_ma_20, pct_above_ma_50, pct_above_ma_200, feed_source
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+
+                self.writer.write(query, (
+                    timestamp,
+                    tide.sector,
+                    tide.members,
+                    tide.reporting,
+                    tide.advancers,
+                    tide.decliners,
+                    tide.unchanged,
+                    tide.advance_decline_ratio,
+                    tide.up_volume,
+                    tide.down_volume,
+                    tide.up_down_volume_ratio,
+                    tide.net_premium,
+                    tide.pct_above.get(20),
+                    tide.pct_above.get(50),
+                    tide.pct_above.get(200),
+                    'polygon_live_feed'
+                ))
+
+            except Exception as e:
+                logger.error(f"Error storing sector tide: {e}")
+
+    async def _store_correlation_metrics(self):
+        """Close a quiet bar bucket and store beta and realized volatility for symbols with new bars"""
+        self.correlation.flush(int(time.time() * 1000))
+        if self.correlation.row_end_ms is None:
+            return
+        timestamp = datetime.fromtimestamp(self.correlation.row_end_ms / 1000)
+        for symbol, values in self.correlation.drain_metrics().items():
+            try:
+                crypto = symbol.startswith("crypto_")
+
+                query = """
+                INSERT INTO risk_metrics (symbol, timestamp, asset_class, close, beta, volatility, feed_source)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+
+                self.writer.write(query, (
+                    symbol[len("crypto_"):] if crypto else symbol,
+                    timestamp,
+                    'crypto' if crypto else 'stock',
+                    values['close'],
+                    values['beta'],
+                    values['volatility'],
+                    'polygon_live_feed'
+                ))
+
+            except Exception as e:
+                logger.error(f"Error storing correlation metrics: {e}")
+
+    async def _store_chain_row(self, row: ChainRow, timestamp: datetime):
+        """Store one options chain snapshot contract in QuestDB"""
+        try:
+            table_name = self.tables.get('polygon_options', 'polygon_options')
+
+            query = f"""
+            INSERT INTO {table_name} (
+                timestamp, underlying_symbol, option_symbol, strike_price, expiration_date, option_type,
+                price, bid, ask, spread, volume, open_interest, delta, gamma, theta, vega,
+                implied_volatility, intrinsic_value, time_value, feed_source
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+
+            self.writer.write(query, (
+                timestamp,
+                row.underlying,
+                row.ticker,
+                row.strike,
+                row.expiration,
+                row.option_type,
+                row.price,
+                row.bid,
+                row.ask,
+                row.spread,
+                row.volume,
+                row.open_interest,
+                row.delta,
+                row.gamma,
+                row.theta,
+                row.vega,
+                row.implied_volatility,
+                row.intrinsic_value,
+                row.time_value,
+                'polygon_chain_snapshot'
+            ))
+
+        except Exception as e:
+            logger.error(f"Error storing options chain row: {e}")
+
+    async def _store_quarantined_tick(self, tick: RejectedTick):
+        """Store a trade or bar that failed validation in the quarantine table"""
+        try:
+            message_type, data = tick.item
+            asset_type = "crypto" if message_type in ("XT", "XA") else "stock"
+            timestamp_ms = data.get("t", 0) if message_type in ("T", "XT") else data.get("s", 0)
+            symbol = data.get("pair", "") if asset_type == "crypto" else data.get("sym", "")
+
+            query = """
+            INSERT INTO quarantined_ticks (timestamp, symbol, asset_type, message_type, price, volume, reference_price, reason, feed_source)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+
+            reference_price = None if np.isnan(tick.reference_price) else tick.reference_price
+            self.writer.write(query, (
+                datetime.fromtimestamp(timestamp_ms / 1000), symbol, asset_type, message_type,
+                tick.price, tick.volume, reference_price, tick.reason, 'polygon_live_feed'
+            ))
+
+        except Exception as e:
+            logger.error(f"Error storing quarantined tick: {e}")
 
     # Callback system for real-time processing
     def add_callback(self, callback: Callable[[MarketData], None]):
@@ -1004,13 +1788,74 @@ class PolygonDataFeed:
 
     async def stop(self):
         """Stop all data feeds"""
+        if self._websocket_task:
+            self._websocket_task.cancel()
         if self.websocket_client:
             await self.websocket_client.disconnect()
+        await self.scheduler.stop()
+        for event in self.options_flow.expire(2 ** 62):
+            await self._on_option_flow(event)
+        await self._store_darkpool_summaries()
+        await self.gap_filler.stop()
+        await self.writer.stop()
         logger.info("Polygon Data Feed stopped")
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get feed metrics (writer, spool and query cache)"""
+        metrics = {}
+        metrics.update(self.writer.get_metrics())
+        metrics.update(self.gap_filler.get_metrics())
+        metrics.update(self.validator.get_metrics())
+        metrics['gaps_detected'] = self.gap_tracker.gaps_detected
+        metrics['microstructure_quotes_ahead'] = self.microstructure.quotes_ahead
+        metrics.update(self.query_client.get_metrics())
+        metrics.update(self.scheduler.get_metrics())
+        metrics.update(self.options_flow.get_metrics())
+        metrics.update(self.options_chain.get_metrics())
+        metrics.update(self.darkpool.get_metrics())
+        metrics.update(self.sector_tide.get_metrics())
+        metrics.update(self.correlation.get_metrics())
+        metrics.update(self.state_manager.get_metrics())
+        metrics.update(self.cold_storage.get_metrics())
+        if isinstance(self.websocket_client, RawWebSocketClient):
+            metrics.update(self.websocket_client.get_metrics())
+        return metrics
+
+    def get_indicator_costs(self) -> Dict[str, Dict[str, float]]:
+        """Get per-indicator computation cost (calls, total and average time)"""
+        return self.indicator_registry.get_costs()
+
     # Utility methods for agentic AI system
+    def get_sector_tide(self) -> List[SectorTide]:
+        """Get current breadth for every sector ETF"""
+        return self.sector_tide.tides()
+
+    def get_risk_metrics(self, symbol: str) -> Dict[str, Optional[float]]:
+        """Get rolling beta to the benchmark and annualized realized volatility (crypto as crypto_<pair>)"""
+        return self.correlation.get(symbol)
+
+    def get_correlation_matrix(self, symbols: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """Get the rolling return correlation matrix (default: every symbol with enough bars)"""
+        return self.correlation.correlation(symbols)
+
+    def get_options_chain(self, underlying: str, expiration: Optional[str] = None,
+                          option_type: Optional[str] = None) -> List[ChainRow]:
+        """Get the cached chain of one underlying (expiration as YYYY-MM-DD, option_type 'call'/'put')"""
+        expiry = datetime.strptime(expiration, "%Y-%m-%d").date() if expiration else None
+        return self.options_chain.index.chain(underlying, expiry, option_type)
+
+    def get_darkpool_summary(self, symbol: str) -> Optional[DarkPoolSummary]:
+        """Get the current session's dark pool aggregates for a symbol"""
+        return self.darkpool.summarize(symbol)
+
+    def get_microstructure_features(self, symbol: str) -> Dict[str, Optional[float]]:
+        """Get current microstructure features (crypto symbols use the crypto_ prefix)"""
+        return self.microstructure.features(symbol)
+
     async def get_latest_price(self, symbol: str) -> Optional[float]:
         """Get latest price for symbol"""
+        if self.state_enabled:
+            await self.state_manager.ensure(symbol)
         if symbol in self.price_buffers and self.price_buffers[symbol]:
             return self.price_buffers[symbol][-1]
         return None
@@ -1043,10 +1888,40 @@ class PolygonDataFeed:
             logger.error(f"Error getting technical indicator: {e}")
             return None
 
+    async def get_indicator_frame(self, symbols: List[str], indicators: List[str],
+                                  start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                  sample_by: Optional[str] = None, table: str = 'technical_indicators',
+                                  as_arrays: bool = False):
+        """Get indicator windows for many symbols in one query (pandas frame or NumPy arrays)"""
+        try:
+            return await self.query_client.window(
+                table, symbols, indicators, start=start, end=end,
+                sample_by=sample_by, as_arrays=as_arrays
+            )
+        except Exception as e:
+            logger.error(f"Error getting indicator frame: {e}")
+            return None
+
+    async def get_latest_indicators(self, symbols: List[str], indicators: List[str],
+                                    table: str = 'technical_indicators', as_arrays: bool = False):
+        """Get the latest indicator values for many symbols in one query"""
+        try:
+            return await self.query_client.latest(table, symbols, indicators, as_arrays=as_arrays)
+        except Exception as e:
+            logger.error(f"Error getting latest indicators: {e}")
+            return None
+
+# Import cost of the package, this module and its eager dependencies
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
 # Main execution
 async def main():
     """Main function to run the comprehensive Polygon data feed"""
-    feed = PolygonDataFeed()
+    load_environment()
+    config = load_config()
+    configure_logging(config)
+
+    feed = PolygonDataFeed(config)
 
     # Add example callback
     async def example_callback(data: MarketData):
@@ -1066,4 +1941,4 @@ async def main():
         await feed.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
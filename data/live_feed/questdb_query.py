@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Bulk Columnar Query API for QuestDB History
+Serves windows across many symbols and indicators in a single server-side query
+Designed for agents that need frames instead of one scalar per round trip
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Optional, Sequence, Union
+
+# pandas is imported on first query to keep feed startup cheap
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column and table names are interpolated into SQL, so only plain identifiers are accepted
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# SAMPLE BY strides accepted by QuestDB (e.g. 30s, 1m, 15m, 1h, 1d)
+SAMPLE_BY_PATTERN = re.compile(r"^\d+[smhdMy]$")
+
+AGGREGATIONS = {"first", "last", "min", "max", "avg", "sum", "count"}
+
+
+def _validate_identifier(name: str) -> str:
+    """Reject anything that is not a bare SQL identifier"""
+    if not isinstance(name, str) or not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid column or table name: {name!r}")
+    return name
+
+
+def _quote_literal(value: str) -> str:
+    """Quote a string literal for QuestDB SQL"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def to_feed_time(value: datetime) -> datetime:
+    """
+    Convert a datetime to the feed's storage convention
+
+    The feed writes local naive datetimes (datetime.now() / fromtimestamp) and QuestDB stores
+    that wall clock verbatim, so aware values are converted to local time and made naive.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _format_timestamp(value: Union[datetime, str]) -> str:
+    """Format a timestamp bound as a QuestDB literal in the feed's storage convention"""
+    if isinstance(value, datetime):
+        value = to_feed_time(value).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    return _quote_literal(value)
+
+
+class QuestDBQueryClient:
+    """
+    Bulk read client for QuestDB history
+
+    Features:
+    - Symbol lists, column lists, value filters (e.g. data_type) and time ranges in one query
+    - LATEST ON / SAMPLE BY pushed down to QuestDB
+    - iter_chunks()/iter_window() stream large results in chunks, uncached
+    - latest()/window() buffer the full result behind a cache keyed on query text and time bucket;
+      callers get a copy, so mutating a result never touches the cache
+    - Time bounds follow the feed's storage convention (local naive, see to_feed_time); returned
+      timestamps carry QuestDB's UTC label over that stored wall clock
+    """
+
+    def __init__(self, host: str, http_port: int, cache_ttl: float = 30.0,
+                 cache_bucket_seconds: int = 60, chunk_rows: int = 100000,
+                 max_cache_entries: int = 256, timeout: float = 30.0):
+        self.host = host
+        self.http_port = int(http_port)
+        self.cache_ttl = float(cache_ttl)
+        self.cache_bucket_seconds = max(int(cache_bucket_seconds), 1)
+        self.chunk_rows = int(chunk_rows)
+        self.max_cache_entries = int(max_cache_entries)
+        self.timeout = float(timeout)
+
+        # Queries run in worker threads, so the cache is guarded by a lock
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def export_url(self) -> str:
+        return f"http://{self.host}:{self.http_port}/exp"
+
+    # SQL builders
+    def build_latest_query(self, table: str, symbols: Sequence[str], columns: Sequence[str],
+                           symbol_column: str = "symbol") -> str:
+        """Latest row per symbol using LATEST ON"""
+        table = _validate_identifier(table)
+        symbol_column = _validate_identifier(symbol_column)
+        select_columns = ", ".join(_validate_identifier(c) for c in columns)
+
+        query = f"SELECT timestamp, {symbol_column}, {select_columns} FROM {table}"
+        if symbols:
+            query += f" WHERE {symbol_column} IN ({', '.join(_quote_literal(s) for s in symbols)})"
+        query += f" LATEST ON timestamp PARTITION BY {symbol_column}"
+        return query
+
+    def build_window_query(self, table: str, symbols: Sequence[str], columns: Sequence[str],
+                           start: Optional[Union[datetime, str]] = None,
+                           end: Optional[Union[datetime, str]] = None,
+                           sample_by: Optional[str] = None, aggregation: str = "last",
+                           symbol_column: str = "symbol",
+                           filters: Optional[Mapping[str, Sequence[str]]] = None) -> str:
+        """Time window across symbols, optionally downsampled with SAMPLE BY (filters: column -> allowed values)"""
+        table = _validate_identifier(table)
+        symbol_column = _validate_identifier(symbol_column)
+        columns = [_validate_identifier(c) for c in columns]
+
+        if sample_by:
+            if not SAMPLE_BY_PATTERN.match(sample_by):
+                raise ValueError(f"Invalid SAMPLE BY stride: {sample_by!r}")
+            if aggregation not in AGGREGATIONS:
+                raise ValueError(f"Unsupported aggregation: {aggregation!r}")
+            select_columns = ", ".join(f"{aggregation}({c}) {c}" for c in columns)
+        else:
+            select_columns = ", ".join(columns)
+
+        conditions = []
+        if symbols:
+            conditions.append(f"{symbol_column} IN ({', '.join(_quote_literal(s) for s in symbols)})")
+        if start is not None:
+            conditions.append(f"timestamp >= {_format_timestamp(start)}")
+        if end is not None:
+            conditions.append(f"timestamp < {_format_timestamp(end)}")
+        for column, values in (filters or {}).items():
+            conditions.append(f"{_validate_identifier(column)} IN ({', '.join(_quote_literal(v) for v in values)})")
+
+        query = f"SELECT timestamp, {symbol_column}, {select_columns} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if sample_by:
+            query += f" SAMPLE BY {sample_by} ALIGN TO CALENDAR"
+        else:
+            query += " ORDER BY timestamp"
+        return query
+
+    # Execution
+    def iter_chunks(self, query: str) -> Iterator["pd.DataFrame"]:
+        """Stream a query result from the HTTP export endpoint as DataFrame chunks"""
+        import pandas as pd
+
+        url = f"{self.export_url}?{urllib.parse.urlencode({'query': query})}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            for chunk in pd.read_csv(response, chunksize=self.chunk_rows):
+                if "timestamp" in chunk.columns:
+                    chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], utc=True)
+                yield chunk
+
+    def fetch_frame(self, query: str, cache_bucket: Optional[int] = None) -> "pd.DataFrame":
+        """Run a query and return the full (buffered) result as a DataFrame copy, using the result cache"""
+        key = (query, cache_bucket)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                stored_at, frame = cached
+                if time.monotonic() - stored_at <= self.cache_ttl:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return frame.copy()
+                del self._cache[key]
+            self.cache_misses += 1
+
+        import pandas as pd
+
+        chunks = list(self.iter_chunks(query))
+        frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), frame)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return frame.copy()
+
+    def _cache_bucket(self, end: Optional[Union[datetime, str]]) -> Optional[int]:
+        """Open-ended windows are cached per time bucket, closed historical windows are not bucketed"""
+        if end is None:
+            return int(time.time() // self.cache_bucket_seconds)
+        return None
+
+    def clear_cache(self):
+        """Drop all cached results"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    # Public API
+    async def latest(self, table: str, symbols: Sequence[str], columns: Sequence[str],
+                     symbol_column: str = "symbol", as_arrays: bool = False):
+        """Latest values of columns for each symbol"""
+        query = self.build_latest_query(table, symbols, columns, symbol_column)
+        frame = await asyncio.to_thread(self.fetch_frame, query, self._cache_bucket(None))
+        return self.to_arrays(frame) if as_arrays else frame
+
+    async def window(self, table: str, symbols: Sequence[str], columns: Sequence[str],
+                     start: Optional[Union[datetime, str]] = None,
+                     end: Optional[Union[datetime, str]] = None,
+                     sample_by: Optional[str] = None, aggregation: str = "last",
+                     symbol_column: str = "symbol", as_arrays: bool = False,
+                     filters: Optional[Mapping[str, Sequence[str]]] = None):
+        """Columns for symbols over [start, end), optionally downsampled server-side"""
+        query = self.build_window_query(table, symbols, columns, start, end, sample_by,
+                                        aggregation, symbol_column, filters)
+        frame = await asyncio.to_thread(self.fetch_frame, query, self._cache_bucket(end))
+        return self.to_arrays(frame) if as_arrays else frame
+
+    def iter_window(self, table: str, symbols: Sequence[str], columns: Sequence[str],
+                    start: Optional[Union[datetime, str]] = None,
+                    end: Optional[Union[datetime, str]] = None,
+                    symbol_column: str = "symbol",
+                    filters: Optional[Mapping[str, Sequence[str]]] = None) -> Iterator["pd.DataFrame"]:
+        """Stream a time window chunk by chunk without buffering or caching it (blocking)"""
+        query = self.build_window_query(table, symbols, columns, start, end, symbol_column=symbol_column,
+                                        filters=filters)
+        return self.iter_chunks(query)
+
+    @staticmethod
+    def to_arrays(frame: "pd.DataFrame") -> Dict[str, "np.ndarray"]:
+        """Convert a result frame to a dict of NumPy column arrays"""
+        return {column: frame[column].to_numpy() for column in frame.columns}
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {
+            'cache_entries': len(self._cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
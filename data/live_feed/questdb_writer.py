@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Batched QuestDB Writer with Durable Spool Fallback
+Takes rows off the WebSocket path, writes them in batches from a worker thread
+Spools to disk while QuestDB is slow or down and replays in order on recovery
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .spool import WriteAheadSpool, _encode_value
+
+logger = logging.getLogger(__name__)
+
+# Rows rejected for a permanent error: (statement, parameter rows, error text)
+Rejected = Tuple[str, List[Sequence[Any]], str]
+
+# Consecutive identical row errors after which the statement itself is assumed to be bad
+STATEMENT_ERROR_PROBE = 10
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Connection-level failures a later retry can fix; anything else is a bad statement or row"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import psycopg2
+    except ImportError:
+        return False
+    return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+
+def is_statement_error(error: Exception) -> bool:
+    """Errors that fail every row of a statement (missing table/column, bad SQL)"""
+    try:
+        import psycopg2
+    except ImportError:
+        return False
+    return isinstance(error, psycopg2.ProgrammingError)
+
+
+class DeadLetterLog:
+    """JSON-lines file of rows QuestDB rejected permanently, rotated once at max_bytes"""
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rejected: List[Rejected]):
+        try:
+            if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                os.replace(self.path, self.path.with_suffix(self.path.suffix + '.1'))
+            with open(self.path, 'a') as f:
+                now = datetime.now().isoformat()
+                for query, rows, error in rejected:
+                    for params in rows:
+                        f.write(json.dumps({'at': now, 'q': query, 'p': list(params), 'error': error},
+                                           default=_encode_value, separators=(',', ':')) + '\n')
+        except Exception as e:
+            logger.error(f"Error writing dead-letter rows to {self.path}: {e}")
+
+
+class QuestDBWriter:
+    """
+    Non-blocking batched writer for QuestDB
+
+    Features:
+    - write() only buffers, it never touches the network
+    - Batches grouped by statement and sent with executemany + one commit
+    - Only connection-level errors (OperationalError, InterfaceError, connect failures) mark QuestDB
+      unhealthy; rows then go to the write-ahead spool and are replayed in append order on recovery
+    - Permanent errors are isolated per statement, then per row: good rows still commit and
+      rejected rows go to the dead-letter log, so one bad statement cannot stall every write
+    - Delivery is at-least-once: a batch interrupted by a connection error is retried whole
+    """
+
+    def __init__(self, connect: Callable[[], Any], spool: WriteAheadSpool,
+                 batch_size: int = 100, flush_interval: float = 1.0,
+                 max_pending: int = 10000, replay_batch_size: int = 1000,
+                 retry_interval: float = 5.0,
+                 on_recover: Optional[Callable[[], Awaitable[None]]] = None,
+                 dead_letter: Optional[DeadLetterLog] = None):
+        self.connect = connect
+        self.spool = spool
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.max_pending = int(max_pending)
+        self.replay_batch_size = int(replay_batch_size)
+        self.retry_interval = float(retry_interval)
+        self.on_recover = on_recover
+        self.dead_letter = dead_letter or DeadLetterLog(spool.directory / 'dead_letters.jsonl')
+
+        # statement -> list of parameter tuples, in arrival order per statement
+        self.pending: "OrderedDict[str, List[Sequence[Any]]]" = OrderedDict()
+        self.pending_rows = 0
+        self.healthy = True
+        self._last_failure = 0.0
+        self._connection = None
+        self._flush_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_failures = 0
+        self.spooled_rows = 0
+        self.rejected_rows = 0
+
+    # Producer side
+    def write(self, query: str, params: Sequence[Any]):
+        """Queue one row; falls back to the spool to keep ordering behind any backlog"""
+        if not self.healthy or not self.spool.is_empty():
+            self._spool_rows(query, [params])
+            return
+
+        self.pending.setdefault(query, []).append(params)
+        self.pending_rows += 1
+
+        if self.pending_rows >= self.max_pending:
+            # QuestDB is falling behind, move the backlog to disk instead of growing memory
+            logger.warning(f"Writer backlog reached {self.pending_rows} rows, spilling to spool")
+            self._spool_pending()
+        elif self.pending_rows >= self.batch_size and self._flush_event is not None:
+            self._flush_event.set()
+
+    def _spool_rows(self, query: str, rows: List[Sequence[Any]]):
+        for params in rows:
+            self.spool.append({'q': query, 'p': list(params)})
+        self.spooled_rows += len(rows)
+
+    def _spool_pending(self):
+        pending, self.pending = self.pending, OrderedDict()
+        self.pending_rows = 0
+        for query, rows in pending.items():
+            self._spool_rows(query, rows)
+
+    # Database side (runs in a worker thread)
+    def _get_connection(self):
+        if self._connection is None or getattr(self._connection, 'closed', False):
+            try:
+                self._connection = self.connect()
+            except Exception as e:
+                raise ConnectionError(f"QuestDB connect failed: {e}") from e
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _execute_batch(self, batch: Dict[str, List[Sequence[Any]]]) -> List[Rejected]:
+        """Write a batch in one transaction; on a permanent error fall back to isolating it.
+        Returns rejected rows; transient errors raise."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            try:
+                for query, rows in batch.items():
+                    cursor.executemany(query, rows)
+                conn.commit()
+                return []
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                conn.rollback()
+
+            rejected: List[Rejected] = []
+            for query, rows in batch.items():
+                rejected.extend(self._execute_group(conn, cursor, query, rows))
+            cursor.close()
+            return rejected
+        except Exception:
+            self._close_connection()
+            raise
+
+    def _execute_group(self, conn, cursor, query: str, rows: List[Sequence[Any]]) -> List[Rejected]:
+        """Write one statement's rows on their own, then row by row if the group is rejected"""
+        try:
+            cursor.executemany(query, rows)
+            conn.commit()
+            return []
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            conn.rollback()
+            if is_statement_error(e) or len(rows) == 1:
+                return [(query, rows, str(e))]
+
+        rejected: List[Sequence[Any]] = []
+        errors: List[str] = []
+        for index, params in enumerate(rows):
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                conn.rollback()
+                rejected.append(params)
+                errors.append(str(e))
+                if index + 1 == STATEMENT_ERROR_PROBE and len(rejected) == index + 1 and len(set(errors)) == 1:
+                    # Every row so far failed the same way: the statement is bad, not the rows
+                    rejected.extend(rows[index + 1:])
+                    break
+        return [(query, rejected, errors[0])] if rejected else []
+
+    def _reject(self, rejected: List[Rejected]):
+        """Send permanently rejected rows to the dead-letter log"""
+        for query, rows, error in rejected:
+            logger.error(f"QuestDB rejected {len(rows)} rows ({error.strip()}): {' '.join(query.split())[:120]}")
+        self.rejected_rows += sum(len(rows) for _, rows, _ in rejected)
+        self.dead_letter.write(rejected)
+
+    # Background loop
+    async def start(self):
+        """Start the background flush/replay task"""
+        if self._task is not None:
+            return
+        self._running = True
+        self._flush_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+
+            try:
+                await self.flush()
+                await self.replay()
+                await asyncio.to_thread(self.spool.flush)
+            except Exception as e:
+                logger.error(f"Error in QuestDB writer loop: {e}")
+
+    async def flush(self):
+        """Write everything currently buffered"""
+        if not self.pending:
+            return
+        if not self.healthy or not self.spool.is_empty():
+            # Rows buffered before a failure must queue behind the spooled backlog
+            self._spool_pending()
+            return
+
+        batch, self.pending = self.pending, OrderedDict()
+        row_count, self.pending_rows = self.pending_rows, 0
+
+        try:
+            rejected = await asyncio.to_thread(self._execute_batch, batch)
+        except Exception as e:
+            if not is_transient_error(e):
+                logger.error(f"Unexpected QuestDB write error, spooling batch: {e}")
+            self.mark_unhealthy(e)
+            for query, rows in batch.items():
+                self._spool_rows(query, rows)
+            # Rows that arrived during the failed write follow the failed batch
+            self._spool_pending()
+            return
+
+        if rejected:
+            self._reject(rejected)
+        self.rows_written += row_count - sum(len(rows) for _, rows, _ in rejected)
+        self.batches_written += 1
+
+    async def replay(self):
+        """Drain the spool in order while QuestDB accepts writes"""
+        if self.spool.is_empty():
+            return
+        if not self.healthy and time.monotonic() - self._last_failure < self.retry_interval:
+            return
+
+        if not self.healthy and self.on_recover is not None:
+            try:
+                await self.on_recover()
+            except Exception as e:
+                self.mark_unhealthy(e)
+                return
+
+        while True:
+            records, position = await asyncio.to_thread(self.spool.read_batch, self.replay_batch_size)
+            if not records:
+                break
+
+            batch: "OrderedDict[str, List[Sequence[Any]]]" = OrderedDict()
+            for record in records:
+                batch.setdefault(record['q'], []).append(record['p'])
+
+            try:
+                rejected = await asyncio.to_thread(self._execute_batch, batch)
+            except Exception as e:
+                self.mark_unhealthy(e)
+                return
+
+            # Permanently rejected rows are dead-lettered so the spool head never blocks replay
+            if rejected:
+                self._reject(rejected)
+            await asyncio.to_thread(self.spool.commit, position, len(records))
+            self.rows_written += len(records) - sum(len(rows) for _, rows, _ in rejected)
+            self.batches_written += 1
+
+            if not self.healthy:
+                logger.info("QuestDB writes recovered, replaying spool")
+                self.healthy = True
+
+            # Yield to the event loop between replay batches
+            await asyncio.sleep(0)
+
+        if self.healthy and self.spool.is_empty():
+            logger.info("Spool replay complete")
+
+    def mark_unhealthy(self, error: Exception):
+        """Route writes to the spool until QuestDB accepts a replay batch again"""
+        self.write_failures += 1
+        self._last_failure = time.monotonic()
+        if self.healthy:
+            logger.error(f"QuestDB write failed, spooling to disk: {error}")
+        self.healthy = False
+
+    async def stop(self):
+        """Flush buffered rows (to QuestDB or the spool) and stop the background task"""
+        self._running = False
+        if self._task is not None:
+            self._flush_event.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self.pending:
+            self._spool_pending()
+        await asyncio.to_thread(self._close_connection)
+        await asyncio.to_thread(self.spool.close)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {
+            'writer_healthy': self.healthy,
+            'writer_pending_rows': self.pending_rows,
+            'writer_rows_written': self.rows_written,
+            'writer_batches_written': self.batches_written,
+            'writer_failures': self.write_failures,
+            'writer_spooled_rows': self.spooled_rows,
+            'writer_rejected_rows': self.rejected_rows,
+        }
+        metrics.update(self.spool.get_metrics())
+        return metrics
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Async Token-Bucket Rate Limiter
+Shared by every REST caller so concurrent requests stay within Polygon plan limits
+"""
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiter for asyncio tasks
+
+    Features:
+    - Rate expressed as requests per minute (matches polygon.rate_limits)
+    - Burst capacity for short spikes
+    - Fair FIFO wakeup of waiting tasks
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        self.rate = max(float(requests_per_minute), 0.001) / 60.0  # tokens per second
+        self.capacity = max(int(burst), 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Market-Hours-Aware Job Scheduler
+One heap-ordered timer owns every periodic REST poll and indicator pass
+Stock and options jobs pause while their market is closed; crypto keeps running
+Jobs that read the same REST endpoint share one fetch and its result
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .gap_filler import sdk_field
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATES = {'open', 'extended-hours', 'early-hours', 'after-hours', 'early_close'}
+EXTENDED_STATES = {'extended-hours', 'early-hours', 'after-hours'}
+
+# Calendar fallback (US/Eastern minutes since midnight) when no fresh status is known
+PRE_MARKET_OPEN = 4 * 60
+REGULAR_OPEN = 9 * 60 + 30
+REGULAR_CLOSE = 16 * 60
+AFTER_HOURS_CLOSE = 20 * 60
+
+
+class MarketClock:
+    """
+    Open/closed state per market ('stocks', 'options', 'crypto')
+
+    Fed by the STATUS stream and the REST market status endpoint. Without a fresh
+    status it falls back to the regular US session calendar (holidays excluded only
+    once a status update says so).
+    """
+
+    def __init__(self, extended_hours: bool = True, stale_after: float = 900.0):
+        self.extended_hours = extended_hours
+        self.stale_after = float(stale_after)
+        self.states: Dict[str, Tuple[bool, float]] = {}  # market -> (open, monotonic time)
+        self._eastern = None
+
+    def update(self, market: str, is_open: bool):
+        market = market.lower()
+        previous = self.states.get(market)
+        self.states[market] = (is_open, time.monotonic())
+        if previous is None or previous[0] != is_open:
+            logger.info(f"Market {market} is now {'open' if is_open else 'closed'}")
+
+    def update_from_stream(self, market: str, status: str):
+        """Apply a STATUS stream message"""
+        status = (status or '').lower()
+        if not market or not status:
+            return
+        is_open = status in OPEN_STATES and (self.extended_hours or status not in EXTENDED_STATES)
+        market = market.lower()
+        self.update(market, is_open)
+        if market == 'stocks':
+            self.update('options', status in ('open', 'early_close'))
+
+    def update_from_rest(self, status: Any):
+        """Apply a /v1/marketstatus/now response (SDK model or dict)"""
+        market = (sdk_field(status, 'market', default='') or '').lower()
+        if market:
+            early = sdk_field(status, 'early_hours', 'earlyHours', default=False)
+            after = sdk_field(status, 'after_hours', 'afterHours', default=False)
+            extended = market in EXTENDED_STATES or bool(early) or bool(after)
+            self.update('stocks', market == 'open' or (self.extended_hours and extended))
+            self.update('options', market == 'open')
+
+        currencies = sdk_field(status, 'currencies')
+        crypto = sdk_field(currencies, 'crypto') if currencies is not None else None
+        if crypto:
+            self.update('crypto', str(crypto).lower() == 'open')
+
+    def _calendar_open(self, market: str) -> bool:
+        if self._eastern is None:
+            from zoneinfo import ZoneInfo
+
+            self._eastern = ZoneInfo("America/New_York")
+        now = datetime.now(self._eastern)
+        if now.weekday() >= 5:
+            return False
+        minutes = now.hour * 60 + now.minute
+        if market == 'stocks' and self.extended_hours:
+            return PRE_MARKET_OPEN <= minutes < AFTER_HOURS_CLOSE
+        return REGULAR_OPEN <= minutes < REGULAR_CLOSE
+
+    def is_open(self, market: str) -> bool:
+        state = self.states.get(market)
+        if state is not None and time.monotonic() - state[1] <= self.stale_after:
+            return state[0]
+        if market == 'crypto':
+            return True
+        return self._calendar_open(market)
+
+
+@dataclass
+class Endpoint:
+    """One REST fetch shared by every job that declares its key"""
+    key: str
+    fetch: Callable[[], Awaitable[Any]]
+    max_age: float = 0.0  # a result this recent is handed to the next consumer without refetching
+    task: Optional[asyncio.Task] = None
+    result: Any = None
+    fetched_at: Optional[float] = None
+
+    fetches: int = 0
+    shared: int = 0
+
+
+@dataclass
+class Job:
+    """Periodic job owned by the scheduler"""
+    name: str
+    callback: Callable[..., Awaitable[None]]  # receives the endpoint result when endpoint is set
+    interval: float
+    jitter: float = 0.1  # +/- fraction of the interval
+    market: Optional[str] = None  # paused while this market is closed; None = always
+    endpoint: Optional[str] = None  # key of a shared fetch registered with add_endpoint()
+    task: Optional[asyncio.Task] = None
+
+    runs: int = 0
+    failures: int = 0
+    skipped_closed: int = 0
+    coalesced: int = 0
+    overruns: int = 0
+    last_duration: float = 0.0
+
+
+class Scheduler:
+    """
+    Single heap-based scheduler for periodic work
+
+    Features:
+    - One timer task instead of a sleep loop per poller
+    - Jittered intervals so jobs do not fire in lockstep
+    - Market-tagged jobs skipped while the MarketClock says closed
+    - Jobs sharing an endpoint are coalesced: a fetch in flight is awaited and a result
+      younger than max_age is reused, so consumers of one endpoint cost one request
+    - A job never overlaps itself; slow runs count as overruns
+    """
+
+    def __init__(self, clock: MarketClock):
+        self.clock = clock
+        self.jobs: Dict[str, Job] = {}
+        self.endpoints: Dict[str, Endpoint] = {}
+        self.heap: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_endpoint(self, key: str, fetch: Callable[[], Awaitable[Any]], max_age: float = 0.0):
+        """Register a shared fetch; jobs added with endpoint=key receive its result"""
+        self.endpoints[key] = Endpoint(key=key, fetch=fetch, max_age=float(max_age))
+
+    def add_job(self, name: str, callback: Callable[..., Awaitable[None]], interval: float,
+                jitter: float = 0.1, market: Optional[str] = None, endpoint: Optional[str] = None,
+                delay: float = 0.0):
+        """Register a periodic job; the first run is after `delay` seconds"""
+        if endpoint is not None and endpoint not in self.endpoints:
+            raise ValueError(f"Unknown endpoint for job {name}: {endpoint}")
+        self.jobs[name] = Job(name=name, callback=callback, interval=float(interval),
+                              jitter=float(jitter), market=market, endpoint=endpoint)
+        self._push(name, time.monotonic() + delay)
+
+    def _push(self, name: str, when: float):
+        self._sequence += 1
+        heapq.heappush(self.heap, (when, self._sequence, name))
+        if self._wake is not None:
+            self._wake.set()
+
+    def _next_run(self, job: Job) -> float:
+        spread = random.uniform(-job.jitter, job.jitter) if job.jitter else 0.0
+        return time.monotonic() + max(job.interval * (1.0 + spread), 0.0)
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        tasks += [endpoint.task for endpoint in self.endpoints.values()
+                  if endpoint.task is not None and not endpoint.task.done()]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            if not self.heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            when, _, name = self.heap[0]
+            delay = when - time.monotonic()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            job = self.jobs.get(name)
+            if job is None:
+                continue
+            self._dispatch(job)
+            self._push(name, self._next_run(job))
+
+    def _dispatch(self, job: Job):
+        if job.market and not self.clock.is_open(job.market):
+            job.skipped_closed += 1
+            return
+
+        if job.task is not None and not job.task.done():
+            job.overruns += 1
+            return
+
+        job.task = asyncio.create_task(self._execute(job))
+
+    async def _run_fetch(self, endpoint: Endpoint) -> Any:
+        result = await endpoint.fetch()
+        endpoint.result, endpoint.fetched_at = result, time.monotonic()
+        return result
+
+    async def fetch(self, key: str) -> Tuple[Any, bool]:
+        """Result of a shared endpoint; returns (result, whether this call issued the fetch)"""
+        endpoint = self.endpoints[key]
+        if endpoint.task is not None and not endpoint.task.done():
+            endpoint.shared += 1
+            return await asyncio.shield(endpoint.task), False
+        if endpoint.fetched_at is not None and time.monotonic() - endpoint.fetched_at <= endpoint.max_age:
+            endpoint.shared += 1
+            return endpoint.result, False
+
+        endpoint.fetches += 1
+        # Shielded so a cancelled consumer does not cancel the fetch the others are waiting on
+        endpoint.task = asyncio.create_task(self._run_fetch(endpoint))
+        return await asyncio.shield(endpoint.task), True
+
+    async def _execute(self, job: Job):
+        started = time.monotonic()
+        try:
+            if job.endpoint:
+                result, fetched = await self.fetch(job.endpoint)
+                if not fetched:
+                    job.coalesced += 1
+                await job.callback(result)
+            else:
+                await job.callback()
+            job.runs += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            job.last_duration = time.monotonic() - started
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = {
+            f'job_{job.name}': {
+                'runs': job.runs,
+                'failures': job.failures,
+                'skipped_closed': job.skipped_closed,
+                'coalesced': job.coalesced,
+                'overruns': job.overruns,
+                'last_duration': job.last_duration,
+            }
+            for job in self.jobs.values()
+        }
+        for endpoint in self.endpoints.values():
+            metrics[f'endpoint_{endpoint.key}'] = {'fetches': endpoint.fetches, 'shared': endpoint.shared}
+        return metrics
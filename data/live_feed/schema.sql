@@ -47,6 +47,7 @@ CREATE TABLE IF NOT EXISTS polygon_stocks (
     market_cap DOUBLE,
     pe_ratio DOUBLE,
 
+    data_type SYMBOL, -- 'stock_trade', 'stock_trade_backfill', 'stock_snapshot'
     feed_source SYMBOL
 ) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
 
@@ -113,6 +114,7 @@ CREATE TABLE IF NOT EXISTS polygon_crypto (
     dominance DOUBLE,
     fear_greed_index INT,
 
+    data_type SYMBOL, -- 'crypto_trade', 'crypto_trade_backfill', 'crypto_snapshot'
     feed_source SYMBOL
 ) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
 
@@ -164,6 +166,69 @@ CREATE TABLE IF NOT EXISTS polygon_snapshots (
     feed_source SYMBOL
 ) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
 
+-- Live stream quotes (stocks and crypto)
+CREATE TABLE IF NOT EXISTS quote_data (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    bid DOUBLE,
+    ask DOUBLE,
+    bid_size DOUBLE,
+    ask_size DOUBLE,
+    asset_type SYMBOL -- 'stock' or 'crypto'
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Minute bars from the stream, gap repair and bulk backfill
+CREATE TABLE IF NOT EXISTS aggregate_data (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    open DOUBLE,
+    high DOUBLE,
+    low DOUBLE,
+    close DOUBLE,
+    volume DOUBLE,
+    asset_type SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Indicator snapshots; one column per configured indicator is added at startup
+CREATE TABLE IF NOT EXISTS technical_indicators (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    current_price DOUBLE,
+    current_volume DOUBLE,
+    open DOUBLE,
+    high DOUBLE,
+    low DOUBLE,
+    close DOUBLE,
+    volume DOUBLE,
+
+    -- Microstructure features
+    mid_price DOUBLE,
+    spread DOUBLE,
+    spread_bps DOUBLE,
+    avg_spread DOUBLE,
+    quote_imbalance DOUBLE,
+    order_flow_imbalance DOUBLE,
+    trade_imbalance DOUBLE,
+    last_trade_side DOUBLE,
+    vwap DOUBLE,
+    realized_volatility DOUBLE
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Limit Up-Limit Down bands
+CREATE TABLE IF NOT EXISTS luld_data (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    limit_up_price DOUBLE,
+    limit_down_price DOUBLE
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Market status changes from the stream and REST polls
+CREATE TABLE IF NOT EXISTS market_status (
+    timestamp TIMESTAMP,
+    market SYMBOL,
+    status SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
 -- Agent analysis results
 CREATE TABLE IF NOT EXISTS agent_analysis (
     timestamp TIMESTAMP,
@@ -194,11 +259,91 @@ CREATE TABLE IF NOT EXISTS agent_coordination (
     feed_source SYMBOL
 ) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
 
+-- Trades and bars rejected by price/volume validation
+CREATE TABLE IF NOT EXISTS quarantined_ticks (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    asset_type SYMBOL, -- 'stock', 'crypto'
+    message_type SYMBOL, -- 'T', 'A', 'AM', 'XT', 'XA'
+    price DOUBLE,
+    volume DOUBLE,
+    reference_price DOUBLE,
+    reason SYMBOL, -- 'price_range', 'volume_range', 'price_change' (comma-separated)
+
+    feed_source SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Off-exchange (TRF) print aggregates, one row per symbol per summary interval
+CREATE TABLE IF NOT EXISTS darkpool_summaries (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    session_date DATE,
+    total_volume LONG,
+    dark_volume LONG,
+    dark_share DOUBLE,
+    dark_notional DOUBLE,
+    dark_vwap DOUBLE,
+    dark_prints LONG,
+    block_prints LONG,
+    block_volume LONG,
+    block_notional DOUBLE,
+    interval_dark_volume LONG,
+    top_levels STRING, -- 'price:notional,...' by dark notional
+
+    feed_source SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Sector ETF breadth (tide), one row per sector per pass
+CREATE TABLE IF NOT EXISTS sector_tide (
+    timestamp TIMESTAMP,
+    sector SYMBOL CAPACITY 64 CACHE,
+    members INT,
+    reporting INT,
+    advancers INT,
+    decliners INT,
+    unchanged INT,
+    advance_decline_ratio DOUBLE,
+    up_volume DOUBLE,
+    down_volume DOUBLE,
+    up_down_volume_ratio DOUBLE,
+    net_premium DOUBLE, -- call minus put premium on constituents this session
+    pct_above_ma_20 DOUBLE,
+    pct_above_ma_50 DOUBLE,
+    pct_above_ma_200 DOUBLE,
+
+    feed_source SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Rolling beta to the benchmark and annualized realized volatility from the correlation engine,
+-- kept apart from the trade tables so trade reads never see them
+CREATE TABLE IF NOT EXISTS risk_metrics (
+    timestamp TIMESTAMP,
+    symbol SYMBOL CAPACITY 10000 CACHE,
+    asset_class SYMBOL, -- 'stock' or 'crypto'
+    close DOUBLE,
+    beta DOUBLE,
+    volatility DOUBLE,
+
+    feed_source SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY DAY WAL;
+
+-- Applied schema fingerprints (initialization is skipped when schema.sql is unchanged)
+CREATE TABLE IF NOT EXISTS schema_fingerprints (
+    timestamp TIMESTAMP,
+    component SYMBOL,
+    fingerprint STRING
+) TIMESTAMP(timestamp) PARTITION BY YEAR WAL;
+
+-- Columns added after the tables were first created
+ALTER TABLE polygon_stocks ADD COLUMN IF NOT EXISTS data_type SYMBOL;
+ALTER TABLE polygon_crypto ADD COLUMN IF NOT EXISTS data_type SYMBOL;
+
 -- Create indexes for optimal query performance
 ALTER TABLE polygon_stocks ALTER COLUMN symbol ADD INDEX;
 ALTER TABLE polygon_options ALTER COLUMN underlying_symbol ADD INDEX;
 ALTER TABLE polygon_options ALTER COLUMN option_symbol ADD INDEX;
 ALTER TABLE polygon_crypto ALTER COLUMN symbol ADD INDEX;
+ALTER TABLE risk_metrics ALTER COLUMN symbol ADD INDEX;
 ALTER TABLE polygon_snapshots ALTER COLUMN symbol ADD INDEX;
 ALTER TABLE agent_analysis ALTER COLUMN symbol ADD INDEX;
 ALTER TABLE agent_coordination ALTER COLUMN symbol ADD INDEX;
\ No newline at end of file
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Live Feed Soak Testing
+
+Load-tests PolygonDataFeed without a live Polygon connection.
+
+Components:
+- FakePolygonServer: local WebSocket server speaking the Polygon auth/subscribe protocol
+  with synthetic trade, quote, aggregate and LULD streams (rates, symbols, bursts)
+- SoakHarness: starts the server in a child process, runs the feed against it and a local
+  QuestDB, and reports msgs/sec, end-to-end p50/p99 latency, feed memory growth and drops
+
+Usage:
+    python -m live_feed.soak.harness --duration 300 --trade-rate 5000 --burst-every 30
+    python -m live_feed.soak.fake_polygon_server --port 8765
+"""
+
+from .fake_polygon_server import FakePolygonServer, StreamProfile
+from .harness import SoakHarness
+
+__all__ = ['FakePolygonServer', 'StreamProfile', 'SoakHarness']
+__version__ = '1.0.0'
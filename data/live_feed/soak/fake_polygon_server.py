@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Local Fake Polygon WebSocket Server
+Implements the stream auth/subscribe protocol and emits synthetic T/Q/AM/XT/XQ/XA/LULD events
+Rates, symbols and bursts are configurable; slow clients lose messages like on the real cluster
+
+    python -m live_feed.soak.fake_polygon_server --port 8765 --trade-rate 5000 --quote-rate 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRADE_CHANNELS = ('T', 'XT')
+QUOTE_CHANNELS = ('Q', 'XQ')
+AGGREGATE_CHANNELS = ('AM', 'A', 'XA')
+
+
+@dataclass
+class StreamProfile:
+    """Synthetic stream shape"""
+    symbols: List[str] = field(default_factory=lambda: ["SPY", "QQQ", "AAPL", "MSFT", "NVDA"])
+    trade_rate: float = 1000.0  # trade events per second across subscribed symbols
+    quote_rate: float = 1000.0
+    aggregate_interval: float = 1.0  # seconds between bars per symbol (each bar is one simulated minute)
+    luld_interval: float = 5.0  # seconds between LULD bands per symbol
+    burst_every: float = 0.0  # seconds between bursts (0 = no bursts)
+    burst_seconds: float = 1.0
+    burst_multiplier: float = 5.0
+    tick: float = 0.01  # generator step in seconds
+    batch_max: int = 500  # events per frame
+
+
+class SyntheticMarket:
+    """Random-walk prices and event construction per symbol"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self.prices: Dict[str, float] = {}
+        self.bar_start: Dict[str, int] = {}
+        self.sequence = 0
+
+    def price(self, symbol: str) -> float:
+        price = self.prices.get(symbol)
+        if price is None:
+            price = self.random.uniform(20, 500)
+        price = max(price * (1 + self.random.gauss(0, 0.0005)), 0.01)
+        self.prices[symbol] = price
+        return price
+
+    def event(self, channel: str, symbol: str, now: float) -> Dict[str, Any]:
+        self.sequence += 1
+        now_ms = int(now * 1000)
+        price = round(self.price(symbol), 4)
+        key = 'pair' if channel.startswith('X') else 'sym'
+        event: Dict[str, Any] = {'ev': channel, key: symbol, '_sent': now}
+
+        if channel in TRADE_CHANNELS:
+            event.update({'p': price, 's': self.random.choice((1, 10, 100, 100, 200, 500, 1000)),
+                          't': now_ms, 'x': self.random.choice((4, 11, 12, 19)), 'c': [], 'q': self.sequence})
+        elif channel in QUOTE_CHANNELS:
+            half_spread = max(price * 0.0002, 0.01)
+            event.update({'bp': round(price - half_spread, 4), 'ap': round(price + half_spread, 4),
+                          'bs': self.random.randint(1, 50), 'as': self.random.randint(1, 50),
+                          't': now_ms, 'q': self.sequence})
+        elif channel in AGGREGATE_CHANNELS:
+            # Consecutive simulated minutes so the feed's gap tracker sees a continuous series
+            start = self.bar_start.get(symbol, (now_ms // 60000) * 60000) + 60000
+            self.bar_start[symbol] = start
+            low, high = sorted((price * (1 - self.random.uniform(0, 0.002)), price * (1 + self.random.uniform(0, 0.002))))
+            event.update({'o': round(self.random.uniform(low, high), 4), 'h': round(high, 4), 'l': round(low, 4),
+                          'c': price, 'v': self.random.randint(100, 100000), 'vw': price,
+                          's': start, 'e': start + 60000})
+        elif channel == 'LULD':
+            event.update({'lu': round(price * 1.05, 4), 'ld': round(price * 0.95, 4), 't': now_ms, 'q': self.sequence})
+        return event
+
+
+class FakeClient:
+    """One connected socket: subscriptions and a bounded outgoing queue"""
+
+    def __init__(self, ws, max_queue: int):
+        self.ws = ws
+        self.authenticated = False
+        self.subscriptions: Set[Tuple[str, str]] = set()  # (channel, symbol or '*')
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.sender: Optional[asyncio.Task] = None
+
+
+class FakePolygonServer:
+    """
+    Local stand-in for the Polygon stream cluster
+
+    Features:
+    - Any path accepts the connected -> auth -> subscribe handshake
+    - Wildcard subscriptions (T.*, LULD.*) expand to the profile symbols
+    - Trade and quote rates are spread over subscribed symbols, with periodic bursts
+    - Frames queue per client up to max_queue; overflow is dropped and counted
+    - Every event carries a '_sent' wall-clock stamp for end-to-end latency
+    """
+
+    def __init__(self, profile: StreamProfile, host: str = "127.0.0.1", port: int = 8765,
+                 max_queue: int = 1000, seed: Optional[int] = None):
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.max_queue = int(max_queue)
+        self.market = SyntheticMarket(seed)
+        self.clients: List[FakeClient] = []
+        self._runner = None
+        self._generator: Optional[asyncio.Task] = None
+
+        self.events_generated = 0
+        self.events_sent = 0
+        self.events_dropped = 0
+        self.frames_sent = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stocks"
+
+    # Protocol
+    async def _handle(self, request):
+        from aiohttp import WSMsgType, web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        client = FakeClient(ws, self.max_queue)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        await ws.send_str(json.dumps([{'ev': 'status', 'status': 'connected', 'message': 'Connected Successfully'}]))
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                await self._control(client, json.loads(message.data))
+        finally:
+            if client in self.clients:
+                self.clients.remove(client)
+            client.sender.cancel()
+            await asyncio.gather(client.sender, return_exceptions=True)
+        return ws
+
+    async def _control(self, client: FakeClient, payload: Dict[str, Any]):
+        action = payload.get('action')
+        if action == 'auth':
+            client.authenticated = True
+            await client.ws.send_str(json.dumps([{'ev': 'status', 'status': 'auth_success', 'message': 'authenticated'}]))
+            self.clients.append(client)
+            return
+        if not client.authenticated:
+            await client.ws.send_str(json.dumps([{'ev': 'status', 'status': 'auth_failed', 'message': 'not authorized'}]))
+            return
+
+        params = [p.strip() for p in str(payload.get('params', '')).split(",") if p.strip()]
+        for param in params:
+            channel, _, symbol = param.partition(".")
+            entry = (channel, symbol or '*')
+            if action == 'subscribe':
+                client.subscriptions.add(entry)
+            elif action == 'unsubscribe':
+                client.subscriptions.discard(entry)
+        status = [{'ev': 'status', 'status': 'success', 'message': f"{action}d to: {','.join(params)}"}]
+        if action == 'subscribe' and ('STATUS', '*') in client.subscriptions:
+            now = time.time()
+            status += [{'ev': 'STATUS', 'market': market, 'status': 'open', 't': int(now * 1000), '_sent': now}
+                       for market in ('stocks', 'crypto')]
+        await client.ws.send_str(json.dumps(status))
+
+    async def _send_loop(self, client: FakeClient):
+        while True:
+            frame, count = await client.queue.get()
+            await client.ws.send_str(frame)
+            self.frames_sent += 1
+            self.events_sent += count
+
+    # Generation
+    def _targets(self, client: FakeClient, channels: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        targets = []
+        for channel, symbol in client.subscriptions:
+            if channel not in channels:
+                continue
+            if symbol == '*':
+                targets.extend((channel, s) for s in self.profile.symbols)
+            else:
+                targets.append((channel, symbol))
+        return targets
+
+    def _rate_factor(self, now: float, started: float) -> float:
+        profile = self.profile
+        if profile.burst_every <= 0:
+            return 1.0
+        return profile.burst_multiplier if (now - started) % profile.burst_every < profile.burst_seconds else 1.0
+
+    def _enqueue(self, client: FakeClient, events: List[Dict[str, Any]]):
+        batch_max = max(self.profile.batch_max, 1)
+        for offset in range(0, len(events), batch_max):
+            chunk = events[offset:offset + batch_max]
+            try:
+                client.queue.put_nowait((json.dumps(chunk), len(chunk)))
+            except asyncio.QueueFull:
+                self.events_dropped += len(chunk)
+
+    async def _generate(self):
+        profile = self.profile
+        started = time.monotonic()
+        carry: Dict[Tuple[int, str], float] = {}
+        last_bar: Dict[Tuple[int, str, str], float] = {}
+        last_luld: Dict[Tuple[int, str], float] = {}
+
+        while True:
+            await asyncio.sleep(profile.tick)
+            monotonic = time.monotonic()
+            factor = self._rate_factor(monotonic, started)
+            now = time.time()
+
+            for client in list(self.clients):
+                events = []
+                for kind, channels, rate in (('trade', TRADE_CHANNELS, profile.trade_rate),
+                                             ('quote', QUOTE_CHANNELS, profile.quote_rate)):
+                    targets = self._targets(client, channels)
+                    if not targets:
+                        continue
+                    key = (id(client), kind)
+                    due = carry.get(key, 0.0) + rate * factor * profile.tick
+                    count = int(due)
+                    carry[key] = due - count
+                    for _ in range(count):
+                        channel, symbol = self.market.random.choice(targets)
+                        events.append(self.market.event(channel, symbol, now))
+
+                for channel, symbol in self._targets(client, AGGREGATE_CHANNELS):
+                    key = (id(client), channel, symbol)
+                    if monotonic - last_bar.get(key, 0.0) >= profile.aggregate_interval:
+                        last_bar[key] = monotonic
+                        events.append(self.market.event(channel, symbol, now))
+
+                for channel, symbol in self._targets(client, ('LULD',)):
+                    key = (id(client), symbol)
+                    if monotonic - last_luld.get(key, 0.0) >= profile.luld_interval:
+                        last_luld[key] = monotonic
+                        events.append(self.market.event(channel, symbol, now))
+
+                self.events_generated += len(events)
+                if events:
+                    self._enqueue(client, events)
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/{market:.*}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._generator = asyncio.create_task(self._generate())
+        logger.info(f"Fake Polygon server listening on {self.url}")
+
+    async def stop(self):
+        if self._generator is not None:
+            self._generator.cancel()
+            await asyncio.gather(self._generator, return_exceptions=True)
+            self._generator = None
+        for client in list(self.clients):
+            await client.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'server_events_generated': self.events_generated,
+            'server_events_sent': self.events_sent,
+            'server_events_dropped': self.events_dropped,
+            'server_frames_sent': self.frames_sent,
+            'server_clients': len(self.clients),
+        }
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    defaults = StreamProfile()
+    parser.add_argument("--symbols", default=",".join(defaults.symbols), help="Symbols for wildcard subscriptions")
+    parser.add_argument("--trade-rate", type=float, default=defaults.trade_rate, help="Trades per second")
+    parser.add_argument("--quote-rate", type=float, default=defaults.quote_rate, help="Quotes per second")
+    parser.add_argument("--aggregate-interval", type=float, default=defaults.aggregate_interval)
+    parser.add_argument("--luld-interval", type=float, default=defaults.luld_interval)
+    parser.add_argument("--burst-every", type=float, default=defaults.burst_every, help="Seconds between bursts")
+    parser.add_argument("--burst-seconds", type=float, default=defaults.burst_seconds)
+    parser.add_argument("--burst-multiplier", type=float, default=defaults.burst_multiplier)
+    parser.add_argument("--batch-max", type=int, default=defaults.batch_max, help="Events per frame")
+
+
+def profile_from_args(args: argparse.Namespace) -> StreamProfile:
+    return StreamProfile(
+        symbols=[s.strip() for s in args.symbols.split(",") if s.strip()],
+        trade_rate=args.trade_rate,
+        quote_rate=args.quote_rate,
+        aggregate_interval=args.aggregate_interval,
+        luld_interval=args.luld_interval,
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+        burst_multiplier=args.burst_multiplier,
+        batch_max=args.batch_max
+    )
+
+
+def profile_to_args(profile: StreamProfile) -> List[str]:
+    """Command-line arguments that rebuild a profile in a server subprocess"""
+    return [
+        "--symbols", ",".join(profile.symbols),
+        "--trade-rate", str(profile.trade_rate),
+        "--quote-rate", str(profile.quote_rate),
+        "--aggregate-interval", str(profile.aggregate_interval),
+        "--luld-interval", str(profile.luld_interval),
+        "--burst-every", str(profile.burst_every),
+        "--burst-seconds", str(profile.burst_seconds),
+        "--burst-multiplier", str(profile.burst_multiplier),
+        "--batch-max", str(profile.batch_max),
+    ]
+
+
+async def serve(server: FakePolygonServer, metrics_file: Optional[str] = None):
+    """Run until SIGINT/SIGTERM, then write the final metrics to metrics_file as JSON"""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await server.start()
+    try:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.info(f"Fake Polygon server: {server.get_metrics()}")
+    finally:
+        await server.stop()
+        if metrics_file:
+            with open(metrics_file, 'w') as f:
+                json.dump(server.get_metrics(), f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Polygon WebSocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-queue", type=int, default=1000, help="Frames buffered per client before dropping")
+    parser.add_argument("--metrics-file", help="Write final metrics here as JSON on shutdown")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(serve(FakePolygonServer(profile_from_args(args), args.host, args.port, args.max_queue),
+                      metrics_file=args.metrics_file))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+End-to-End Soak Test Harness
+Runs PolygonDataFeed against the local fake Polygon server (in its own process) and a local QuestDB
+Reports sustained msgs/sec, end-to-end p50/p99 latency, feed memory growth and dropped messages
+
+    python -m live_feed.soak.harness --duration 300 --trade-rate 5000 --quote-rate 5000 --burst-every 30
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .fake_polygon_server import StreamProfile, add_profile_arguments, profile_from_args, profile_to_args
+
+logger = logging.getLogger(__name__)
+
+SERVER_SCRIPT = Path(__file__).resolve().with_name('fake_polygon_server.py')  # stdlib + aiohttp only
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class LatencyReservoir:
+    """Fixed-size uniform sample of latencies (Algorithm R) so long soaks stay bounded"""
+
+    def __init__(self, size: int = 100000, seed: int = 7):
+        import random
+
+        self.size = size
+        self.samples: List[float] = []
+        self.seen = 0
+        self.random = random.Random(seed)
+
+    def add(self, value: float):
+        self.seen += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            slot = self.random.randrange(self.seen)
+            if slot < self.size:
+                self.samples[slot] = value
+
+
+class FakeServerProcess:
+    """The fake Polygon server run as a child process, so its generator does not share the feed's CPU or RSS"""
+
+    def __init__(self, profile: StreamProfile, host: str = "127.0.0.1", port: int = 8765,
+                 max_queue: int = 1000, startup_timeout: float = 10.0):
+        self.profile = profile
+        self.host = host
+        self.port = int(port)
+        self.max_queue = int(max_queue)
+        self.startup_timeout = float(startup_timeout)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._metrics_file: Optional[Path] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stocks"
+
+    async def start(self, work_dir: Path):
+        self._metrics_file = Path(work_dir) / 'server_metrics.json'
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, str(SERVER_SCRIPT),
+            "--host", self.host, "--port", str(self.port), "--max-queue", str(self.max_queue),
+            "--metrics-file", str(self._metrics_file), *profile_to_args(self.profile)
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self._process.returncode is not None:
+                raise RuntimeError(f"fake server exited with code {self._process.returncode}")
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+                writer.close()
+                await writer.wait_closed()
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    await self.stop()
+                    raise RuntimeError(f"fake server did not listen on {self.host}:{self.port}")
+                await asyncio.sleep(0.1)
+
+    async def stop(self):
+        if self._process is None or self._process.returncode is not None:
+            return
+        self._process.terminate()
+        try:
+            await asyncio.wait_for(self._process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Final counters written by the server on shutdown (empty if it did not exit cleanly)"""
+        try:
+            with open(self._metrics_file, 'r') as f:
+                return json.load(f)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Fake server metrics unavailable: {e}")
+            return {}
+
+
+class SoakHarness:
+    """
+    Feed-under-load runner
+
+    Features:
+    - Feed runs unmodified with the raw stream client pointed at the fake server, which runs in a
+      separate process so RSS and throughput measure the feed alone
+    - REST polling and gap backfill are switched off; QuestDB writes go to the configured instance
+    - Per-second throughput and RSS samples; trade latency measured server send -> feed callback
+    - Drops: events the server could not queue, events in flight at the end, validation rejects,
+      and rows the spool had to discard
+    """
+
+    def __init__(self, config: Dict[str, Any], profile: StreamProfile, duration: float,
+                 port: int = 8765, max_queue: int = 1000, warmup: float = 5.0):
+        self.config = copy.deepcopy(config)
+        self.profile = profile
+        self.duration = float(duration)
+        self.warmup = float(warmup)
+        self.server = FakeServerProcess(profile, port=port, max_queue=max_queue)
+
+        self.latency = LatencyReservoir()
+        self.throughput: List[float] = []
+        self.rss: List[float] = []
+        self._measuring = False
+
+    def _feed_config(self, spool_dir: Path) -> Dict[str, Any]:
+        config = self.config
+        config.setdefault('polygon', {})['api_key'] = config.get('polygon', {}).get('api_key') or 'soak'
+        config['polygon']['rest_enabled'] = False
+        config.setdefault('gap_fill', {})['enabled'] = False
+        config.setdefault('cold_storage', {})['enabled'] = False
+        websocket = config.setdefault('websocket', {})
+        websocket.update({'client': 'raw', 'url': self.server.url, 'reconnect_attempts': 0, 'reconnect_delay': 1})
+        config.setdefault('spool', {})['directory'] = str(spool_dir / 'spool')
+        config.setdefault('state', {})['spill_directory'] = str(spool_dir / 'state_spill')
+        return config
+
+    async def _on_market_data(self, data):
+        sent = (data.raw_data or {}).get('_sent')
+        if sent is not None and self._measuring:
+            self.latency.add((time.time() - sent) * 1000)
+
+    async def run(self) -> Dict[str, Any]:
+        from live_feed.polygon_data_feed import PolygonDataFeed
+        from live_feed.state_manager import process_memory
+
+        with tempfile.TemporaryDirectory() as tmp:
+            await self.server.start(Path(tmp))
+            feed = PolygonDataFeed(self._feed_config(Path(tmp)))
+            feed.stock_symbols = list(self.profile.symbols)
+            feed.add_callback(self._on_market_data)
+
+            try:
+                await feed.start()
+                await asyncio.sleep(self.warmup)
+
+                self._measuring = True
+                start_memory = process_memory() or {'rss_bytes': 0}
+                start_received = feed.websocket_client.messages_received
+                started = time.monotonic()
+                previous = start_received
+
+                while time.monotonic() - started < self.duration:
+                    await asyncio.sleep(1.0)
+                    received = feed.websocket_client.messages_received
+                    self.throughput.append(received - previous)
+                    previous = received
+                    memory = process_memory()
+                    if memory is not None:
+                        self.rss.append(memory['rss_bytes'])
+
+                elapsed = time.monotonic() - started
+                end_memory = process_memory() or {'rss_bytes': 0}
+                received = feed.websocket_client.messages_received - start_received
+                feed_metrics = feed.get_metrics()
+            finally:
+                await feed.stop()
+                await self.server.stop()
+            server_metrics = self.server.get_metrics()
+
+        in_flight = max(server_metrics.get('server_events_sent', 0) - feed.websocket_client.messages_received, 0)
+        samples = self.latency.samples
+        return {
+            'duration_seconds': round(elapsed, 1),
+            'messages_received': received,
+            'msgs_per_sec': round(received / elapsed, 1) if elapsed else 0.0,
+            'msgs_per_sec_min': min(self.throughput) if self.throughput else 0,
+            'msgs_per_sec_max': max(self.throughput) if self.throughput else 0,
+            'latency_samples': self.latency.seen,
+            'latency_p50_ms': round(percentile(samples, 0.50), 2) if samples else None,
+            'latency_p99_ms': round(percentile(samples, 0.99), 2) if samples else None,
+            'latency_max_ms': round(max(samples), 2) if samples else None,
+            'rss_start_mb': round(start_memory['rss_bytes'] / 1048576, 1),
+            'rss_end_mb': round(end_memory['rss_bytes'] / 1048576, 1),
+            'rss_peak_mb': round(max(self.rss) / 1048576, 1) if self.rss else None,
+            'rss_growth_mb': round((end_memory['rss_bytes'] - start_memory['rss_bytes']) / 1048576, 1),
+            'dropped_by_server': server_metrics.get('server_events_dropped'),
+            'undelivered_at_stop': in_flight,
+            'validation_rejected': sum(v for k, v in feed_metrics.items() if k.startswith('validation_rejected_')),
+            'writer_spooled_rows': feed_metrics.get('writer_spooled_rows', 0),
+            'spool_dropped': feed_metrics.get('spool_dropped', 0),
+            'server': server_metrics,
+            'feed': feed_metrics,
+        }
+
+
+def print_report(report: Dict[str, Any], verbose: bool = False):
+    for key, value in report.items():
+        if key in ('server', 'feed') and not verbose:
+            continue
+        print(f"{key:>22}: {value}")
+
+
+async def run_soak(args: argparse.Namespace) -> Dict[str, Any]:
+    from live_feed.polygon_data_feed import load_config
+
+    config = load_config()
+    if args.questdb_host:
+        config.setdefault('questdb', {})['host'] = args.questdb_host
+    harness = SoakHarness(config, profile_from_args(args), args.duration, port=args.port,
+                          max_queue=args.max_queue, warmup=args.warmup)
+    return await harness.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test PolygonDataFeed against a local fake Polygon server")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds (after warmup)")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-queue", type=int, default=1000, help="Frames buffered per client before dropping")
+    parser.add_argument("--questdb-host", help="Override questdb.host from settings.yaml")
+    parser.add_argument("--verbose", action="store_true", help="Include full server and feed metrics")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print_report(asyncio.run(run_soak(args)), verbose=args.verbose)
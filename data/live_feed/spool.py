@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Durable Write-Ahead Spool for QuestDB Writes
+Segmented memory-mapped files that hold rows while QuestDB is slow or unreachable
+Replayed in append order once QuestDB recovers
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record header: payload length, CRC32 of payload. A zero length marks the end of a segment.
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".spool"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def _encode_value(value: Any):
+    """JSON encoder hook for values produced by the store methods"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if hasattr(value, "item"):  # NumPy scalars
+        return value.item()
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+def _decode_object(obj: dict):
+    """JSON decoder hook reversing _encode_value"""
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+class SpoolSegment:
+    """One fixed-size memory-mapped segment file"""
+
+    def __init__(self, path: Path, sequence: int, size: int):
+        self.path = path
+        self.sequence = sequence
+        self.size = size
+        self.write_offset = 0
+        self.record_count = 0
+
+        exists = path.exists()
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists or os.path.getsize(path) < size:
+            self._file.truncate(size)
+        self.mm = mmap.mmap(self._file.fileno(), size)
+
+        if exists:
+            self._recover()
+
+    def _recover(self):
+        """Find the end of valid data after a restart"""
+        offset = 0
+        count = 0
+        while offset + RECORD_HEADER.size <= self.size:
+            length, crc = RECORD_HEADER.unpack_from(self.mm, offset)
+            end = offset + RECORD_HEADER.size + length
+            if length == 0 or end > self.size:
+                break
+            if zlib.crc32(self.mm[offset + RECORD_HEADER.size:end]) != crc:
+                logger.warning(f"Spool segment {self.path.name} truncated at offset {offset} (bad checksum)")
+                break
+            offset = end
+            count += 1
+        self.write_offset = offset
+        self.record_count = count
+
+    def has_room(self, payload_size: int) -> bool:
+        # Always leave room for a zero terminator header
+        return self.write_offset + RECORD_HEADER.size * 2 + payload_size <= self.size
+
+    def append(self, payload: bytes):
+        offset = self.write_offset
+        RECORD_HEADER.pack_into(self.mm, offset, len(payload), zlib.crc32(payload))
+        start = offset + RECORD_HEADER.size
+        self.mm[start:start + len(payload)] = payload
+        self.write_offset = start + len(payload)
+        self.record_count += 1
+
+    def read(self, offset: int, max_records: int) -> Tuple[List[bytes], int]:
+        """Read up to max_records payloads starting at offset"""
+        payloads = []
+        while len(payloads) < max_records and offset < self.write_offset:
+            length, _ = RECORD_HEADER.unpack_from(self.mm, offset)
+            start = offset + RECORD_HEADER.size
+            payloads.append(bytes(self.mm[start:start + length]))
+            offset = start + length
+        return payloads, offset
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        self.mm.close()
+        self._file.close()
+
+    def delete(self):
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class WriteAheadSpool:
+    """
+    Append-only spool of pending QuestDB writes
+
+    Features:
+    - Fixed-size memory-mapped segments with per-record checksums
+    - Persistent read checkpoint so replay resumes after restarts
+    - Size cap that discards the oldest segment when exceeded
+    - Metrics for appended, replayed and dropped records
+    """
+
+    def __init__(self, directory: Path, segment_size: int = 64 * 1024 * 1024,
+                 max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = int(segment_size)
+        self.max_segments = max(int(max_bytes) // self.segment_size, 2)
+
+        self._lock = threading.Lock()
+        self.segments: List[SpoolSegment] = []
+        # Read position: segment sequence, byte offset and records consumed in that segment
+        self.read_sequence = 0
+        self.read_offset = 0
+        self.read_index = 0
+
+        self.appended_records = 0
+        self.replayed_records = 0
+        self.dropped_records = 0
+
+        self._open_existing()
+
+    # Lifecycle
+    def _segment_path(self, sequence: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{sequence:010d}{SEGMENT_SUFFIX}"
+
+    def _open_existing(self):
+        """Reopen segments and the read checkpoint left by a previous run"""
+        sequences = sorted(
+            int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        )
+        for sequence in sequences:
+            self.segments.append(SpoolSegment(self._segment_path(sequence), sequence, self.segment_size))
+
+        checkpoint_path = self.directory / CHECKPOINT_FILE
+        if checkpoint_path.exists():
+            try:
+                checkpoint = json.loads(checkpoint_path.read_text())
+                self.read_sequence = checkpoint.get("sequence", 0)
+                self.read_offset = checkpoint.get("offset", 0)
+                self.read_index = checkpoint.get("index", 0)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable spool checkpoint: {e}")
+
+        if self.segments and self.read_sequence < self.segments[0].sequence:
+            self.read_sequence = self.segments[0].sequence
+            self.read_offset = 0
+            self.read_index = 0
+
+        if self.segments:
+            logger.info(f"Spool reopened with {len(self.segments)} segments, {self.pending_records} pending records")
+
+    def _new_segment(self) -> SpoolSegment:
+        sequence = self.segments[-1].sequence + 1 if self.segments else self.read_sequence
+        segment = SpoolSegment(self._segment_path(sequence), sequence, self.segment_size)
+        self.segments.append(segment)
+
+        # Enforce the size cap by dropping the oldest segment
+        while len(self.segments) > self.max_segments:
+            oldest = self.segments.pop(0)
+            skipped = oldest.record_count
+            if oldest.sequence == self.read_sequence:
+                skipped -= self.read_index
+            elif oldest.sequence < self.read_sequence:
+                skipped = 0
+            self.dropped_records += max(skipped, 0)
+            logger.error(f"Spool size cap reached, dropped segment {oldest.path.name} ({skipped} records)")
+            oldest.delete()
+            if self.read_sequence <= oldest.sequence:
+                self.read_sequence = self.segments[0].sequence
+                self.read_offset = 0
+                self.read_index = 0
+                self._save_checkpoint()
+
+        return segment
+
+    def _save_checkpoint(self):
+        checkpoint_path = self.directory / CHECKPOINT_FILE
+        tmp_path = checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "sequence": self.read_sequence,
+            "offset": self.read_offset,
+            "index": self.read_index,
+        }))
+        os.replace(tmp_path, checkpoint_path)
+
+    # Writes
+    def append(self, record: Dict[str, Any]):
+        """Append one record, rolling to a new segment when the current one is full"""
+        payload = json.dumps(record, default=_encode_value, separators=(",", ":")).encode("utf-8")
+        if RECORD_HEADER.size * 2 + len(payload) > self.segment_size:
+            raise ValueError(f"Spool record of {len(payload)} bytes exceeds segment size")
+
+        with self._lock:
+            segment = self.segments[-1] if self.segments else None
+            if segment is None or not segment.has_room(len(payload)):
+                segment = self._new_segment()
+            segment.append(payload)
+            self.appended_records += 1
+
+    def flush(self):
+        """Flush dirty pages of the active segment to disk"""
+        with self._lock:
+            if self.segments:
+                self.segments[-1].flush()
+
+    # Replay
+    def read_batch(self, max_records: int) -> Tuple[List[Dict[str, Any]], Tuple[int, int, int]]:
+        """Read the next records in append order without consuming them"""
+        with self._lock:
+            sequence, offset, index = self.read_sequence, self.read_offset, self.read_index
+            records: List[Dict[str, Any]] = []
+            for segment in self.segments:
+                if segment.sequence < sequence:
+                    continue
+                if segment.sequence > sequence:
+                    sequence, offset, index = segment.sequence, 0, 0
+                payloads, offset = segment.read(offset, max_records - len(records))
+                index += len(payloads)
+                records.extend(json.loads(p, object_hook=_decode_object) for p in payloads)
+                if len(records) >= max_records:
+                    break
+            return records, (sequence, offset, index)
+
+    def commit(self, position: Tuple[int, int, int], record_count: int):
+        """Mark records up to position as replayed and delete fully consumed segments"""
+        with self._lock:
+            if self.segments and position[0] < self.segments[0].sequence:
+                # The segment was discarded by the size cap while the batch was in flight
+                position = (self.segments[0].sequence, 0, 0)
+            self.read_sequence, self.read_offset, self.read_index = position
+            self.replayed_records += record_count
+
+            # Keep the active (last) segment open for appends
+            while len(self.segments) > 1 and self.segments[0].sequence < self.read_sequence:
+                self.segments.pop(0).delete()
+            if (len(self.segments) == 1 and self.segments[0].sequence == self.read_sequence
+                    and self.read_offset >= self.segments[0].write_offset):
+                # Fully drained: recycle the last segment so the spool stays small
+                self.segments.pop(0).delete()
+                self.read_sequence += 1
+                self.read_offset = 0
+                self.read_index = 0
+
+            self._save_checkpoint()
+
+    @property
+    def pending_records(self) -> int:
+        pending = 0
+        for segment in self.segments:
+            if segment.sequence > self.read_sequence:
+                pending += segment.record_count
+            elif segment.sequence == self.read_sequence:
+                pending += segment.record_count - self.read_index
+        return pending
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self.pending_records == 0
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'spool_segments': len(self.segments),
+                'spool_pending': self.pending_records,
+                'spool_bytes': sum(s.write_offset for s in self.segments),
+                'spool_appended': self.appended_records,
+                'spool_replayed': self.replayed_records,
+                'spool_dropped': self.dropped_records,
+            }
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments:
+                segment.flush()
+                segment.close()
+            self.segments = []
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Startup Clock
+Records when the live_feed package started importing
+Imported first by the package so PolygonDataFeed can report its import cost without code above its imports
+"""
+
+import time
+
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Per-Symbol State Budgeting
+Tracks approximate bytes held per symbol across the feed's buffers and enforces a global budget
+Inactive symbols are evicted (LRU by last update), optionally spilled to disk, and rehydrated on demand
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+EVICT_SPILL = 'spill'
+EVICT_DROP = 'drop'
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate deep size of buffer contents (lists, tuples and dicts of scalars)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + estimate_size(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += estimate_size(item) if isinstance(item, (dict, list, tuple)) else sys.getsizeof(item)
+    return size
+
+
+def merge_state(history: Any, current: Any, max_length: int) -> Any:
+    """Merge rehydrated history under state that arrived since eviction"""
+    if isinstance(history, list) and isinstance(current, list):
+        return (history + current)[-max_length:]
+    if isinstance(history, dict) and isinstance(current, dict):
+        merged = dict(history)
+        for key, value in current.items():
+            merged[key] = merge_state(history[key], value, max_length) if key in history else value
+        return merged
+    return current
+
+
+def process_memory() -> Optional[Dict[str, float]]:
+    """Resident set size of this process and its share of physical memory (Linux)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        physical = os.sysconf('SC_PHYS_PAGES') * page_size
+    except (OSError, ValueError, IndexError):
+        return None
+    rss = resident_pages * page_size
+    return {'rss_bytes': rss, 'percent': 100.0 * rss / physical if physical else 0.0}
+
+
+class SymbolStateManager:
+    """
+    Memory budget for per-symbol feed state
+
+    Features:
+    - Registered stores are plain dicts keyed by symbol (price buffers, bar buffers, ...)
+    - touch() on every update is O(1): LRU order plus a dirty set for re-measuring
+    - enforce() re-measures dirty symbols and evicts the least recently updated idle ones
+      while over the byte budget or while process RSS is above the memory threshold
+    - Evicted state is spilled to disk (or dropped) and rehydrated on the next update,
+      from the spill file first and the async loader (QuestDB) otherwise
+    - Evicted entries and their spill files expire after evicted_ttl and are capped at
+      max_evicted, so symbols that never return do not accumulate
+    """
+
+    def __init__(self, stores: Dict[str, Dict[str, Any]], budget_bytes: int,
+                 min_idle: float = 300.0, low_watermark: float = 0.9,
+                 memory_threshold: Optional[float] = None, pressure_fraction: float = 0.25,
+                 eviction: str = EVICT_SPILL, spill_directory: Optional[Path] = None,
+                 max_length: int = 200, evicted_ttl: float = 86400.0, max_evicted: int = 50000,
+                 loader: Optional[Callable[[str], Awaitable[Optional[Dict[str, Any]]]]] = None,
+                 forget: Iterable[Callable[[str], None]] = ()):
+        self.stores = stores
+        self.budget_bytes = int(budget_bytes)
+        self.min_idle = float(min_idle)
+        self.low_watermark = float(low_watermark)
+        self.memory_threshold = memory_threshold
+        self.pressure_fraction = float(pressure_fraction)
+        self.eviction = eviction if spill_directory is not None else EVICT_DROP
+        self.spill_directory = spill_directory
+        self.max_length = int(max_length)
+        self.evicted_ttl = float(evicted_ttl)
+        self.max_evicted = int(max_evicted)
+        self.loader = loader
+        self.forget = list(forget)
+
+        self.last_update: "OrderedDict[str, float]" = OrderedDict()  # LRU, most recent last
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.dirty: Set[str] = set()
+        self.evicted: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # symbol -> (mode, evicted at), oldest first
+        self._rehydrating: Dict[str, asyncio.Task] = {}
+
+        self.evictions = 0
+        self.spilled = 0
+        self.rehydrations = 0
+        self.rehydrate_failures = 0
+        self.pressure_events = 0
+        self.expired = 0
+
+        if self.spill_directory is not None:
+            self.spill_directory.mkdir(parents=True, exist_ok=True)
+            for path in self.spill_directory.glob('*.pkl'):
+                path.unlink()  # spill files do not survive restarts; QuestDB does
+
+    # Update path
+    def touch(self, symbol: str):
+        """Record an update; schedules rehydration if the symbol was evicted"""
+        self.last_update[symbol] = time.monotonic()
+        self.last_update.move_to_end(symbol)
+        self.dirty.add(symbol)
+        if symbol in self.evicted and symbol not in self._rehydrating:
+            self._rehydrating[symbol] = asyncio.create_task(self._rehydrate(symbol))
+
+    async def ensure(self, symbol: str):
+        """Rehydrate an evicted symbol and wait for it (read paths)"""
+        if symbol not in self.evicted:
+            return
+        task = self._rehydrating.get(symbol)
+        if task is None:
+            task = self._rehydrating[symbol] = asyncio.create_task(self._rehydrate(symbol))
+        await asyncio.shield(task)
+
+    # Accounting
+    def measure(self, symbol: str) -> int:
+        size = sum(estimate_size(store[symbol]) for store in self.stores.values() if symbol in store)
+        self.total_bytes += size - self.sizes.get(symbol, 0)
+        self.sizes[symbol] = size
+        return size
+
+    def enforce(self) -> List[str]:
+        """Re-measure changed symbols and evict until back under budget; returns evicted symbols"""
+        for symbol in self.dirty:
+            self.measure(symbol)
+        self.dirty.clear()
+        self.expire_evicted()
+
+        target = None
+        if self.total_bytes > self.budget_bytes:
+            target = self.budget_bytes * self.low_watermark
+        memory = process_memory() if self.memory_threshold else None
+        if memory is not None and memory['percent'] > self.memory_threshold:
+            self.pressure_events += 1
+            logger.warning(f"Process memory at {memory['percent']:.1f}% "
+                           f"(threshold {self.memory_threshold}%), evicting inactive symbol state")
+            pressure_target = self.total_bytes * (1.0 - self.pressure_fraction)
+            target = pressure_target if target is None else min(target, pressure_target)
+        if target is None:
+            return []
+
+        evicted = []
+        cutoff = time.monotonic() - self.min_idle
+        for symbol, updated in list(self.last_update.items()):
+            if self.total_bytes <= target or updated > cutoff:
+                break  # LRU order: everything after this was updated more recently
+            if symbol in self._rehydrating:
+                continue
+            self.evict(symbol)
+            evicted.append(symbol)
+
+        if evicted:
+            logger.info(f"Evicted state for {len(evicted)} inactive symbols "
+                        f"({self.total_bytes / 1048576:.1f} MB tracked)")
+        return evicted
+
+    def evict(self, symbol: str):
+        state = {name: store.pop(symbol) for name, store in self.stores.items() if symbol in store}
+        for forget in self.forget:
+            forget(symbol)
+
+        self.total_bytes -= self.sizes.pop(symbol, 0)
+        self.last_update.pop(symbol, None)
+        self.dirty.discard(symbol)
+
+        mode = EVICT_DROP
+        if self.eviction == EVICT_SPILL and state:
+            try:
+                with open(self._spill_path(symbol), 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                mode = EVICT_SPILL
+                self.spilled += 1
+            except OSError as e:
+                logger.error(f"Error spilling state for {symbol}: {e}")
+        self.evicted[symbol] = (mode, time.monotonic())
+        self.evictions += 1
+        if len(self.evicted) > self.max_evicted:
+            self.expire_evicted()
+
+    def expire_evicted(self) -> int:
+        """Forget evicted symbols past evicted_ttl or beyond max_evicted, deleting their spill files"""
+        cutoff = time.monotonic() - self.evicted_ttl
+        expired = 0
+        for symbol, (mode, evicted_at) in list(self.evicted.items()):
+            if evicted_at > cutoff and len(self.evicted) <= self.max_evicted:
+                break  # oldest first: the rest are newer
+            if symbol in self._rehydrating:
+                continue
+            del self.evicted[symbol]
+            if mode == EVICT_SPILL:
+                try:
+                    self._spill_path(symbol).unlink()
+                except OSError:
+                    pass
+            expired += 1
+        self.expired += expired
+        return expired
+
+    # Rehydration
+    def _spill_path(self, symbol: str) -> Path:
+        return self.spill_directory / f"{quote(symbol, safe='')}.pkl"
+
+    def _load_spilled(self, symbol: str) -> Optional[Dict[str, Any]]:
+        path = self._spill_path(symbol)
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            path.unlink()
+            return state
+        except OSError as e:
+            logger.error(f"Error reading spilled state for {symbol}: {e}")
+            return None
+
+    async def _rehydrate(self, symbol: str):
+        try:
+            mode, _ = self.evicted.get(symbol, (None, 0.0))
+            state = self._load_spilled(symbol) if mode == EVICT_SPILL else None
+            if state is None and self.loader is not None:
+                state = await self.loader(symbol)
+            if state:
+                self.restore(symbol, state)
+            self.evicted.pop(symbol, None)
+            self.rehydrations += 1
+        except Exception as e:
+            self.rehydrate_failures += 1
+            self.evicted.pop(symbol, None)
+            logger.error(f"Error rehydrating state for {symbol}: {e}")
+        finally:
+            self._rehydrating.pop(symbol, None)
+
+    def restore(self, symbol: str, state: Dict[str, Any]):
+        """Put history back under anything that arrived since eviction"""
+        for name, history in state.items():
+            store = self.stores.get(name)
+            if store is None:
+                continue
+            store[symbol] = merge_state(history, store[symbol], self.max_length) if symbol in store else history
+        self.dirty.add(symbol)
+        if symbol not in self.last_update:
+            self.last_update[symbol] = time.monotonic()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {
+            'state_symbols': len(self.last_update),
+            'state_bytes': self.total_bytes,
+            'state_budget_bytes': self.budget_bytes,
+            'state_evicted_symbols': len(self.evicted),
+            'state_evictions': self.evictions,
+            'state_evicted_expired': self.expired,
+            'state_spilled': self.spilled,
+            'state_rehydrations': self.rehydrations,
+            'state_rehydrate_failures': self.rehydrate_failures,
+            'state_memory_pressure_events': self.pressure_events,
+        }
+        memory = process_memory()
+        if memory is not None:
+            metrics['process_rss_bytes'] = memory['rss_bytes']
+            metrics['process_memory_percent'] = memory['percent']
+        return metrics
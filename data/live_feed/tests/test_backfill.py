@@ -0,0 +1,42 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from live_feed.backfill import BackfillCheckpoints, BulkBackfill, bars_to_csv
+
+
+class FakeImporter:
+    def __init__(self, rejected=0):
+        self.rejected = rejected
+
+    async def load(self, payload):
+        rows = payload.count("\n") - 1
+        return {'imported': rows - self.rejected, 'rejected': self.rejected}
+
+
+def make_backfill(tmp_path, importer):
+    checkpoints = BackfillCheckpoints(tmp_path / 'checkpoints.json')
+    return BulkBackfill(rest_client_factory=lambda: None, rate_limiter=None,
+                        importer=importer, checkpoints=checkpoints), checkpoints
+
+
+def test_bars_are_written_in_local_naive_time():
+    timestamp_ms = 1767277800000
+    csv = bars_to_csv('AAPL', 'stock', [{'t': timestamp_ms, 'o': 1, 'h': 2, 'l': 0.5, 'c': 1.5, 'v': 10}])
+    local = datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%dT%H:%M:%S.%f')
+    assert csv.splitlines()[1] == f"AAPL,{local},1,2,0.5,1.5,10,stock"
+
+
+def test_rejected_rows_keep_the_checkpoint(tmp_path):
+    backfill, checkpoints = make_backfill(tmp_path, FakeImporter(rejected=1))
+    with pytest.raises(RuntimeError):
+        asyncio.run(backfill._import('AAPL', [{'t': 0}, {'t': 60000}], date(2026, 1, 31)))
+    assert checkpoints.resume_from('AAPL', date(2026, 1, 1)) == date(2026, 1, 1)
+    assert backfill.stats.rows_rejected == 1
+
+
+def test_clean_chunk_advances_the_checkpoint(tmp_path):
+    backfill, checkpoints = make_backfill(tmp_path, FakeImporter())
+    asyncio.run(backfill._import('AAPL', [{'t': 0}], date(2026, 1, 31)))
+    assert checkpoints.resume_from('AAPL', date(2026, 1, 1)) == date(2026, 2, 1)
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+
+from live_feed.cold_storage import ColdStorageExporter, ColdStorageReader  # noqa: E402
+
+
+class FakeQueryClient:
+    """Answers the exporter's queries the way QuestDBQueryClient parses the CSV export"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetch_frame(self, query):
+        if query.startswith("SHOW COLUMNS"):
+            return pd.DataFrame({'column': ['timestamp', 'symbol', 'price', 'received_at'],
+                                 'type': ['TIMESTAMP', 'SYMBOL', 'DOUBLE', 'TIMESTAMP']})
+        return pd.DataFrame({'first_timestamp': [self.rows[0][0]]})
+
+    def iter_chunks(self, query):
+        chunk = pd.DataFrame(self.rows, columns=['timestamp', 'symbol', 'price', 'received_at'])
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], utc=True)
+        yield chunk
+
+
+def test_exported_timestamps_keep_the_stored_wall_clock_time(tmp_path):
+    # Writers store naive local time; QuestDB prints it with a Z suffix
+    rows = [('2026-10-16T09:30:00.000000Z', 'AAPL', 190.0, '2026-10-16T09:30:00.250000Z'),
+            ('2026-10-16T15:59:59.500000Z', 'MSFT', 400.0, '2026-10-16T16:00:00.000000Z')]
+    exporter = ColdStorageExporter(FakeQueryClient(rows), tmp_path, tables=['polygon_stocks'])
+    assert exporter.export_day('polygon_stocks', date(2026, 10, 16)) == 2
+
+    table = ColdStorageReader(tmp_path).load('polygon_stocks', symbols=['AAPL'])
+    assert table.schema.field('timestamp').type.tz is None
+    assert table.schema.field('received_at').type.tz is None
+    assert table.column('timestamp').to_pylist() == [datetime(2026, 10, 16, 9, 30)]
+    assert table.column('received_at').to_pylist() == [datetime(2026, 10, 16, 9, 30, 0, 250000)]
+
+
+def test_reader_filters_on_column_values(tmp_path):
+    rows = [('2026-10-16T09:30:00.000000Z', 'AAPL', 190.0, '2026-10-16T09:30:00.000000Z'),
+            ('2026-10-16T09:31:00.000000Z', 'AAPL', 191.0, '2026-10-16T09:31:00.000000Z')]
+    ColdStorageExporter(FakeQueryClient(rows), tmp_path, tables=['polygon_stocks']).export_day(
+        'polygon_stocks', date(2026, 10, 16))
+
+    table = ColdStorageReader(tmp_path).load('polygon_stocks', filters={'price': [191.0]})
+    assert table.column('timestamp').to_pylist() == [datetime(2026, 10, 16, 9, 31)]
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from live_feed.correlation import MINUTE_MS, RollingCorrelationEngine
+
+
+def feed_minutes(engine, closes, start_minute=0):
+    for offset, prices in enumerate(closes):
+        for symbol, price in prices.items():
+            engine.on_bar(symbol, (start_minute + offset) * MINUTE_MS, price)
+
+
+def test_return_after_a_missed_bucket_is_unobserved():
+    engine = RollingCorrelationEngine(window=10, min_periods=2, recompute_interval=0)
+    feed_minutes(engine, [{'AAPL': 100.0}, {'AAPL': 101.0}])
+    # Overnight: next bar is hundreds of buckets later
+    feed_minutes(engine, [{'AAPL': 120.0}, {'AAPL': 121.2}], start_minute=1000)
+    engine.flush(2000 * MINUTE_MS)
+
+    column = engine.positions['AAPL']
+    observed = engine.observed[:engine.rows, column]
+    returns = engine.returns[:engine.rows, column][observed]
+    assert observed.sum() == 2
+    assert np.allclose(returns, [np.log(101.0 / 100.0), np.log(121.2 / 120.0)])
+
+
+def test_running_sums_match_a_full_recompute():
+    rng = np.random.default_rng(3)
+    engine = RollingCorrelationEngine(window=20, min_periods=2, recompute_interval=0, initial_capacity=2)
+    symbols = [f"S{i}" for i in range(300)]  # spans more than one update block
+    prices = dict.fromkeys(symbols, 100.0)
+    for minute in range(50):
+        for symbol in symbols:
+            if rng.random() < 0.9:
+                prices[symbol] *= float(np.exp(rng.normal(0, 0.001)))
+                engine.on_bar(symbol, minute * MINUTE_MS, prices[symbol])
+
+    size = len(engine.symbols)
+    cross = engine.cross[:size, :size].copy()
+    sums = engine.sums[:size].copy()
+    engine.recompute()
+    assert np.allclose(cross, engine.cross[:size, :size], atol=1e-12)
+    assert np.allclose(sums, engine.sums[:size], atol=1e-12)
+    for name in ('pair_sums', 'pair_counts'):
+        matrix = getattr(engine, name)[:size, :size].copy()
+        engine.recompute()
+        assert np.allclose(matrix, getattr(engine, name)[:size, :size], atol=1e-12)
+
+
+def pairwise_reference(engine, first, second):
+    """Covariance of two symbols over the rows both were observed, straight from the ring"""
+    i, j = engine.positions[first], engine.positions[second]
+    both = engine.observed[:engine.rows, i] & engine.observed[:engine.rows, j]
+    return np.cov(engine.returns[:engine.rows, i][both], engine.returns[:engine.rows, j][both])[0, 1]
+
+
+def test_sparse_symbol_statistics_use_only_its_observed_rows():
+    # 400 crypto-only minutes (overnight), then 40 minutes where the benchmark also trades
+    rng = np.random.default_rng(7)
+    engine = RollingCorrelationEngine(window=440, benchmark='SPY', min_periods=30,
+                                      recompute_interval=0, periods_per_year=1)
+    btc, spy = 60000.0, 500.0
+    spy_returns, btc_returns = [], []
+    for minute in range(440):
+        step = float(rng.normal(0, 0.001))
+        btc *= float(np.exp(step))
+        engine.on_bar('BTC', minute * MINUTE_MS, btc)
+        btc_returns.append(step)
+        if minute >= 400:
+            spy_step = float(rng.normal(0, 0.001))
+            if minute > 400:
+                spy *= float(np.exp(spy_step))
+                spy_returns.append(spy_step)
+            engine.on_bar('SPY', minute * MINUTE_MS, spy)
+    engine.flush(442 * MINUTE_MS)
+
+    volatility = dict(zip(engine.symbols, engine.volatility()))
+    assert volatility['SPY'] == pytest.approx(np.std(spy_returns, ddof=1), rel=1e-6)
+    assert volatility['BTC'] == pytest.approx(np.std(btc_returns[1:], ddof=1), rel=1e-6)
+
+    covariance = engine.covariance()
+    i, j = engine.positions['BTC'], engine.positions['SPY']
+    assert covariance[i, j] == pytest.approx(pairwise_reference(engine, 'BTC', 'SPY'), rel=1e-6)
+    assert covariance[i, j] == covariance[j, i]
+    assert engine.beta()[i] == pytest.approx(covariance[i, j] / np.var(spy_returns, ddof=1), rel=1e-6)
+
+    # A rebuild from the ring agrees with the running sums
+    engine.recompute()
+    assert engine.covariance()[i, j] == pytest.approx(covariance[i, j], rel=1e-9)
+
+
+def test_beta_needs_min_periods_of_overlap_with_the_benchmark():
+    engine = RollingCorrelationEngine(window=100, benchmark='SPY', min_periods=5, recompute_interval=0,
+                                      periods_per_year=1)
+    rng = np.random.default_rng(1)
+    prices = {'SPY': 500.0, 'AAA': 10.0, 'BBB': 20.0}
+    for minute in range(60):
+        for symbol in prices:
+            # The benchmark and AAA trade the first half; BBB trades enough, but overlaps it for two returns
+            if symbol in ('SPY', 'AAA') and minute >= 30 or symbol == 'BBB' and minute < 27:
+                continue
+            prices[symbol] *= float(np.exp(rng.normal(0, 0.001)))
+            engine.on_bar(symbol, minute * MINUTE_MS, prices[symbol])
+    engine.flush(62 * MINUTE_MS)
+
+    beta = dict(zip(engine.symbols, engine.beta()))
+    assert engine.counts[engine.positions['BBB']] >= 5
+    assert np.isfinite(beta['AAA'])
+    assert np.isnan(beta['BBB'])
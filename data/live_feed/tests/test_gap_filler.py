@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from live_feed.gap_filler import GapTracker
+
+
+def ms(value):
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def test_short_holes_are_not_gaps():
+    tracker = GapTracker(min_gap_ms=5 * 60_000)
+    assert tracker.observe_bar('AAPL', 'stock', ms('2026-10-13T14:00')) is None
+    assert tracker.observe_bar('AAPL', 'stock', ms('2026-10-13T14:03')) is None
+    gap = tracker.observe_bar('AAPL', 'stock', ms('2026-10-13T14:20'))
+    assert (gap.start_ms, gap.end_ms) == (ms('2026-10-13T14:04'), ms('2026-10-13T14:20'))
+
+
+def test_session_breaks_are_not_gaps():
+    tracker = GapTracker()
+    tracker.observe_bar('AAPL', 'stock', ms('2026-10-13T23:59'))  # 19:59 ET
+    assert tracker.observe_bar('AAPL', 'stock', ms('2026-10-14T08:00')) is None  # overnight
+    tracker.observe_bar('AAPL', 'stock', ms('2026-10-16T19:00'))  # Friday
+    assert tracker.observe_bar('AAPL', 'stock', ms('2026-10-19T13:30')) is None  # weekend
+
+
+def test_crypto_has_no_session():
+    tracker = GapTracker()
+    tracker.observe_bar('BTC-USD', 'crypto', ms('2026-10-17T00:00'))
+    assert tracker.observe_bar('BTC-USD', 'crypto', ms('2026-10-17T02:00')) is not None
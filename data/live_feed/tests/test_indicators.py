@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from live_feed.indicators import build_registry
+
+CONFIG = {
+    'rsi_periods': [14],
+    'macd': {'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+    'bb_period': 20,
+    'bb_std_dev': 2,
+}
+
+
+def make_inputs(points, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, points)))
+    high = close * (1 + rng.uniform(0, 0.005, points))
+    low = close * (1 - rng.uniform(0, 0.005, points))
+    open_ = np.clip(close * (1 + rng.normal(0, 0.002, points)), low, high)
+    volume = rng.uniform(1e3, 1e5, points)
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def test_outputs_use_the_stored_column_names():
+    outputs = build_registry({}).outputs
+    for name in ('macd', 'macd_signal', 'macd_histogram', 'williams_r', 'ad_line', 'momentum', 'roc',
+                 'bb_upper', 'bb_middle', 'bb_lower', 'hammer_pattern'):
+        assert name in outputs
+    assert 'macd_line' not in outputs and 'willr' not in outputs
+
+
+@pytest.mark.parametrize('points', [40, 60, 120, 400])
+def test_registry_matches_direct_talib_calls(points):
+    talib = pytest.importorskip('talib')
+    inputs = make_inputs(points)
+    close = inputs['close']
+    results = build_registry(CONFIG).evaluate(inputs)
+
+    macd, signal, histogram = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    upper, middle, lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2)
+    expected = {
+        'macd': macd[-1], 'macd_signal': signal[-1], 'macd_histogram': histogram[-1],
+        'bb_upper': upper[-1], 'bb_middle': middle[-1], 'bb_lower': lower[-1],
+        'rsi_14': talib.RSI(close, timeperiod=14)[-1],
+    }
+    for name, value in expected.items():
+        if np.isnan(value):
+            assert results[name] is None, name
+        else:
+            assert results[name] == pytest.approx(value, rel=1e-9, abs=1e-12), name
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from live_feed.microstructure import MicrostructureEngine
+
+T0 = datetime(2026, 10, 13, 10, 0, 0)
+T1 = datetime(2026, 10, 13, 10, 0, 1)
+T2 = datetime(2026, 10, 13, 10, 0, 2)
+
+
+def test_trade_is_classified_against_the_prevailing_quote():
+    engine = MicrostructureEngine()
+    engine.on_quote("AAPL", 99.0, 100.0, 100, 100, T0)
+    assert engine.on_trade("AAPL", 99.9, 10, T1) == 1
+    assert engine.on_trade("AAPL", 99.1, 10, T1) == -1
+
+
+def test_quote_newer_than_the_trade_is_not_used():
+    engine = MicrostructureEngine()
+    engine.on_quote("AAPL", 99.0, 100.0, 100, 100, T0)
+    engine.on_trade("AAPL", 99.5, 10, T0)
+    # A quote stamped after the next print must not decide its side
+    engine.on_quote("AAPL", 100.0, 101.0, 100, 100, T2)
+    assert engine.on_trade("AAPL", 99.8, 10, T1) == 1  # uptick
+    assert engine.quotes_ahead == 1
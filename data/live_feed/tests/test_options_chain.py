@@ -0,0 +1,149 @@
+import asyncio
+import socket
+from datetime import date, timedelta
+
+from live_feed.options_chain import ChainRow, OptionsChainIndex, OptionsChainLoader
+from live_feed.rate_limiter import AsyncRateLimiter
+
+TODAY = date.today()
+EXPIRY = TODAY + timedelta(days=30)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def contract(strike, option_type='call', price=1.0, expiration=EXPIRY, open_interest=100):
+    code = 'C' if option_type == 'call' else 'P'
+    return {
+        'details': {'ticker': f"O:SPY{expiration:%y%m%d}{code}{int(strike * 1000):08d}",
+                    'expiration_date': expiration.isoformat(), 'strike_price': strike,
+                    'contract_type': option_type},
+        'day': {'close': price, 'volume': 10},
+        'last_quote': {'bid': price - 0.05, 'ask': price + 0.05},
+        'greeks': {'delta': 0.5},
+        'open_interest': open_interest,
+        'underlying_asset': {'price': 500.0},
+    }
+
+
+def row(strike, option_type='call', **kwargs):
+    return ChainRow.from_snapshot(contract(strike, option_type, **kwargs), 'SPY')
+
+
+class ChainServer:
+    """Serves /v3/snapshot/options/SPY in pages of `page_size`, filtered by contract_type"""
+
+    def __init__(self, contracts, page_size=2, fail_page=None):
+        self.contracts = contracts
+        self.page_size = page_size
+        self.fail_page = fail_page
+        self.port = free_port()
+        self.requests = 0
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _snapshot(self, request):
+        from aiohttp import web
+
+        self.requests += 1
+        option_type = request.query['contract_type']
+        offset = int(request.query.get('cursor', 0))
+        if self.fail_page is not None and offset == self.fail_page * self.page_size:
+            return web.json_response({'status': 'ERROR'}, status=500)
+        matching = [c for c in self.contracts if c['details']['contract_type'] == option_type]
+        page = {'results': matching[offset:offset + self.page_size]}
+        if offset + self.page_size < len(matching):
+            page['next_url'] = (f"{self.base_url}/v3/snapshot/options/SPY?contract_type={option_type}"
+                                f"&cursor={offset + self.page_size}")
+        return web.json_response(page)
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/v3/snapshot/options/{underlying}', self._snapshot)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port).start()
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+def refresh(loader, server):
+    async def run():
+        await server.start()
+        try:
+            return await loader.refresh(['SPY'])
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def make_loader(server):
+    return OptionsChainLoader('key', AsyncRateLimiter(6000, burst=50), base_url=server.base_url, max_retries=0)
+
+
+def test_upsert_reports_only_changed_rows():
+    index = OptionsChainIndex()
+    assert index.upsert(row(500))
+    assert not index.upsert(row(500))
+    assert index.upsert(row(500, price=1.2))
+    assert index.upsert(row(500, 'put'))
+    assert len(index) == 2
+
+
+def test_retain_and_prune_expired():
+    index = OptionsChainIndex()
+    for strike in (490, 500, 510):
+        index.upsert(row(strike))
+    index.upsert(row(500, 'put'))
+    expired = row(480, expiration=TODAY - timedelta(days=1))
+    index.upsert(expired)
+
+    assert index.retain('SPY', 'call', {row(500).key, row(510).key, expired.key}) == 1
+    assert index.prune_expired(TODAY) == 1
+    assert [r.strike for r in index.chain('SPY', option_type='call')] == [500, 510]
+    assert index.get('SPY', EXPIRY, 500, 'put') is not None
+
+
+def test_refresh_writes_only_changed_rows_and_drops_vanished_contracts():
+    contracts = [contract(strike) for strike in (490, 500, 510)] + [contract(500, 'put')]
+    server = ChainServer(contracts)
+    loader = make_loader(server)
+
+    first = refresh(loader, server)
+    assert len(first) == 4
+    assert server.requests == 3  # two call pages, one put page
+
+    server.contracts = [contract(490), contract(500, price=1.5), contract(500, 'put')]
+    second = refresh(loader, server)
+    assert [(r.strike, r.option_type) for r in second] == [(500, 'call')]
+    assert loader.index.get('SPY', EXPIRY, 510, 'call') is None
+    assert len(loader.index) == 3
+    assert loader.get_metrics()['chain_contracts_removed'] == 1
+
+    assert refresh(loader, server) == []
+
+
+def test_incomplete_partition_keeps_its_contracts():
+    contracts = [contract(strike) for strike in (490, 500, 510)]
+    server = ChainServer(contracts)
+    loader = make_loader(server)
+    refresh(loader, server)
+
+    # The second call page fails: the rows read so far are still reported, nothing is dropped
+    server.contracts = [contract(490, price=2.0), contract(500), contract(520)]
+    server.fail_page = 1
+    changed = refresh(loader, server)
+
+    assert [r.strike for r in changed] == [490]
+    assert len(loader.index) == 3
+    assert loader.errors == 1
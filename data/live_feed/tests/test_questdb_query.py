@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from live_feed.questdb_query import QuestDBQueryClient
+
+
+def test_window_query_filters_on_column_values():
+    client = QuestDBQueryClient(host='localhost', http_port=9000)
+    query = client.build_window_query('polygon_stocks', ['AAPL'], ['price', 'volume'],
+                                      start=datetime(2026, 10, 16, 9, 30),
+                                      filters={'data_type': ['stock_trade', 'stock_trade_backfill']})
+
+    assert query == ("SELECT timestamp, symbol, price, volume FROM polygon_stocks"
+                     " WHERE symbol IN ('AAPL') AND timestamp >= '2026-10-16T09:30:00.000000'"
+                     " AND data_type IN ('stock_trade', 'stock_trade_backfill') ORDER BY timestamp")
+
+
+def test_filter_columns_are_validated_and_values_quoted():
+    client = QuestDBQueryClient(host='localhost', http_port=9000)
+    with pytest.raises(ValueError):
+        client.build_window_query('polygon_stocks', [], ['price'], filters={'data_type; DROP': ['x']})
+    query = client.build_window_query('polygon_stocks', [], ['price'], filters={'data_type': ["o'brien"]})
+    assert query.endswith("WHERE data_type IN ('o''brien') ORDER BY timestamp")
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from live_feed.questdb_writer import QuestDBWriter
+from live_feed.spool import WriteAheadSpool
+
+GOOD = "INSERT INTO good (a) VALUES (%s)"
+MISSING = "INSERT INTO missing (a) VALUES (%s)"
+
+
+class StatementError(Exception):
+    pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def _check(self, query, params):
+        if self.db.down:
+            raise ConnectionError("connection refused")
+        if query == MISSING:
+            raise StatementError("table does not exist [table=missing]")
+        if params[0] < 0:
+            raise StatementError(f"bad value {params[0]}")
+
+    def executemany(self, query, rows):
+        for params in rows:
+            self.execute(query, params)
+
+    def execute(self, query, params):
+        self._check(query, params)
+        self.db.staged.append((query, params[0]))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        self.db.rows.extend(self.db.staged)
+        self.db.staged = []
+
+    def rollback(self):
+        self.db.staged = []
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = []
+        self.staged = []
+        self.down = False
+
+    def connect(self):
+        if self.down:
+            raise ConnectionError("connection refused")
+        return FakeConnection(self)
+
+
+def make_writer(tmp_path, db):
+    spool = WriteAheadSpool(tmp_path / 'spool', segment_size=4096, max_bytes=4096 * 50)
+    return QuestDBWriter(db.connect, spool, batch_size=1000, retry_interval=0)
+
+
+def test_permanent_errors_do_not_block_good_rows(tmp_path):
+    db = FakeDatabase()
+    writer = make_writer(tmp_path, db)
+
+    for i in range(5):
+        writer.write(GOOD, (i,))
+        writer.write(MISSING, (i,))
+    writer.write(GOOD, (-1,))
+    asyncio.run(writer.flush())
+
+    assert writer.healthy
+    assert sorted(a for q, a in db.rows if q == GOOD) == [0, 1, 2, 3, 4]
+    assert writer.rejected_rows == 6
+    lines = (tmp_path / 'spool' / 'dead_letters.jsonl').read_text().splitlines()
+    assert len(lines) == 6
+    assert {json.loads(line)['q'] for line in lines} == {GOOD, MISSING}
+
+
+def test_transient_failure_spools_and_replays(tmp_path):
+    db = FakeDatabase()
+    writer = make_writer(tmp_path, db)
+
+    db.down = True
+    for i in range(3):
+        writer.write(GOOD, (i,))
+    asyncio.run(writer.flush())
+    assert not writer.healthy
+    writer.write(GOOD, (3,))
+    assert writer.spool.pending_records == 4
+
+    db.down = False
+    asyncio.run(writer.replay())
+    assert writer.healthy
+    assert writer.spool.is_empty()
+    assert [a for _, a in db.rows] == [0, 1, 2, 3]
+
+
+def test_bad_spool_head_is_dead_lettered_not_retried_forever(tmp_path):
+    db = FakeDatabase()
+    writer = make_writer(tmp_path, db)
+
+    db.down = True
+    writer.write(MISSING, (1,))
+    asyncio.run(writer.flush())
+    writer.write(GOOD, (2,))
+
+    db.down = False
+    asyncio.run(writer.replay())
+    assert writer.spool.is_empty()
+    assert writer.healthy
+    assert [a for _, a in db.rows] == [2]
+    assert writer.rejected_rows == 1
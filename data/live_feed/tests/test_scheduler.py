@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from live_feed.scheduler import MarketClock, Scheduler
+
+
+def make_scheduler(max_age=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    scheduler = Scheduler(MarketClock())
+    scheduler.add_endpoint('snapshot', fetch, max_age=max_age)
+    return scheduler, calls
+
+
+def test_jobs_sharing_an_endpoint_run_on_one_fetch():
+    scheduler, calls = make_scheduler()
+    seen = {}
+
+    def consumer(name):
+        async def callback(result):
+            seen[name] = result
+        return callback
+
+    scheduler.add_job('a', consumer('a'), 60, endpoint='snapshot')
+    scheduler.add_job('b', consumer('b'), 60, endpoint='snapshot')
+
+    async def run():
+        await asyncio.gather(scheduler._execute(scheduler.jobs['a']), scheduler._execute(scheduler.jobs['b']))
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert seen == {'a': 1, 'b': 1}
+    assert scheduler.jobs['a'].coalesced + scheduler.jobs['b'].coalesced == 1
+    assert scheduler.get_metrics()['endpoint_snapshot'] == {'fetches': 1, 'shared': 1}
+
+
+def test_fresh_result_is_reused_until_max_age():
+    scheduler, calls = make_scheduler(max_age=60)
+
+    async def run():
+        first = await scheduler.fetch('snapshot')
+        second = await scheduler.fetch('snapshot')
+        scheduler.endpoints['snapshot'].fetched_at -= 61
+        third = await scheduler.fetch('snapshot')
+        return first, second, third
+
+    assert asyncio.run(run()) == ((1, True), (1, False), (2, True))
+
+
+def test_failed_fetch_is_not_cached():
+    scheduler = Scheduler(MarketClock())
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return 'ok'
+
+    scheduler.add_endpoint('snapshot', fetch, max_age=60)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await scheduler.fetch('snapshot')
+        return await scheduler.fetch('snapshot')
+
+    assert asyncio.run(run()) == ('ok', True)
+
+
+def test_unknown_endpoint_is_rejected():
+    scheduler = Scheduler(MarketClock())
+    with pytest.raises(ValueError):
+        scheduler.add_job('a', lambda result: None, 60, endpoint='missing')
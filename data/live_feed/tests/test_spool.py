@@ -0,0 +1,107 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from live_feed.spool import CHECKPOINT_FILE, RECORD_HEADER, WriteAheadSpool
+
+SEGMENT_SIZE = 4096
+
+
+def record(i):
+    return {'q': 'INSERT INTO t (a, ts) VALUES (%s, %s)', 'p': [i, datetime(2026, 1, 2, 3, 4, i % 60)]}
+
+
+def drain(spool, batch_size=7):
+    rows = []
+    while True:
+        records, position = spool.read_batch(batch_size)
+        if not records:
+            return rows
+        spool.commit(position, len(records))
+        rows.extend(r['p'][0] for r in records)
+
+
+def test_segments_rotate_and_replay_in_order(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    for i in range(200):
+        spool.append(record(i))
+
+    assert len(spool.segments) > 1
+    assert spool.pending_records == 200
+
+    records, _ = spool.read_batch(3)
+    assert records[0]['p'] == [0, datetime(2026, 1, 2, 3, 4, 0)]
+
+    assert drain(spool) == list(range(200))
+    assert spool.is_empty()
+    assert len(spool.segments) == 0
+    spool.close()
+
+
+def test_size_cap_drops_oldest_segment(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 2)
+    for i in range(300):
+        spool.append(record(i))
+
+    assert len(spool.segments) == 2
+    dropped = spool.get_metrics()['spool_dropped']
+    assert dropped > 0
+    remaining = drain(spool)
+    assert remaining == list(range(300 - len(remaining), 300))
+    assert dropped + len(remaining) == 300
+    spool.close()
+
+
+def test_checkpoint_resumes_after_restart(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    for i in range(100):
+        spool.append(record(i))
+    records, position = spool.read_batch(40)
+    spool.commit(position, len(records))
+    spool.close()
+
+    checkpoint = json.loads((tmp_path / CHECKPOINT_FILE).read_text())
+    assert checkpoint['sequence'] == position[0]
+
+    reopened = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    assert reopened.pending_records == 60
+    assert drain(reopened) == list(range(40, 100))
+    reopened.close()
+
+
+def test_uncommitted_batch_is_replayed_again(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    for i in range(10):
+        spool.append(record(i))
+    first, _ = spool.read_batch(5)
+    again, _ = spool.read_batch(5)
+    assert [r['p'][0] for r in first] == [r['p'][0] for r in again] == [0, 1, 2, 3, 4]
+    spool.close()
+
+
+def test_corrupt_record_truncates_segment_on_recovery(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    for i in range(5):
+        spool.append(record(i))
+    segment = spool.segments[0]
+    # Flip a payload byte of the third record
+    offset = 0
+    for _ in range(2):
+        length, _ = RECORD_HEADER.unpack_from(segment.mm, offset)
+        offset += RECORD_HEADER.size + length
+    position = offset + RECORD_HEADER.size + 1
+    segment.mm[position] = segment.mm[position] ^ 0xFF
+    spool.close()
+
+    reopened = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    assert reopened.pending_records == 2
+    assert drain(reopened) == [0, 1]
+    reopened.close()
+
+
+def test_oversized_record_is_rejected(tmp_path):
+    spool = WriteAheadSpool(tmp_path, segment_size=SEGMENT_SIZE, max_bytes=SEGMENT_SIZE * 100)
+    with pytest.raises(ValueError):
+        spool.append({'q': 'x' * SEGMENT_SIZE, 'p': []})
+    spool.close()
@@ -0,0 +1,34 @@
+import time
+
+from live_feed.state_manager import SymbolStateManager
+
+
+def make_manager(tmp_path, **kwargs):
+    prices = {}
+    manager = SymbolStateManager({'prices': prices}, budget_bytes=1, min_idle=0,
+                                 spill_directory=tmp_path, **kwargs)
+    return manager, prices
+
+
+def test_evicted_symbols_expire_with_their_spill_files(tmp_path):
+    manager, prices = make_manager(tmp_path, evicted_ttl=60)
+    prices['AAPL'] = [1.0, 2.0]
+    manager.touch('AAPL')
+    assert manager.enforce() == ['AAPL']
+    assert list(tmp_path.glob('*.pkl'))
+
+    manager.evicted['AAPL'] = (manager.evicted['AAPL'][0], time.monotonic() - 61)
+    assert manager.expire_evicted() == 1
+    assert not manager.evicted
+    assert not list(tmp_path.glob('*.pkl'))
+
+
+def test_evicted_symbols_are_capped_oldest_first(tmp_path):
+    manager, prices = make_manager(tmp_path, max_evicted=2)
+    for symbol in ('A', 'B', 'C'):
+        prices[symbol] = [1.0]
+        manager.touch(symbol)
+        manager.enforce()
+
+    assert list(manager.evicted) == ['B', 'C']
+    assert sorted(path.stem for path in tmp_path.glob('*.pkl')) == ['B', 'C']
@@ -0,0 +1,28 @@
+from live_feed.validation import REASON_PRICE_RANGE, MicroBatchValidator
+
+
+def test_crypto_pairs_use_their_own_price_range():
+    validator = MicroBatchValidator(max_price=100000, crypto_max_price=10_000_000)
+    validator.add("AAPL", 150000.0, 10, "stock", crypto=False)
+    validator.add("crypto_BTC-USD", 150000.0, 0.5, "btc", crypto=True)
+    validator.add("crypto_SHIB-USD", 0.00002, 1e6, "shib", crypto=True)
+
+    accepted, rejected = validator.validate()
+
+    assert accepted == ["btc", "shib"]
+    assert [(tick.key, tick.reasons) for tick in rejected] == [("AAPL", REASON_PRICE_RANGE)]
+
+
+def test_unchecked_items_keep_stream_order():
+    validator = MicroBatchValidator()
+    validator.seed("AAPL", 100.0)
+    validator.add("AAPL", 100.0, 10, "trade-1")
+    validator.add_unchecked("quote")
+    validator.add("AAPL", 1000.0, 10, "bad-trade")
+    validator.add("AAPL", 100.5, 10, "trade-2")
+
+    accepted, rejected = validator.validate()
+
+    assert accepted == ["trade-1", "quote", "trade-2"]
+    assert [tick.item for tick in rejected] == ["bad-trade"]
+    assert validator.validated == 3
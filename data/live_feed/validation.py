@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Vectorized Micro-Batch Data Validation
+Checks incoming trades and bars in small batches with NumPy instead of per-row Python
+Applies processing.price_validation and processing.volume_validation from settings.yaml
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rejection reason bits
+REASON_PRICE_RANGE = 1
+REASON_VOLUME_RANGE = 2
+REASON_PRICE_CHANGE = 4
+
+REASON_NAMES = {
+    REASON_PRICE_RANGE: "price_range",
+    REASON_VOLUME_RANGE: "volume_range",
+    REASON_PRICE_CHANGE: "price_change",
+}
+
+
+@dataclass
+class RejectedTick:
+    """Tick that failed validation"""
+    key: str
+    price: float
+    volume: float
+    reference_price: float
+    reasons: int
+    item: Any
+
+    @property
+    def reason(self) -> str:
+        return ",".join(name for bit, name in REASON_NAMES.items() if self.reasons & bit)
+
+
+class MicroBatchValidator:
+    """
+    Micro-batch validator for prices and volumes
+
+    Features:
+    - Price and volume bounds checked over a whole batch at once
+    - Separate price bounds for crypto pairs (sub-cent tokens, six-figure BTC)
+    - Change check against each symbol's last good price
+    - Reference resets after repeated rejections (e.g. splits, re-listings)
+    - Unchecked rows (quotes, status) share the batch so every message keeps stream order
+    - Per-row cost on the hot path is a few list appends
+    """
+
+    def __init__(self, min_price: float = 0.01, max_price: float = 100000.0,
+                 max_change_percent: float = 50.0, min_volume: float = 0,
+                 max_volume: float = 1_000_000_000, batch_size: int = 100,
+                 reset_after: int = 5, crypto_min_price: float = 1e-8,
+                 crypto_max_price: float = 10_000_000.0):
+        self.min_price = float(min_price)
+        self.max_price = float(max_price)
+        # Bounds indexed by asset class: 0 = stock, 1 = crypto
+        self.min_prices = np.array([self.min_price, float(crypto_min_price)])
+        self.max_prices = np.array([self.max_price, float(crypto_max_price)])
+        self.max_change_percent = float(max_change_percent)
+        self.min_volume = float(min_volume)
+        self.max_volume = float(max_volume)
+        self.batch_size = int(batch_size)
+        self.reset_after = int(reset_after)
+
+        # Per-symbol state in flat arrays indexed by symbol slot
+        self.symbol_slots: Dict[str, int] = {}
+        self.last_good = np.full(1024, np.nan)
+        self.reject_streak = np.zeros(1024, dtype=np.int64)
+        self.asset_class = np.zeros(1024, dtype=np.int64)
+
+        # Pending batch
+        self._keys: List[str] = []
+        self._slots: List[int] = []
+        self._prices: List[float] = []
+        self._volumes: List[float] = []
+        self._checked: List[bool] = []
+        self._items: List[Any] = []
+
+        self.validated = 0
+        self.rejected: Dict[str, int] = {name: 0 for name in REASON_NAMES.values()}
+
+    def _slot(self, key: str, crypto: bool = False) -> int:
+        slot = self.symbol_slots.get(key)
+        if slot is None:
+            slot = len(self.symbol_slots)
+            self.symbol_slots[key] = slot
+            if slot >= len(self.last_good):
+                grow = len(self.last_good)
+                self.last_good = np.concatenate([self.last_good, np.full(grow, np.nan)])
+                self.reject_streak = np.concatenate([self.reject_streak, np.zeros(grow, dtype=np.int64)])
+                self.asset_class = np.concatenate([self.asset_class, np.zeros(grow, dtype=np.int64)])
+            self.asset_class[slot] = int(crypto)
+        return slot
+
+    def add(self, key: str, price: float, volume: float, item: Any, crypto: bool = False) -> bool:
+        """Queue one tick; returns True when the batch is full"""
+        self._keys.append(key)
+        self._slots.append(self._slot(key, crypto))
+        self._prices.append(price)
+        self._volumes.append(volume)
+        self._checked.append(True)
+        self._items.append(item)
+        return len(self._items) >= self.batch_size
+
+    def add_unchecked(self, item: Any) -> bool:
+        """Queue an item that is not validated but must stay ordered with the ticks around it"""
+        self._keys.append("")
+        self._slots.append(0)
+        self._prices.append(np.nan)
+        self._volumes.append(np.nan)
+        self._checked.append(False)
+        self._items.append(item)
+        return len(self._items) >= self.batch_size
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def validate(self, keep_rejected: bool = False) -> Tuple[List[Any], List[RejectedTick]]:
+        """
+        Validate the pending batch; returns items to process (in order) and rejections
+
+        With keep_rejected the rejected items are still returned for processing (flag mode).
+        """
+        if not self._items:
+            return [], []
+
+        slots = np.asarray(self._slots, dtype=np.int64)
+        prices = np.asarray(self._prices, dtype=np.float64)
+        volumes = np.asarray(self._volumes, dtype=np.float64)
+        checked = np.asarray(self._checked, dtype=bool)
+        keys, items = self._keys, self._items
+        self._keys, self._slots, self._prices, self._volumes, self._checked, self._items = [], [], [], [], [], []
+
+        asset_class = self.asset_class[slots]
+        reasons = np.zeros(len(prices), dtype=np.int64)
+        in_range = (prices >= self.min_prices[asset_class]) & (prices <= self.max_prices[asset_class])
+        reasons[~in_range] |= REASON_PRICE_RANGE
+        reasons[~((volumes >= self.min_volume) & (volumes <= self.max_volume))] |= REASON_VOLUME_RANGE
+
+        # Every row in the batch is compared with the last good price before the batch
+        reference = self.last_good[slots]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.abs(prices / reference - 1.0) * 100.0
+        reasons[~np.isnan(reference) & (change > self.max_change_percent)] |= REASON_PRICE_CHANGE
+        reasons[~checked] = 0
+
+        valid = reasons == 0
+        self._update_state(slots[checked], prices[checked], valid[checked], reasons[checked])
+
+        self.validated += int(checked.sum())
+        accepted = list(items) if keep_rejected else [items[i] for i in np.flatnonzero(valid)]
+        rejected = []
+        for i in np.flatnonzero(~valid):
+            for bit, name in REASON_NAMES.items():
+                if reasons[i] & bit:
+                    self.rejected[name] += 1
+            rejected.append(RejectedTick(
+                key=keys[i],
+                price=float(prices[i]),
+                volume=float(volumes[i]),
+                reference_price=float(reference[i]),
+                reasons=int(reasons[i]),
+                item=items[i]
+            ))
+        return accepted, rejected
+
+    def _update_state(self, slots: np.ndarray, prices: np.ndarray, valid: np.ndarray, reasons: np.ndarray):
+        # Last accepted price per symbol becomes the new reference
+        valid_slots = slots[valid][::-1]
+        if len(valid_slots):
+            unique_slots, last_index = np.unique(valid_slots, return_index=True)
+            self.last_good[unique_slots] = prices[valid][::-1][last_index]
+            self.reject_streak[unique_slots] = 0
+
+        # Symbols rejected only on the change check keep a streak; a long streak means the
+        # reference itself is stale, so adopt the latest in-range price
+        change_only = reasons == REASON_PRICE_CHANGE
+        if change_only.any():
+            np.add.at(self.reject_streak, slots[change_only], 1)
+            stale_rows = change_only & (self.reject_streak[slots] >= self.reset_after)
+            if stale_rows.any():
+                stale_slots = slots[stale_rows][::-1]
+                unique_slots, last_index = np.unique(stale_slots, return_index=True)
+                self.last_good[unique_slots] = prices[stale_rows][::-1][last_index]
+                self.reject_streak[unique_slots] = 0
+                logger.warning(f"Reset reference price for {len(unique_slots)} symbols after repeated rejections")
+
+    def seed(self, key: str, price: float, crypto: bool = False):
+        """Set a known good reference price (e.g. from a snapshot)"""
+        slot = self._slot(key, crypto)
+        asset_class = self.asset_class[slot]
+        if self.min_prices[asset_class] <= price <= self.max_prices[asset_class]:
+            self.last_good[slot] = price
+
+    def get_metrics(self) -> Dict[str, int]:
+        metrics = {'validation_checked': self.validated}
+        metrics.update({f'validation_rejected_{name}': count for name, count in self.rejected.items()})
+        return metrics
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Raw Polygon WebSocket Client
+Speaks the Polygon auth/subscribe protocol over aiohttp and hands each event to the feed unparsed
+Used for any endpoint that implements the protocol (e.g. the local soak-test server)
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamMessage:
+    """One stream event in the shape _handle_websocket_message expects"""
+    message_type: str
+    data: Dict[str, Any]
+
+
+class RawWebSocketClient:
+    """
+    Minimal Polygon stream client
+
+    Features:
+    - connect() authenticates, subscribes and returns when the socket closes (the feed reconnects)
+    - Events are delivered as StreamMessage(ev, raw dict) without model parsing
+    - Status events are logged; auth failures raise
+    """
+
+    def __init__(self, url: str, api_key: str, subscriptions: List[str],
+                 on_message: Callable[[StreamMessage], Awaitable[None]], heartbeat: float = 30.0):
+        self.url = url
+        self.api_key = api_key
+        self.subscriptions = list(subscriptions)
+        self.on_message = on_message
+        self.heartbeat = float(heartbeat)
+        self._session = None
+        self._ws = None
+
+        self.frames_received = 0
+        self.messages_received = 0
+
+    async def _expect_status(self, ws, wanted: str):
+        message = await ws.receive_json()
+        for event in message:
+            if event.get('ev') == 'status':
+                if event.get('status') == wanted:
+                    return
+                if event.get('status') in ('auth_failed', 'error'):
+                    raise ConnectionError(f"Stream rejected connection: {event.get('message')}")
+        raise ConnectionError(f"Expected stream status {wanted!r}, got {message!r}")
+
+    async def connect(self):
+        import aiohttp
+
+        self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.ws_connect(self.url, heartbeat=self.heartbeat, max_msg_size=0) as ws:
+                self._ws = ws
+                await self._expect_status(ws, 'connected')
+                await ws.send_str(json.dumps({'action': 'auth', 'params': self.api_key}))
+                await self._expect_status(ws, 'auth_success')
+                if self.subscriptions:
+                    await ws.send_str(json.dumps({'action': 'subscribe', 'params': ",".join(self.subscriptions)}))
+                logger.info(f"Stream connected to {self.url} with {len(self.subscriptions)} subscriptions")
+
+                async for frame in ws:
+                    if frame.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    self.frames_received += 1
+                    for event in json.loads(frame.data):
+                        event_type = event.get('ev', '')
+                        if event_type == 'status':
+                            logger.debug(f"Stream status: {event.get('message')}")
+                            continue
+                        self.messages_received += 1
+                        await self.on_message(StreamMessage(event_type, event))
+        finally:
+            self._ws = None
+            await self._session.close()
+            self._session = None
+
+    async def disconnect(self):
+        ws: Optional[Any] = self._ws
+        if ws is not None:
+            await ws.close()
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'stream_frames_received': self.frames_received,
+            'stream_messages_received': self.messages_received,
+        }
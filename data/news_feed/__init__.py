@@ -1 +1,17 @@
-# Enhanced News_feed
+#!/usr/bin/env python3
+"""
+News Feed Module
+
+Incremental Polygon news ingestion built on feed_common.AsyncFeed.
+
+Usage:
+    from news_feed import NewsFeed
+
+    feed = NewsFeed()
+    await feed.start()
+"""
+
+from .news_feed import NewsFeed
+
+__all__ = ['NewsFeed']
+__version__ = '1.0.0'
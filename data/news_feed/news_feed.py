@@ -1 +1,172 @@
-# Enhanced News_feed Implementation
+#!/usr/bin/env python3
+"""
+Polygon News Feed
+Incrementally polls /v2/reference/news for articles published since the last cursor
+Stores one row per (article, ticker) with the per-ticker sentiment insight
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from feed_common import AsyncFeed, load_feed_config
+
+logger = logging.getLogger(__name__)
+
+FEED_DIR = Path(__file__).parent
+NEWS_PATH = "/v2/reference/news"
+
+INSERT_NEWS = """
+INSERT INTO news_articles (
+    timestamp, article_id, ticker, title, author, publisher, article_url,
+    description, keywords, sentiment, sentiment_reasoning, feed_source
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def parse_published(value: str) -> Optional[datetime]:
+    """Parse an RFC3339 published_utc value into naive local time, the convention of every feed table"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone().replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return None
+
+
+class NewsFeed(AsyncFeed):
+    """
+    Polygon news feed built on AsyncFeed
+
+    Features:
+    - Only-new-since polling with a published_utc cursor per ticker scope
+    - Without a cursor only the latest page is fetched (newest first), never the whole archive
+    - next_url pagination up to max_pages per poll
+    - Dedup by article ID (same-second articles are fetched again with .gte)
+    - Per-ticker sentiment from the article insights
+    """
+
+    name = "news_feed"
+
+    def __init__(self, config: Optional[dict] = None, feed_dir: Path = FEED_DIR):
+        super().__init__(config if config is not None else load_feed_config(feed_dir), feed_dir)
+
+        polygon_config = self.config.get('polygon', {})
+        self.api_key = polygon_config.get('api_key')
+        self.base_url = polygon_config.get('base_url', 'https://api.polygon.io').rstrip('/')
+
+        news_config = self.config.get('news', {})
+        self.tickers: List[str] = news_config.get('tickers', [])  # empty = market-wide
+        self.page_limit = int(news_config.get('limit', 100))
+        self.max_pages = int(news_config.get('max_pages', 10))
+        self.initial_lookback = news_config.get('initial_published_utc')  # cursor for the first run
+
+    def _cursor_key(self, ticker: Optional[str]) -> str:
+        return f"published_utc:{ticker or '*'}"
+
+    async def poll_once(self) -> int:
+        scopes = self.tickers or [None]
+        counts = await asyncio.gather(*(self._poll_scope(ticker) for ticker in scopes), return_exceptions=True)
+
+        new_items = 0
+        for ticker, count in zip(scopes, counts):
+            if isinstance(count, Exception):
+                logger.error(f"Error polling news for {ticker or 'all tickers'}: {count}")
+            else:
+                new_items += count
+        return new_items
+
+    async def _poll_scope(self, ticker: Optional[str]) -> int:
+        cursor_key = self._cursor_key(ticker)
+        cursor = self.cursors.get(cursor_key, self.initial_lookback)
+
+        # Cold start: one page, newest first; afterwards walk forward from the cursor
+        params: Dict[str, Any] = {
+            'order': 'asc' if cursor else 'desc',
+            'sort': 'published_utc',
+            'limit': self.page_limit,
+            'apiKey': self.api_key,
+        }
+        if ticker:
+            params['ticker'] = ticker
+        if cursor:
+            params['published_utc.gte'] = cursor
+
+        url = self.base_url + NEWS_PATH
+        new_items = 0
+        newest = cursor
+        for _ in range(self.max_pages if cursor else 1):
+            status, data = await self.fetch_json(url, params=params)
+            if status == 304:
+                break
+
+            for article in data.get('results', []):
+                published = article.get('published_utc')
+                if published and (newest is None or published > newest):
+                    newest = published
+                if self.is_new(article.get('id', '')):
+                    self._store_article(article)
+                    new_items += 1
+
+            next_url = data.get('next_url')
+            if not next_url:
+                break
+            # next_url carries its own cursor; only the key needs re-adding
+            url, params = next_url, {'apiKey': self.api_key}
+
+        if newest != cursor:
+            self.cursors.set(cursor_key, newest)
+        return new_items
+
+    def _store_article(self, article: Dict[str, Any]):
+        """Queue one row per ticker mentioned in the article"""
+        try:
+            timestamp = parse_published(article.get('published_utc', '')) or datetime.now()
+            publisher = (article.get('publisher') or {}).get('name')
+            keywords = ",".join(article.get('keywords') or [])
+            insights = {i.get('ticker'): i for i in article.get('insights') or []}
+
+            for ticker in article.get('tickers') or [None]:
+                insight = insights.get(ticker, {})
+                self.write(INSERT_NEWS, (
+                    timestamp,
+                    article.get('id'),
+                    ticker,
+                    article.get('title'),
+                    article.get('author'),
+                    publisher,
+                    article.get('article_url'),
+                    article.get('description'),
+                    keywords,
+                    insight.get('sentiment'),
+                    insight.get('sentiment_reasoning'),
+                    'polygon'
+                ))
+        except Exception as e:
+            logger.error(f"Error storing news article {article.get('id')}: {e}")
+
+
+# Main execution
+async def main():
+    """Run the news feed until interrupted"""
+    config = load_feed_config(FEED_DIR)
+    log_config = config.get('logging', {})
+    logging.basicConfig(
+        level=getattr(logging, log_config.get('level', 'INFO')),
+        format=log_config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    feed = NewsFeed(config)
+    try:
+        await feed.start()
+        while True:
+            await asyncio.sleep(60)
+            logger.info(f"News feed metrics: {feed.get_metrics()}")
+    except KeyboardInterrupt:
+        logger.info("Shutting down news feed...")
+    finally:
+        await feed.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
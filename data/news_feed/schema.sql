@@ -0,0 +1,19 @@
+-- QuestDB Schema for Agentic AI Trading System
+-- News Feed Module - Polygon News Tables
+
+-- One row per (article, ticker) with the ticker's sentiment insight
+CREATE TABLE IF NOT EXISTS news_articles (
+    timestamp TIMESTAMP,
+    article_id STRING,
+    ticker SYMBOL CAPACITY 10000 CACHE,
+    title STRING,
+    author STRING,
+    publisher SYMBOL,
+    article_url STRING,
+    description STRING,
+    keywords STRING,
+    sentiment SYMBOL, -- 'positive', 'neutral', 'negative'
+    sentiment_reasoning STRING,
+
+    feed_source SYMBOL
+) TIMESTAMP(timestamp) PARTITION BY MONTH WAL;
@@ -0,0 +1,93 @@
+import asyncio
+import socket
+from datetime import datetime, timezone
+
+import pytest
+
+from feed_common import SharedHTTPClient
+from feed_common.stub_server import StubServer, synthetic_news
+from news_feed.news_feed import NewsFeed, parse_published
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_client(monkeypatch):
+    # The pooled client is process-wide; each test gets its own validator cache
+    monkeypatch.setattr(SharedHTTPClient, '_instance', None)
+
+
+def make_feed(tmp_path, server, **news):
+    config = {
+        'polygon': {'api_key': 'stub', 'base_url': server.base_url},
+        'news': {'limit': 50, 'max_pages': 20, **news},
+        'rate_limit': {'requests_per_minute': 6000, 'burst': 100},
+        'state': {'file': str(tmp_path / 'state.json')},
+        'spool': {'directory': str(tmp_path / 'spool')},
+    }
+    return NewsFeed(config, feed_dir=tmp_path)
+
+
+def run_polls(server, feed, polls):
+    async def run():
+        await server.start()
+        feed.http.acquire()
+        try:
+            return [await feed.poll_once() for _ in range(polls)]
+        finally:
+            await feed.http.release()
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_cursor_advances_and_duplicates_are_skipped(tmp_path):
+    articles = synthetic_news(120)
+    server = StubServer(articles, port=free_port())
+    feed = make_feed(tmp_path, server, initial_published_utc='2024-01-01T00:00:00Z')
+
+    first, second = run_polls(server, feed, 2)
+
+    assert first == len(articles)
+    assert second == 0
+    assert feed.cursors.get('published_utc:*') == articles[-1]['published_utc']
+    # The .gte cursor re-reads the newest second; those articles are deduplicated
+    assert feed.duplicates_skipped > 0
+    assert feed.writer.pending_rows == len(articles)
+
+
+def test_repeat_poll_gets_not_modified_and_writes_nothing(tmp_path):
+    articles = synthetic_news(60)
+    server = StubServer(articles, port=free_port())
+    feed = make_feed(tmp_path, server, initial_published_utc='2024-01-01T00:00:00Z')
+
+    counts = run_polls(server, feed, 3)
+    duplicates = feed.duplicates_skipped
+
+    assert counts == [len(articles), 0, 0]
+    assert server.not_modified == 1
+    assert feed.http.not_modified == 1
+    assert feed.duplicates_skipped == duplicates  # the cached body was not reprocessed
+    assert feed.writer.pending_rows == len(articles)
+
+
+def test_cold_start_reads_only_the_latest_page(tmp_path):
+    articles = synthetic_news(120)
+    server = StubServer(articles, port=free_port())
+    feed = make_feed(tmp_path, server)
+
+    (count,) = run_polls(server, feed, 1)
+
+    assert count == 50
+    assert server.requests == 1
+    assert feed.cursors.get('published_utc:*') == articles[-1]['published_utc']
+
+
+def test_published_time_is_stored_as_naive_local_time():
+    expected = datetime.fromtimestamp(datetime(2024, 6, 24, 18, 33, 53, tzinfo=timezone.utc).timestamp())
+    assert parse_published("2024-06-24T18:33:53Z") == expected
+    assert parse_published("not a date") is None
@@ -1 +1,18 @@
-# Enhanced Options_flow_feed
+#!/usr/bin/env python3
+"""
+Options Flow Feed Module
+
+Streaming classification of option prints (sweep / block / split / normal) and
+unusual-activity flags from running volume against open interest.
+
+Usage:
+    from options_flow_feed import OptionsFlowDetector
+
+    detector = OptionsFlowDetector()
+    events = detector.on_trade("O:SPY251219C00650000", exchange=301, price=4.2, size=50, timestamp_ms=ts)
+"""
+
+from .options_flow_feed import FlowEvent, OptionsFlowDetector, parse_occ
+
+__all__ = ['FlowEvent', 'OptionsFlowDetector', 'parse_occ']
+__version__ = '1.0.0'
@@ -1 +1,272 @@
-# Enhanced Options_flow_feed Implementation
+#!/usr/bin/env python3
+"""
+Streaming Unusual Options Flow Detector
+Clusters option prints per contract across exchanges to label sweeps, blocks and splits
+Keeps running contract volume against cached open interest to flag unusual activity
+Memory is bounded by LRU caps on tracked contracts and cached open interest
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FLOW_SWEEP = 'sweep'
+FLOW_BLOCK = 'block'
+FLOW_SPLIT = 'split'
+FLOW_NORMAL = 'normal'
+
+
+@dataclass
+class OptionContract:
+    """Fields parsed from an OCC option symbol"""
+    underlying: str
+    expiration: date
+    option_type: str  # 'call' or 'put'
+    strike: float
+
+
+def parse_occ(symbol: str) -> Optional[OptionContract]:
+    """Parse 'O:SPY251219C00650000' (the O: prefix is optional)"""
+    ticker = symbol[2:] if symbol.startswith("O:") else symbol
+    if len(ticker) < 16:
+        return None
+    root, tail = ticker[:-15], ticker[-15:]
+    try:
+        expiration = date(2000 + int(tail[0:2]), int(tail[2:4]), int(tail[4:6]))
+        option_type = {'C': 'call', 'P': 'put'}[tail[6]]
+        strike = int(tail[7:]) / 1000.0
+    except (KeyError, ValueError):
+        return None
+    return OptionContract(root, expiration, option_type, strike)
+
+
+@dataclass
+class FlowEvent:
+    """One classified cluster of prints on a contract"""
+    contract: str
+    details: OptionContract
+    timestamp_ms: int
+    price: float  # size-weighted average
+    size: int
+    premium: float  # price * size * multiplier
+    prints: int
+    exchanges: int
+    flow_type: str
+    volume: int  # contract volume for the day including this cluster
+    open_interest: Optional[int]
+    volume_oi_ratio: Optional[float]
+    unusual: bool
+
+
+class ContractFlow:
+    """Per-contract running state"""
+
+    __slots__ = (
+        'details', 'day', 'volume', 'unusual_flagged',
+        'cluster_start', 'cluster_last', 'cluster_size', 'cluster_notional',
+        'cluster_prints', 'cluster_exchanges', 'cluster_max_print', 'cluster_sweep_condition',
+    )
+
+    def __init__(self, details: OptionContract):
+        self.details = details
+        self.day: Optional[int] = None
+        self.volume = 0
+        self.unusual_flagged = False
+        self._reset_cluster()
+
+    def _reset_cluster(self):
+        self.cluster_start = 0
+        self.cluster_last = 0
+        self.cluster_size = 0
+        self.cluster_notional = 0.0
+        self.cluster_prints = 0
+        self.cluster_exchanges = 0  # bitmask of exchange ids
+        self.cluster_max_print = 0
+        self.cluster_sweep_condition = False
+
+
+class OptionsFlowDetector:
+    """
+    Incremental options flow classifier
+
+    Features:
+    - Prints on a contract within cluster_window_ms of each other form one cluster
+    - sweep: cluster spans several exchanges (or carries an intermarket sweep condition)
+    - block: one large print on a single exchange
+    - split: several prints on one exchange adding up to block size
+    - Running day volume vs cached open interest; unusual once volume/OI or premium crosses a threshold
+    - LRU caps on contracts and open interest bound memory at full OPRA rates
+    """
+
+    def __init__(self, cluster_window_ms: int = 500, block_size: int = 100,
+                 block_premium: float = 100000.0, unusual_ratio: float = 1.0,
+                 unusual_min_volume: int = 500, unusual_premium: float = 250000.0,
+                 sweep_conditions: Iterable[int] = (), multiplier: int = 100,
+                 max_contracts: int = 200000, max_open_interest: int = 1000000):
+        self.cluster_window_ms = int(cluster_window_ms)
+        self.block_size = int(block_size)
+        self.block_premium = float(block_premium)
+        self.unusual_ratio = float(unusual_ratio)
+        self.unusual_min_volume = int(unusual_min_volume)
+        self.unusual_premium = float(unusual_premium)
+        self.sweep_conditions = set(sweep_conditions)
+        self.multiplier = int(multiplier)
+        self.max_contracts = int(max_contracts)
+        self.max_open_interest = int(max_open_interest)
+
+        self.contracts: "OrderedDict[str, ContractFlow]" = OrderedDict()
+        self.open_interest: "OrderedDict[str, int]" = OrderedDict()
+        self.open_clusters: Dict[str, None] = {}  # contracts with a cluster in progress
+
+        self.prints = 0
+        self.events = 0
+        self.unusual_contracts = 0
+        self.evicted = 0
+        self.flow_counts: Dict[str, int] = {FLOW_SWEEP: 0, FLOW_BLOCK: 0, FLOW_SPLIT: 0, FLOW_NORMAL: 0}
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return symbol if symbol.startswith("O:") else "O:" + symbol
+
+    def set_open_interest(self, symbol: str, open_interest: int):
+        """Cache open interest for a contract (e.g. from a chain snapshot)"""
+        key = self._key(symbol)
+        self.open_interest[key] = int(open_interest)
+        self.open_interest.move_to_end(key)
+        while len(self.open_interest) > self.max_open_interest:
+            self.open_interest.popitem(last=False)
+
+    def on_trade(self, symbol: str, exchange: int, price: float, size: int, timestamp_ms: int,
+                 conditions: Optional[Iterable[int]] = None) -> List[FlowEvent]:
+        """Add one print; returns clusters closed by it (the previous cluster, any LRU eviction)"""
+        if price <= 0 or size <= 0:
+            return []
+        self.prints += 1
+        key = self._key(symbol)
+        events: List[FlowEvent] = []
+
+        state = self.contracts.get(key)
+        if state is None:
+            details = parse_occ(key)
+            if details is None:
+                return []
+            state = ContractFlow(details)
+            self.contracts[key] = state
+            while len(self.contracts) > self.max_contracts:
+                evicted_key, evicted = self.contracts.popitem(last=False)
+                self.evicted += 1
+                event = self._close_cluster(evicted_key, evicted)
+                if event is not None:
+                    events.append(event)
+        else:
+            self.contracts.move_to_end(key)
+
+        day = timestamp_ms // 86_400_000
+        if state.day != day:
+            if state.cluster_prints:
+                event = self._close_cluster(key, state)
+                if event is not None:
+                    events.append(event)
+            state.day = day
+            state.volume = 0
+            state.unusual_flagged = False
+        elif state.cluster_prints and timestamp_ms - state.cluster_last > self.cluster_window_ms:
+            event = self._close_cluster(key, state)
+            if event is not None:
+                events.append(event)
+
+        if not state.cluster_prints:
+            state.cluster_start = timestamp_ms
+            self.open_clusters[key] = None
+        state.cluster_last = max(state.cluster_last, timestamp_ms)
+        state.cluster_size += size
+        state.cluster_notional += price * size
+        state.cluster_prints += 1
+        # OPRA participant ids (300+) fit a 64-bit mask modulo 64
+        state.cluster_exchanges |= 1 << (int(exchange) & 63)
+        state.cluster_max_print = max(state.cluster_max_print, size)
+        if conditions and self.sweep_conditions.intersection(conditions):
+            state.cluster_sweep_condition = True
+        state.volume += size
+
+        return events
+
+    def expire(self, now_ms: int) -> List[FlowEvent]:
+        """Close clusters idle for longer than the window (call on a short timer)"""
+        events = []
+        cutoff = now_ms - self.cluster_window_ms
+        for key in list(self.open_clusters):
+            state = self.contracts.get(key)
+            if state is None:
+                self.open_clusters.pop(key, None)
+            elif state.cluster_last < cutoff:
+                event = self._close_cluster(key, state)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def _classify(self, state: ContractFlow, premium: float) -> str:
+        exchanges = bin(state.cluster_exchanges).count("1")
+        if state.cluster_sweep_condition or (exchanges > 1 and state.cluster_prints > 1):
+            return FLOW_SWEEP
+        large = state.cluster_size >= self.block_size or premium >= self.block_premium
+        if large and state.cluster_prints == 1:
+            return FLOW_BLOCK
+        if large:
+            return FLOW_SPLIT
+        return FLOW_NORMAL
+
+    def _close_cluster(self, key: str, state: ContractFlow) -> Optional[FlowEvent]:
+        self.open_clusters.pop(key, None)
+        if not state.cluster_prints:
+            return None
+
+        price = state.cluster_notional / state.cluster_size
+        premium = state.cluster_notional * self.multiplier
+        flow_type = self._classify(state, premium)
+
+        open_interest = self.open_interest.get(key)
+        ratio = state.volume / open_interest if open_interest else None
+        unusual = state.unusual_flagged
+        if not unusual:
+            by_ratio = ratio is not None and ratio >= self.unusual_ratio and state.volume >= self.unusual_min_volume
+            by_premium = premium >= self.unusual_premium and flow_type != FLOW_NORMAL
+            if by_ratio or by_premium:
+                unusual = state.unusual_flagged = True
+                self.unusual_contracts += 1
+
+        event = FlowEvent(
+            contract=key,
+            details=state.details,
+            timestamp_ms=state.cluster_start,
+            price=price,
+            size=state.cluster_size,
+            premium=premium,
+            prints=state.cluster_prints,
+            exchanges=bin(state.cluster_exchanges).count("1"),
+            flow_type=flow_type,
+            volume=state.volume,
+            open_interest=open_interest,
+            volume_oi_ratio=ratio,
+            unusual=unusual
+        )
+        self.events += 1
+        self.flow_counts[flow_type] += 1
+        state._reset_cluster()
+        return event
+
+    def get_metrics(self) -> Dict[str, int]:
+        metrics = {
+            'option_prints': self.prints,
+            'option_flow_events': self.events,
+            'option_unusual_contracts': self.unusual_contracts,
+            'option_contracts_tracked': len(self.contracts),
+            'option_contracts_evicted': self.evicted,
+            'option_open_interest_cached': len(self.open_interest),
+        }
+        metrics.update({f'option_flow_{name}': count for name, count in self.flow_counts.items()})
+        return metrics
@@ -0,0 +1,94 @@
+from datetime import date
+
+from options_flow_feed.options_flow_feed import (
+    FLOW_BLOCK, FLOW_NORMAL, FLOW_SPLIT, FLOW_SWEEP, OptionsFlowDetector, parse_occ,
+)
+
+CONTRACT = "O:SPY251219C00650000"
+DAY_MS = 86_400_000
+T0 = 1_750_000_000_000  # mid-session, well inside one UTC day
+
+
+def close_all(detector, prints):
+    events = []
+    for print_ in prints:
+        events.extend(detector.on_trade(CONTRACT, *print_))
+    last = max(print_[3] for print_ in prints)
+    events.extend(detector.expire(last + detector.cluster_window_ms + 1))
+    return events
+
+
+def test_parse_occ():
+    details = parse_occ(CONTRACT)
+    assert details.underlying == "SPY"
+    assert details.expiration == date(2025, 12, 19)
+    assert details.option_type == "call"
+    assert details.strike == 650.0
+    assert parse_occ("SPY") is None
+    assert parse_occ("O:SPY251219X00650000") is None
+
+
+def test_prints_across_exchanges_are_a_sweep():
+    detector = OptionsFlowDetector(block_size=100)
+    (event,) = close_all(detector, [(301, 4.0, 10, T0), (302, 4.1, 10, T0 + 50), (303, 4.2, 10, T0 + 90)])
+
+    assert event.flow_type == FLOW_SWEEP
+    assert (event.prints, event.exchanges, event.size) == (3, 3, 30)
+    assert event.price == (4.0 * 10 + 4.1 * 10 + 4.2 * 10) / 30
+
+
+def test_sweep_condition_marks_a_single_exchange_cluster():
+    detector = OptionsFlowDetector(sweep_conditions=[233])
+    events = detector.on_trade(CONTRACT, 301, 4.0, 5, T0, conditions=[233])
+    (event,) = events + detector.expire(T0 + 1000)
+
+    assert event.flow_type == FLOW_SWEEP
+
+
+def test_one_large_print_is_a_block_and_several_on_one_exchange_a_split():
+    detector = OptionsFlowDetector(block_size=100, block_premium=1e12)
+    (block,) = close_all(detector, [(301, 4.0, 150, T0)])
+    (split,) = close_all(detector, [(301, 4.0, 60, T0 + 5000), (301, 4.0, 60, T0 + 5100)])
+    (normal,) = close_all(detector, [(301, 4.0, 20, T0 + 10000), (301, 4.0, 20, T0 + 10100)])
+
+    assert block.flow_type == FLOW_BLOCK
+    assert split.flow_type == FLOW_SPLIT
+    assert normal.flow_type == FLOW_NORMAL
+    assert detector.flow_counts == {FLOW_SWEEP: 0, FLOW_BLOCK: 1, FLOW_SPLIT: 1, FLOW_NORMAL: 1}
+
+
+def test_a_gap_longer_than_the_window_closes_the_cluster():
+    detector = OptionsFlowDetector(cluster_window_ms=500)
+    assert detector.on_trade(CONTRACT, 301, 4.0, 10, T0) == []
+    (first,) = detector.on_trade(CONTRACT, 302, 4.0, 10, T0 + 501)
+
+    assert first.prints == 1 and first.timestamp_ms == T0
+    assert list(detector.open_clusters) == [CONTRACT]
+
+
+def test_day_rollover_closes_the_cluster_and_resets_volume():
+    detector = OptionsFlowDetector(unusual_ratio=1.0, unusual_min_volume=100, unusual_premium=1e12)
+    detector.set_open_interest(CONTRACT, 100)
+    (late,) = close_all(detector, [(301, 1.0, 60, T0), (301, 1.0, 60, T0 + 100)])
+    assert late.volume == 120 and late.unusual
+
+    # The next print lands in the next day: volume and the unusual flag start over
+    detector.on_trade(CONTRACT, 301, 1.0, 10, T0 + 1000)
+    (closed,) = detector.on_trade(CONTRACT, 301, 1.0, 30, T0 + DAY_MS)
+    (next_day,) = detector.expire(T0 + DAY_MS + 1000)
+
+    assert closed.volume == 130
+    assert next_day.volume == 30
+    assert next_day.volume_oi_ratio == 0.3
+    assert not next_day.unusual
+    assert detector.unusual_contracts == 1
+
+
+def test_contract_cap_closes_the_evicted_contracts_cluster():
+    detector = OptionsFlowDetector(max_contracts=1)
+    detector.on_trade(CONTRACT, 301, 4.0, 10, T0)
+    (evicted,) = detector.on_trade("O:SPY251219P00600000", 301, 3.0, 10, T0 + 10)
+
+    assert evicted.contract == CONTRACT
+    assert detector.evicted == 1
+    assert list(detector.contracts) == ["O:SPY251219P00600000"]
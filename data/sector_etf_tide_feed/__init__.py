@@ -1 +1,25 @@
-# Enhanced Sector_etf_tide_feed
+#!/usr/bin/env python3
+"""
+Sector ETF Tide Feed Module
+
+Sector breadth ("tide") for the SPDR sector ETFs computed from constituent prices,
+volume, moving averages and option premium in one vectorized pass per update.
+
+Components:
+- SectorIndex: constituent -> sector membership flattened into index arrays
+- SectorBreadthEngine: per-constituent state and the per-sector aggregation
+- load_sector_index: builds the index from settings.yaml (and an optional holdings CSV)
+
+Usage:
+    from sector_etf_tide_feed import SectorBreadthEngine, load_sector_index
+
+    engine = SectorBreadthEngine(load_sector_index(), ma_periods=[20, 50, 200])
+    engine.load_snapshot(symbols, prices, prev_closes, volumes)
+    for tide in engine.tides():
+        print(tide.sector, tide.advancers, tide.decliners)
+"""
+
+from .sector_etf_tide_feed import SectorBreadthEngine, SectorIndex, SectorTide, load_sector_index
+
+__all__ = ['SectorBreadthEngine', 'SectorIndex', 'SectorTide', 'load_sector_index']
+__version__ = '1.0.0'
@@ -0,0 +1,3 @@
+-- Sector ETF Tide Feed Schema
+-- Breadth rows are written by the live feed (see sector_tide in live_feed/schema.sql),
+-- so the engine in this package needs no tables of its own.
@@ -1 +1,262 @@
-# Enhanced Sector_etf_tide_feed Implementation
+#!/usr/bin/env python3
+"""
+Sector ETF Tide (Breadth) Engine
+Maps constituents to sector ETFs through a precomputed membership index
+Advance/decline, up/down volume, net premium and % above moving averages for every sector in one vectorized pass
+"""
+
+import csv
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Sector map (and optional holdings file) shipped with this package
+FEED_DIR = Path(__file__).parent.absolute()
+
+
+class SectorIndex:
+    """
+    Constituent -> sector ETF membership, flattened once
+
+    Every (constituent row, sector code) pair is stored in two parallel int arrays, so a
+    per-constituent array is aggregated to every sector with a single np.bincount even
+    when a name belongs to several ETFs.
+    """
+
+    def __init__(self, sectors: Mapping[str, Iterable[str]]):
+        members = {etf.upper(): list(dict.fromkeys(s.upper() for s in symbols))
+                   for etf, symbols in sectors.items()}
+        self.sectors: List[str] = sorted(etf for etf, symbols in members.items() if symbols)
+        self.symbols: List[str] = sorted({s for symbols in members.values() for s in symbols})
+        self.positions: Dict[str, int] = {symbol: row for row, symbol in enumerate(self.symbols)}
+
+        rows, codes = [], []
+        for code, etf in enumerate(self.sectors):
+            for symbol in members[etf]:
+                rows.append(self.positions[symbol])
+                codes.append(code)
+        self.member_rows = np.asarray(rows, dtype=np.int64)
+        self.member_sectors = np.asarray(codes, dtype=np.int64)
+        self.sizes = np.bincount(self.member_sectors, minlength=len(self.sectors))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def lookup(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row of each symbol in the index (-1 when it is not a constituent)"""
+        positions = self.positions
+        return np.fromiter((positions.get(symbol, -1) for symbol in symbols),
+                           dtype=np.int64, count=len(symbols))
+
+    def aggregate(self, values: np.ndarray) -> np.ndarray:
+        """Sum a per-constituent array into one value per sector"""
+        return np.bincount(self.member_sectors, weights=values[self.member_rows],
+                           minlength=len(self.sectors))
+
+
+def load_sector_index(settings_file: Optional[str] = None) -> SectorIndex:
+    """
+    Build the index from the `sectors` map in settings.yaml plus an optional
+    holdings CSV (etf,symbol per line, e.g. exported from an ETF holdings endpoint)
+    """
+    path = Path(settings_file) if settings_file else FEED_DIR / "settings.yaml"
+    with open(path, 'r') as f:
+        settings = yaml.safe_load(f) or {}
+
+    sectors: Dict[str, List[str]] = {etf: list(symbols or []) for etf, symbols in (settings.get('sectors') or {}).items()}
+
+    holdings_file = settings.get('holdings_file')
+    if holdings_file:
+        holdings_path = Path(holdings_file)
+        if not holdings_path.is_absolute():
+            holdings_path = path.parent / holdings_path
+        try:
+            with open(holdings_path, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    etf, symbol = (row.get('etf') or '').strip(), (row.get('symbol') or '').strip()
+                    if etf and symbol:
+                        sectors.setdefault(etf, []).append(symbol)
+        except OSError as e:
+            logger.error(f"Error reading sector holdings {holdings_path}: {e}")
+
+    index = SectorIndex(sectors)
+    logger.info(f"Sector index: {len(index.sectors)} sectors, {len(index)} constituents")
+    return index
+
+
+@dataclass
+class SectorTide:
+    """Breadth of one sector ETF at one pass"""
+    sector: str
+    members: int
+    reporting: int  # members with a price and previous close
+    advancers: int
+    decliners: int
+    unchanged: int
+    up_volume: float
+    down_volume: float
+    net_premium: float  # call minus put option premium on the constituents this session
+    pct_above: Dict[int, Optional[float]]  # moving average period -> % of members above it
+
+    @property
+    def advance_decline_ratio(self) -> Optional[float]:
+        return self.advancers / self.decliners if self.decliners else None
+
+    @property
+    def up_down_volume_ratio(self) -> Optional[float]:
+        return self.up_volume / self.down_volume if self.down_volume else None
+
+
+class SectorBreadthEngine:
+    """
+    Vectorized sector breadth over thousands of constituents
+
+    Features:
+    - Dense per-constituent arrays (price, previous close, volume, moving averages, premium)
+    - Full-market snapshots or LATEST ON query results loaded in bulk by symbol lookup
+    - Live trades and option flow update single rows in O(1) between snapshots
+    - compute() aggregates every sector with a handful of np.bincount calls
+    """
+
+    def __init__(self, index: SectorIndex, ma_periods: Sequence[int] = (20, 50, 200)):
+        self.index = index
+        self.ma_periods = [int(period) for period in ma_periods]
+
+        size = len(index)
+        self.price = np.full(size, np.nan)
+        self.prev_close = np.full(size, np.nan)
+        self.volume = np.zeros(size)
+        self.premium = np.zeros(size)
+        self.averages = np.full((len(self.ma_periods), size), np.nan)
+        self.session: Optional[date] = None
+
+        self.snapshot_rows = 0
+        self.trade_updates = 0
+        self.passes = 0
+        self.last_pass_ms = 0.0
+
+    def start_session(self, session: date):
+        """Reset intraday accumulators when the trading day changes"""
+        if session != self.session:
+            self.session = session
+            self.volume.fill(0.0)
+            self.premium.fill(0.0)
+
+    def load_snapshot(self, symbols: Sequence[str], price: Sequence[float],
+                      prev_close: Optional[Sequence[float]] = None,
+                      volume: Optional[Sequence[float]] = None) -> int:
+        """Bulk-load aligned arrays; rows for non-constituents are ignored. Returns rows applied"""
+        rows = self.index.lookup(symbols)
+        keep = rows >= 0
+        rows = rows[keep]
+
+        self.price[rows] = np.asarray(price, dtype=np.float64)[keep]
+        if prev_close is not None:
+            self.prev_close[rows] = np.asarray(prev_close, dtype=np.float64)[keep]
+        if volume is not None:
+            self.volume[rows] = np.nan_to_num(np.asarray(volume, dtype=np.float64)[keep])
+
+        self.snapshot_rows += len(rows)
+        return len(rows)
+
+    def load_averages(self, symbols: Sequence[str], averages: Mapping[int, Sequence[float]]) -> int:
+        """Bulk-load moving averages keyed by period"""
+        rows = self.index.lookup(symbols)
+        keep = rows >= 0
+        for slot, period in enumerate(self.ma_periods):
+            values = averages.get(period)
+            if values is not None:
+                self.averages[slot, rows[keep]] = np.asarray(values, dtype=np.float64)[keep]
+        return int(keep.sum())
+
+    def on_trade(self, symbol: str, price: float, size: float) -> bool:
+        row = self.index.positions.get(symbol)
+        if row is None or price <= 0:
+            return False
+        self.price[row] = price
+        self.volume[row] += size
+        self.trade_updates += 1
+        return True
+
+    def add_premium(self, underlying: str, premium: float, option_type: str) -> bool:
+        """Accumulate option premium on a constituent (calls positive, puts negative)"""
+        row = self.index.positions.get(underlying)
+        if row is None:
+            return False
+        self.premium[row] += premium if option_type == 'call' else -premium
+        return True
+
+    def compute(self) -> Dict[str, np.ndarray]:
+        """One pass over all constituents; every array is indexed by sector code"""
+        started = time.perf_counter()
+        aggregate = self.index.aggregate
+
+        price, prev_close = self.price, self.prev_close
+        with np.errstate(invalid='ignore'):
+            reporting = np.isfinite(price) & np.isfinite(prev_close) & (prev_close > 0)
+            change = np.where(reporting, price - prev_close, 0.0)
+            advancing = reporting & (change > 0)
+            declining = reporting & (change < 0)
+
+            result = {
+                'members': self.index.sizes.astype(np.float64),
+                'reporting': aggregate(reporting.astype(np.float64)),
+                'advancers': aggregate(advancing.astype(np.float64)),
+                'decliners': aggregate(declining.astype(np.float64)),
+                'unchanged': aggregate((reporting & (change == 0)).astype(np.float64)),
+                'up_volume': aggregate(np.where(advancing, self.volume, 0.0)),
+                'down_volume': aggregate(np.where(declining, self.volume, 0.0)),
+                'net_premium': aggregate(self.premium),
+            }
+
+            for slot, period in enumerate(self.ma_periods):
+                average = self.averages[slot]
+                known = np.isfinite(price) & np.isfinite(average) & (average > 0)
+                counted = aggregate(known.astype(np.float64))
+                above = aggregate((known & (price > average)).astype(np.float64))
+                result[f'pct_above_ma_{period}'] = np.where(counted > 0, 100.0 * above / np.maximum(counted, 1), np.nan)
+
+        self.passes += 1
+        self.last_pass_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def tides(self) -> List[SectorTide]:
+        """compute() as one SectorTide per sector"""
+        result = self.compute()
+        tides = []
+        for code, sector in enumerate(self.index.sectors):
+            pct_above = {}
+            for period in self.ma_periods:
+                value = result[f'pct_above_ma_{period}'][code]
+                pct_above[period] = float(value) if np.isfinite(value) else None
+            tides.append(SectorTide(
+                sector=sector,
+                members=int(result['members'][code]),
+                reporting=int(result['reporting'][code]),
+                advancers=int(result['advancers'][code]),
+                decliners=int(result['decliners'][code]),
+                unchanged=int(result['unchanged'][code]),
+                up_volume=float(result['up_volume'][code]),
+                down_volume=float(result['down_volume'][code]),
+                net_premium=float(result['net_premium'][code]),
+                pct_above=pct_above
+            ))
+        return tides
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            'sector_tide_sectors': len(self.index.sectors),
+            'sector_tide_constituents': len(self.index),
+            'sector_tide_snapshot_rows': self.snapshot_rows,
+            'sector_tide_trade_updates': self.trade_updates,
+            'sector_tide_passes': self.passes,
+            'sector_tide_last_pass_ms': self.last_pass_ms,
+        }
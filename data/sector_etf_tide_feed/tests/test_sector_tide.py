@@ -0,0 +1,95 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from sector_etf_tide_feed.sector_etf_tide_feed import SectorBreadthEngine, SectorIndex, load_sector_index
+
+SECTORS = {
+    'XLK': ['AAPL', 'MSFT', 'NVDA'],
+    'XLC': ['GOOGL', 'META'],
+    'QQQ': ['AAPL', 'MSFT', 'GOOGL', 'META', 'AMZN'],
+    'XLE': [],
+}
+
+
+def reference(engine, sectors):
+    """Per-sector loop over members, the plain version of compute()"""
+    tides = {}
+    for etf, symbols in sectors.items():
+        rows = [engine.index.positions[symbol] for symbol in symbols]
+        price, prev_close = engine.price[rows], engine.prev_close[rows]
+        reporting = np.isfinite(price) & np.isfinite(prev_close)
+        change = np.where(reporting, price - np.where(reporting, prev_close, 0.0), 0.0)
+        tides[etf] = {
+            'reporting': int(reporting.sum()),
+            'advancers': int((reporting & (change > 0)).sum()),
+            'decliners': int((reporting & (change < 0)).sum()),
+            'up_volume': float(engine.volume[rows][reporting & (change > 0)].sum()),
+            'net_premium': float(engine.premium[rows].sum()),
+        }
+    return tides
+
+
+def test_index_skips_empty_sectors_and_keeps_multi_etf_members_once():
+    index = SectorIndex({**SECTORS, 'XLK': SECTORS['XLK'] + ['aapl']})
+    assert index.sectors == ['QQQ', 'XLC', 'XLK']
+    assert len(index) == 6
+    assert index.sizes.tolist() == [5, 2, 3]
+    assert index.lookup(['MSFT', 'TSLA']).tolist() == [index.positions['MSFT'], -1]
+
+
+def test_bincount_aggregation_matches_a_per_sector_loop():
+    sectors = {etf: symbols for etf, symbols in SECTORS.items() if symbols}
+    engine = SectorBreadthEngine(SectorIndex(sectors), ma_periods=(20,))
+    engine.load_snapshot(['AAPL', 'MSFT', 'NVDA', 'GOOGL', 'META', 'AMZN', 'TSLA'],
+                         price=[190, 400, 120, 170, 500, np.nan, 250],
+                         prev_close=[185, 410, 120, 160, np.nan, 180, 240],
+                         volume=[1e6, 2e6, 3e6, 4e6, 5e6, 6e6, 7e6])
+    engine.add_premium('AAPL', 1000.0, 'call')
+    engine.add_premium('GOOGL', 400.0, 'put')
+
+    result = engine.compute()
+    expected = reference(engine, sectors)
+    for code, etf in enumerate(engine.index.sectors):
+        for field, value in expected[etf].items():
+            assert result[field][code] == pytest.approx(value), (etf, field)
+
+    # AAPL, MSFT and GOOGL count in both of their sectors
+    qqq = engine.index.sectors.index('QQQ')
+    assert (result['advancers'][qqq], result['decliners'][qqq]) == (2, 1)
+    assert result['net_premium'][qqq] == 600.0
+
+
+def test_missing_prices_are_not_reporting_and_unknown_averages_are_nan():
+    engine = SectorBreadthEngine(SectorIndex(SECTORS), ma_periods=(20, 50))
+    engine.load_snapshot(['AAPL', 'MSFT'], price=[190, 400], prev_close=[185, np.nan])
+    engine.load_averages(['AAPL', 'MSFT'], {20: [180, 410]})
+
+    tides = {tide.sector: tide for tide in engine.tides()}
+    xlk, xlc = tides['XLK'], tides['XLC']
+    assert (xlk.members, xlk.reporting, xlk.advancers) == (3, 1, 1)
+    assert xlk.pct_above == {20: 50.0, 50: None}
+    assert xlc.reporting == 0
+    assert xlc.advance_decline_ratio is None
+    assert xlc.pct_above == {20: None, 50: None}
+
+
+def test_trades_update_price_and_volume_and_sessions_reset():
+    engine = SectorBreadthEngine(SectorIndex(SECTORS))
+    engine.load_snapshot(['NVDA'], price=[120], prev_close=[118])
+    assert engine.on_trade('NVDA', 121.0, 300)
+    assert not engine.on_trade('TSLA', 250.0, 100)
+    assert engine.volume[engine.index.positions['NVDA']] == 300
+
+    engine.start_session(date(2024, 6, 24))
+    assert engine.volume.sum() == 0
+
+
+def test_load_sector_index_reads_the_holdings_file(tmp_path):
+    (tmp_path / 'holdings.csv').write_text("etf,symbol\nXLK,AVGO\nXLF,JPM\n")
+    (tmp_path / 'settings.yaml').write_text("sectors:\n  XLK: [AAPL]\nholdings_file: holdings.csv\n")
+
+    index = load_sector_index(str(tmp_path / 'settings.yaml'))
+    assert index.sectors == ['XLF', 'XLK']
+    assert index.sizes.tolist() == [1, 2]